@@ -6,31 +6,40 @@ Enhanced endpoints for admin dashboard v2:
 - Delayed jobs alerts
 - Real-time stats
 - Manual job assignment
+- Bulk status changes
 - Cursor-based pagination
 """
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.database import get_db
-from app.api.deps import get_current_admin_user
+from app.database import get_db, get_async_db, get_read_db, get_async_read_db
+from app.api.deps import get_current_admin_user, get_current_admin_user_async
 from app.models import (
-    User, Booking, BookingStatus, BookingStatusHistory,
-    CleanerProfile, CleanerStatus, UserRole
+    User, Address, Booking, BookingStatus, BookingStatusHistory,
+    CleanerProfile, CleanerStatus, UserRole, SLAAlert
 )
 from app.models.employee import Employee, EmployeeAccountStatus, EmployeeCleanerStatus
 from uuid import UUID
 from app.services.job_state_machine import JobStateMachine
-from app.services.events import event_publisher, EventType
+from app.services.events import EventType
+from app.services.outbox import enqueue_event, outbox_relay
+from app.services.cleaner_assignment import get_region_from_city, CITY_REGION_MAP
 from app.services.cache import cache_service
+from app.services.live_counters import live_counters
+from app.services.sla_monitor import schedule_sla_deadline
 from app.core.exceptions import NotFoundException, BadRequestException
+from app.core.pagination import Keyset, estimated_row_count, cached_count
 
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 
+JOBS_BY_ID = Keyset(Booking.id)
+
 
 # ============ Response Schemas ============
 
@@ -59,6 +68,10 @@ class DelayedJobDTO(BaseModel):
     cleaner_name: Optional[str] = None
     customer_name: str
     city: str
+    breach_type: str
+    escalation_level: int
+    first_breach_at: str
+    last_notified_at: Optional[str] = None
 
 
 class JobListItem(BaseModel):
@@ -103,6 +116,33 @@ class AssignCleanerRequest(BaseModel):
     legacy_cleaner_id: Optional[int] = None  # Legacy: User-based cleaner ID
 
 
+class BulkTransitionRequest(BaseModel):
+    """Request to change the status of many jobs; select by IDs and/or filters."""
+    status: BookingStatus  # cancelled or pending_assignment
+    reason: Optional[str] = None
+    job_ids: Optional[List[int]] = Field(None, max_length=5000)
+    region: Optional[str] = None  # Region code, e.g. DXB
+    cleaner_id: Optional[int] = None  # Legacy: User-based cleaner ID
+    employee_id: Optional[str] = None  # UUID of the assigned employee
+    scheduled_from: Optional[datetime] = None
+    scheduled_to: Optional[datetime] = None  # Exclusive
+
+
+class BulkTransitionSkip(BaseModel):
+    """A selected job that was not changed."""
+    job_id: int
+    status: Optional[str] = None
+    reason: str  # not_found, invalid_transition or modified
+
+
+class BulkTransitionResponse(BaseModel):
+    """Result of a bulk status change."""
+    status: str
+    updated_count: int
+    updated_job_ids: List[int]
+    skipped: List[BulkTransitionSkip]
+
+
 # ============ Endpoints ============
 
 @router.get("/cleaners/status", response_model=List[CleanerStatusDTO])
@@ -152,39 +192,59 @@ async def get_delayed_jobs(
     """
     Get jobs that have breached their SLA deadline.
     
-    Returns jobs where:
-    - Status is ASSIGNED or IN_PROGRESS
-    - SLA deadline has passed OR scheduled time + 10 minutes has passed
+    Reads the open alerts maintained by the SLA monitor (jobs assigned,
+    in progress or paused that missed their start deadline), with the
+    escalation level reached so far.
     """
     now = datetime.now(timezone.utc)
-    sla_threshold = timedelta(minutes=10)
+    cleaner = aliased(User)
+    customer = aliased(User)
     
-    # Query for delayed jobs
-    delayed_jobs = db.query(Booking).filter(
-        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS]),
-        or_(
-            Booking.sla_deadline < now,
-            Booking.scheduled_date + sla_threshold < now
-        )
+    rows = db.query(
+        SLAAlert,
+        Booking.booking_number,
+        Booking.status,
+        Booking.scheduled_date,
+        cleaner.first_name.label("cleaner_first_name"),
+        cleaner.last_name.label("cleaner_last_name"),
+        customer.first_name.label("customer_first_name"),
+        customer.last_name.label("customer_last_name"),
+        Address.city,
+    ).join(
+        Booking, Booking.id == SLAAlert.booking_id
+    ).outerjoin(
+        cleaner, cleaner.id == Booking.cleaner_id
+    ).outerjoin(
+        customer, customer.id == Booking.customer_id
+    ).outerjoin(
+        Address, Address.id == Booking.address_id
+    ).filter(
+        SLAAlert.resolved_at == None
     ).order_by(Booking.scheduled_date.asc()).all()
     
     result = []
-    for job in delayed_jobs:
-        # Calculate delay
-        deadline = job.sla_deadline or (job.scheduled_date + sla_threshold)
-        delay = now - deadline
-        delay_minutes = max(0, int(delay.total_seconds() / 60))
+    for row in rows:
+        alert = row.SLAAlert
+        # Still-unstarted jobs keep getting later; started jobs keep their final delay
+        if alert.breach_type == "start_delayed":
+            delay_minutes = max(0, int((now - alert.sla_deadline).total_seconds() / 60))
+        else:
+            delay_minutes = alert.delay_minutes
         
         result.append(DelayedJobDTO(
-            id=job.id,
-            booking_number=job.booking_number,
-            status=job.status.value,
-            scheduled_date=job.scheduled_date.isoformat(),
-            sla_deadline=job.sla_deadline.isoformat() if job.sla_deadline else None,
+            id=alert.booking_id,
+            booking_number=row.booking_number,
+            status=row.status.value,
+            scheduled_date=row.scheduled_date.isoformat(),
+            sla_deadline=alert.sla_deadline.isoformat(),
             delay_minutes=delay_minutes,
-            cleaner_name=job.cleaner.full_name if job.cleaner else None,
-            customer_name=job.customer.full_name if job.customer else "Unknown",
-            city=job.address.city if job.address else "Unknown"
+            cleaner_name=f"{row.cleaner_first_name} {row.cleaner_last_name}" if row.cleaner_first_name is not None else None,
+            customer_name=f"{row.customer_first_name} {row.customer_last_name}" if row.customer_first_name is not None else "Unknown",
+            city=row.city or "Unknown",
+            breach_type=alert.breach_type,
+            escalation_level=alert.escalation_level,
+            first_breach_at=alert.first_breach_at.isoformat(),
+            last_notified_at=alert.last_notified_at.isoformat() if alert.last_notified_at else None
         ))
     
     return result
@@ -192,89 +252,18 @@ async def get_delayed_jobs(
 
 @router.get("/stats/realtime", response_model=DashboardStats)
 async def get_realtime_stats(
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get real-time dashboard statistics.
-    """
-    now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    sla_threshold = timedelta(minutes=10)
-
-    # Active jobs (in progress or assigned)
-    active_jobs_count = db.query(func.count(Booking.id)).filter(
-        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED])
-    ).scalar()
-
-    # Available cleaners
-    available_cleaners_count = db.query(func.count(CleanerProfile.id)).filter(
-        CleanerProfile.status == CleanerStatus.AVAILABLE
-    ).scalar()
-
-    # Busy cleaners
-    busy_cleaners_count = db.query(func.count(CleanerProfile.id)).filter(
-        CleanerProfile.status == CleanerStatus.BUSY
-    ).scalar()
-
-    # Delayed jobs
-    delayed_jobs_count = db.query(func.count(Booking.id)).filter(
-        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS]),
-        or_(
-            Booking.sla_deadline < now,
-            Booking.scheduled_date + sla_threshold < now
-        )
-    ).scalar()
-
-    # Pending assignment
-    pending_assignment_count = db.query(func.count(Booking.id)).filter(
-        Booking.status.in_([BookingStatus.PENDING_ASSIGNMENT, BookingStatus.CONFIRMED])
-    ).scalar()
-
-    # Completed today
-    completed_today_count = db.query(func.count(Booking.id)).filter(
-        Booking.status == BookingStatus.COMPLETED,
-        Booking.actual_end_time >= today_start
-    ).scalar()
-
-    # Revenue today
-    revenue_today = db.query(func.sum(Booking.total_price)).filter(
-        Booking.status == BookingStatus.COMPLETED,
-        Booking.actual_end_time >= today_start
-    ).scalar() or 0
-
-    stats = DashboardStats(
-        active_jobs_count=active_jobs_count or 0,
-        available_cleaners_count=available_cleaners_count or 0,
-        busy_cleaners_count=busy_cleaners_count or 0,
-        delayed_jobs_count=delayed_jobs_count or 0,
-        pending_assignment_count=pending_assignment_count or 0,
-        completed_today_count=completed_today_count or 0,
-        revenue_today=float(revenue_today)
-    )
 
-    # Update cache with current stats
-    await cache_service.set_dashboard_stats({
-        "active_jobs": stats.active_jobs_count,
-        "available_cleaners": stats.available_cleaners_count,
-        "busy_cleaners": stats.busy_cleaners_count,
-        "delayed_jobs": stats.delayed_jobs_count,
-        "pending_assignment": stats.pending_assignment_count,
-        "completed_today": stats.completed_today_count,
-    })
-
-    # Publish stats update event
-    await event_publisher.publish(EventType.STATS_UPDATED, {
-        "active_jobs_count": stats.active_jobs_count,
-        "available_cleaners_count": stats.available_cleaners_count,
-        "busy_cleaners_count": stats.busy_cleaners_count,
-        "delayed_jobs_count": stats.delayed_jobs_count,
-        "pending_assignment_count": stats.pending_assignment_count,
-        "completed_today_count": stats.completed_today_count,
-        "revenue_today": stats.revenue_today,
-    })
-
-    return stats
+    Read from live counters kept current by job, payment and cleaner
+    events (see app.services.live_counters), so polling does not touch
+    the database. Changes are also pushed to the dashboard WebSocket as
+    stats.updated.
+    """
+    return DashboardStats(**await live_counters.get(db))
 
 
 @router.get("/jobs", response_model=PaginatedJobsResponse)
@@ -286,12 +275,14 @@ async def list_jobs_paginated(
     cursor: Optional[str] = None,
     limit: int = Query(25, ge=1, le=100),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get jobs with cursor-based pagination and filtering.
+    Get jobs with cursor-based pagination and filtering, newest first.
     
-    Cursor is the last job ID from previous page.
+    Pass next_cursor from the previous page as cursor. total_count is
+    the planner estimate without filters and a count cached for
+    COUNT_CACHE_TTL_SECONDS with filters; it is not exact.
     """
     query = db.query(Booking)
     
@@ -310,26 +301,18 @@ async def list_jobs_paginated(
         to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
         query = query.filter(Booking.scheduled_date <= to_dt)
     
-    # Cursor pagination
-    if cursor:
-        try:
-            cursor_id = int(cursor)
-            query = query.filter(Booking.id < cursor_id)
-        except ValueError:
-            pass
-    
-    # Get total count (without pagination)
-    total_count = query.count()
-    
-    # Order and limit
-    jobs = query.options(joinedload(Booking.add_ons)).order_by(Booking.id.desc()).limit(limit + 1).all()
-    
-    # Check if there's a next page
-    has_next = len(jobs) > limit
-    if has_next:
-        jobs = jobs[:limit]
+    # Total across all pages, not recounted for every page
+    filters = (status, cleaner_id, from_date, to_date)
+    if any(f is not None for f in filters):
+        total_count = await cached_count(
+            "admin_jobs:" + ":".join("" if f is None else str(f) for f in filters),
+            query.count
+        )
+    else:
+        total_count = estimated_row_count(db, Booking.__tablename__)
     
-    next_cursor = str(jobs[-1].id) if has_next and jobs else None
+    jobs = JOBS_BY_ID.apply(query.options(joinedload(Booking.add_ons)), cursor, limit).all()
+    jobs, next_cursor = JOBS_BY_ID.page(jobs, limit)
     
     # Format response
     job_list = []
@@ -504,18 +487,24 @@ async def assign_cleaner_to_job(
         reason=f"Manually assigned by admin to {employee.full_name} ({employee.employee_id})"
     )
     db.add(history)
-    db.commit()
 
-    # Publish event
-    await event_publisher.publish(EventType.JOB_ASSIGNED, {
+    # Stage event with the assignment
+    enqueue_event(db, EventType.JOB_ASSIGNED, {
         "job_id": job.id,
         "booking_number": job.booking_number,
+        "status": BookingStatus.ASSIGNED.value,
+        "previous_status": previous_status.value,
         "cleaner_id": str(employee.id),
         "cleaner_name": employee.full_name,
         "employee_id": employee.employee_id,
+        "customer_id": job.customer_id,
+        "region": employee.region_code,
         "assigned_by": current_user.full_name,
         "manual_assignment": True
     })
+    db.commit()
+    outbox_relay.notify()
+    schedule_sla_deadline(job)
 
     # Update cache
     await cache_service.set(f"job:{job.id}:status", job.status.value, ttl=3600)
@@ -568,8 +557,8 @@ async def unassign_cleaner_from_job(
         # Update cache for cleaner status
         await cache_service.set_cleaner_status(old_cleaner_id, "available")
 
-        # Publish cleaner status change event
-        await event_publisher.publish(EventType.CLEANER_STATUS_CHANGED, {
+        # Stage cleaner status change event
+        enqueue_event(db, EventType.CLEANER_STATUS_CHANGED, {
             "cleaner_id": old_cleaner_id,
             "cleaner_name": old_cleaner_name,
             "status": "available",
@@ -582,21 +571,24 @@ async def unassign_cleaner_from_job(
     job.assigned_at = None
     job.version += 1
 
-    db.commit()
-
-    # Publish job unassigned event (use JOB_CANCELLED or a custom approach)
-    await event_publisher.publish(EventType.JOB_ASSIGNED, {
+    # Stage job unassigned event (use JOB_CANCELLED or a custom approach)
+    enqueue_event(db, EventType.JOB_ASSIGNED, {
         "job_id": job.id,
         "booking_number": job.booking_number,
         "status": job.status.value,
+        "previous_status": BookingStatus.ASSIGNED.value,
         "cleaner_id": None,
         "cleaner_name": None,
         "customer_id": job.customer_id,
+        "region": get_region_from_city(job.address.city) if job.address else None,
         "unassigned_from_cleaner_id": old_cleaner_id,
         "unassigned_from_cleaner_name": old_cleaner_name,
         "action": "unassigned"
     })
 
+    db.commit()
+    outbox_relay.notify()
+
     return {
         "message": "Cleaner unassigned successfully",
         "job_id": job.id,
@@ -605,6 +597,60 @@ async def unassign_cleaner_from_job(
     }
 
 
+@router.post("/jobs/bulk-transition", response_model=BulkTransitionResponse)
+async def bulk_transition_jobs(
+    data: BulkTransitionRequest,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Change the status of many jobs at once.
+
+    - cancelled: e.g. all of a day's bookings in a region
+    - pending_assignment: unassign, e.g. all of a suspended cleaner's
+      jobs, so they can be reassigned
+    - Jobs are selected by job_ids and/or the filters; at least one is required
+    - Selected job IDs that cannot make the transition are returned as skipped
+    """
+    filters = []
+    if data.region:
+        cities = [city for city, code in CITY_REGION_MAP.items() if code == data.region.upper()]
+        if not cities:
+            raise BadRequestException(f"Unknown region {data.region}")
+        filters.append(Booking.address_id.in_(
+            select(Address.id).where(func.lower(func.trim(Address.city)).in_(cities))
+        ))
+    if data.cleaner_id is not None:
+        filters.append(Booking.cleaner_id == data.cleaner_id)
+    if data.employee_id:
+        try:
+            filters.append(Booking.assigned_employee_id == UUID(data.employee_id))
+        except ValueError:
+            raise BadRequestException("Invalid employee_id format. Must be a valid UUID.")
+    if data.scheduled_from:
+        filters.append(Booking.scheduled_date >= data.scheduled_from)
+    if data.scheduled_to:
+        filters.append(Booking.scheduled_date < data.scheduled_to)
+
+    if data.job_ids is None and not filters:
+        raise BadRequestException("Select jobs with job_ids or at least one filter")
+
+    result = JobStateMachine(db).bulk_transition(
+        new_status=data.status,
+        actor=current_user,
+        job_ids=data.job_ids,
+        filters=filters,
+        reason=data.reason
+    )
+
+    return BulkTransitionResponse(
+        status=data.status.value,
+        updated_count=len(result["updated"]),
+        updated_job_ids=result["updated"],
+        skipped=[BulkTransitionSkip(**skip) for skip in result["skipped"]]
+    )
+
+
 @router.get("/jobs/{job_id}/history")
 async def get_job_history(
     job_id: int,
@@ -620,8 +666,11 @@ async def get_job_history(
     if not job:
         raise NotFoundException(f"Job {job_id} not found")
 
+    # No history predates the job; bounding created_at lets the planner skip
+    # older monthly partitions
     history = db.query(BookingStatusHistory).filter(
-        BookingStatusHistory.booking_id == job_id
+        BookingStatusHistory.booking_id == job_id,
+        BookingStatusHistory.created_at >= job.created_at
     ).order_by(BookingStatusHistory.created_at.desc()).all()
 
     return {
@@ -643,14 +692,39 @@ async def get_job_history(
     }
 
 
+@router.get("/events/replay")
+async def replay_outbox_events(
+    after_id: int = Query(0, ge=0, description="Last outbox id already applied by the client"),
+    limit: int = Query(500, ge=1, le=1000),
+    event_type: Optional[List[str]] = Query(None, description="Filter by event type (repeatable)"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Replay job and cleaner events from the transactional outbox.
+
+    Dashboards call this after (re)connecting to rebuild their state,
+    then continue from the returned next_after_id.
+    """
+    from app.services.outbox import replay_events
+
+    events = replay_events(db, after_id=after_id, limit=limit, event_types=event_type)
+
+    return {
+        "events": events,
+        "next_after_id": events[-1]["id"] if events else after_id,
+        "has_more": len(events) == limit
+    }
+
+
 # ============ Allocation Metrics Endpoints ============
 
 @router.get("/allocation/metrics")
 async def get_allocation_metrics(
     region_code: Optional[str] = Query(None, description="Filter by region code (DXB, AUH, etc.)"),
     date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get allocation metrics for the dashboard.
@@ -673,8 +747,8 @@ async def get_allocation_metrics(
 @router.get("/allocation/queue/{region_code}")
 async def get_queue_status(
     region_code: str,
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current queue status for a region.
@@ -699,28 +773,34 @@ async def get_queue_status(
 
 @router.get("/allocation/regions")
 async def get_available_regions(
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of all regions with cleaner counts.
     """
     from app.services.allocation_engine import REGION_COORDINATES
 
+    # Active and available cleaner counts for every region in one grouped query
+    counts = {
+        region_code: (total, available)
+        for region_code, total, available in (await db.execute(
+            select(
+                Employee.region_code,
+                func.count(Employee.id),
+                func.count(Employee.id).filter(
+                    Employee.cleaner_status == EmployeeCleanerStatus.AVAILABLE
+                )
+            ).where(
+                Employee.account_status == EmployeeAccountStatus.ACTIVE,
+                Employee.region_code.in_(list(REGION_COORDINATES.keys()))
+            ).group_by(Employee.region_code)
+        )).all()
+    }
+
     regions = []
     for region_code, coords in REGION_COORDINATES.items():
-        # Count active cleaners in region
-        cleaner_count = db.query(func.count(Employee.id)).filter(
-            Employee.account_status == EmployeeAccountStatus.ACTIVE,
-            Employee.region_code == region_code
-        ).scalar() or 0
-
-        # Count available cleaners
-        available_count = db.query(func.count(Employee.id)).filter(
-            Employee.account_status == EmployeeAccountStatus.ACTIVE,
-            Employee.region_code == region_code,
-            Employee.cleaner_status == EmployeeCleanerStatus.AVAILABLE
-        ).scalar() or 0
+        cleaner_count, available_count = counts.get(region_code, (0, 0))
 
         regions.append({
             "code": region_code,
@@ -1,14 +1,18 @@
 """
 Availability API - Real-time slot availability and expert matching
+
+The slot endpoints run on the async session: they are polled by the
+booking flow and homepage, so their queries must not block the event loop.
 """
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select
 from datetime import datetime, date, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.booking import Booking, BookingStatus, TimeSlot
 from app.models.employee import Employee
 
@@ -66,7 +70,7 @@ def generate_time_slots(start_hour: int = 7, end_hour: int = 21, interval_minute
     return slots
 
 
-def get_booked_slots(db: Session, check_date: date) -> List[str]:
+async def get_booked_slots(db: AsyncSession, check_date: date) -> List[str]:
     """Get list of time slots that are already heavily booked."""
     # Query bookings for the date
     start_of_day = datetime.combine(check_date, datetime.min.time())
@@ -81,18 +85,19 @@ def get_booked_slots(db: Session, check_date: date) -> List[str]:
         BookingStatus.IN_PROGRESS
     ]
 
-    bookings = db.query(Booking).filter(
-        and_(
+    # Only the start times are needed
+    scheduled_dates = (await db.execute(
+        select(Booking.scheduled_date).where(
             Booking.scheduled_date >= start_of_day,
             Booking.scheduled_date <= end_of_day,
             Booking.status.in_(active_statuses)
         )
-    ).all()
+    )).scalars().all()
 
     # Count bookings per time slot
     slot_counts = {}
-    for booking in bookings:
-        slot_time = booking.scheduled_date.strftime("%H:%M")
+    for scheduled_date in scheduled_dates:
+        slot_time = scheduled_date.strftime("%H:%M")
         slot_counts[slot_time] = slot_counts.get(slot_time, 0) + 1
 
     # Get max capacity from settings or use default
@@ -104,16 +109,10 @@ def get_booked_slots(db: Session, check_date: date) -> List[str]:
     return unavailable
 
 
-def get_available_expert_count(db: Session, check_date: date, check_time: Optional[str] = None) -> int:
+async def get_available_expert_count(db: AsyncSession, check_date: date, check_time: Optional[str] = None) -> int:
     """Get count of available experts/cleaners for a date/time."""
-    # Query active employees
-    try:
-        active_employees = db.query(Employee).filter(
-            Employee.status == "ACTIVE"
-        ).count()
-    except Exception:
-        # If Employee model doesn't have status field, just count all
-        active_employees = db.query(Employee).count()
+    # Employees have no plain status column; every employee counts
+    active_employees = (await db.execute(select(func.count(Employee.id)))).scalar()
 
     if active_employees == 0:
         # Return mock data if no employees in system
@@ -121,17 +120,14 @@ def get_available_expert_count(db: Session, check_date: date, check_time: Option
 
     # If time is specified, check who's already booked
     if check_time:
-        start_of_day = datetime.combine(check_date, datetime.min.time())
-        end_of_day = datetime.combine(check_date, datetime.max.time())
-
         # Parse time
         hour, minute = map(int, check_time.split(":"))
         slot_start = datetime.combine(check_date, datetime.min.time()).replace(hour=hour, minute=minute)
         slot_end = slot_start + timedelta(hours=2)  # Assume 2-hour window
 
         # Get assigned bookings in this time window
-        assigned_employees = db.query(func.count(func.distinct(Booking.assigned_employee_id))).filter(
-            and_(
+        assigned_employees = (await db.execute(
+            select(func.count(func.distinct(Booking.assigned_employee_id))).where(
                 Booking.scheduled_date >= slot_start,
                 Booking.scheduled_date <= slot_end,
                 Booking.assigned_employee_id.isnot(None),
@@ -140,19 +136,61 @@ def get_available_expert_count(db: Session, check_date: date, check_time: Option
                     BookingStatus.IN_PROGRESS
                 ])
             )
-        ).scalar() or 0
+        )).scalar() or 0
 
         return max(0, active_employees - assigned_employees)
 
     return active_employees
 
 
+async def get_available_expert_counts(db: AsyncSession, check_date: date, slot_values: List[str]) -> Dict[str, int]:
+    """
+    get_available_expert_count for many slots of one day in two queries.
+
+    Assigned bookings covering any of the slots' windows are read once and
+    counted per slot in memory.
+    """
+    if not slot_values:
+        return {}
+
+    active_employees = (await db.execute(select(func.count(Employee.id)))).scalar()
+    if active_employees == 0:
+        return {value: 8 for value in slot_values}
+
+    windows = {}
+    for value in slot_values:
+        hour, minute = map(int, value.split(":"))
+        slot_start = datetime.combine(check_date, datetime.min.time()).replace(hour=hour, minute=minute)
+        windows[value] = (slot_start, slot_start + timedelta(hours=2))  # Assume 2-hour window
+
+    assignments = (await db.execute(
+        select(Booking.scheduled_date, Booking.assigned_employee_id).where(
+            Booking.scheduled_date >= min(start for start, _ in windows.values()),
+            Booking.scheduled_date <= max(end for _, end in windows.values()),
+            Booking.assigned_employee_id.isnot(None),
+            Booking.status.in_([
+                BookingStatus.ASSIGNED,
+                BookingStatus.IN_PROGRESS
+            ])
+        )
+    )).all()
+
+    counts = {}
+    for value, (slot_start, slot_end) in windows.items():
+        assigned_employees = len({
+            employee_id for scheduled_date, employee_id in assignments
+            if slot_start <= scheduled_date.replace(tzinfo=None) <= slot_end
+        })
+        counts[value] = max(0, active_employees - assigned_employees)
+    return counts
+
+
 # API Endpoints
 @router.get("/slots", response_model=AvailabilityResponse)
-def get_available_slots(
+async def get_available_slots(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     duration: int = Query(60, description="Duration in minutes"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get available time slots for a specific date.
@@ -169,7 +207,7 @@ def get_available_slots(
         raise HTTPException(status_code=400, detail="Cannot check availability for past dates")
 
     # Get unavailable slots
-    unavailable_slots = get_booked_slots(db, check_date)
+    unavailable_slots = await get_booked_slots(db, check_date)
 
     # For today, also mark past times as unavailable
     if check_date == today:
@@ -185,7 +223,7 @@ def get_available_slots(
                 unavailable_slots.append(slot["value"])
 
     # Get available expert count
-    expert_count = get_available_expert_count(db, check_date)
+    expert_count = await get_available_expert_count(db, check_date)
 
     # Generate busy message if needed
     busy_message = None
@@ -203,9 +241,9 @@ def get_available_slots(
 
 
 @router.get("/slots/detailed")
-def get_detailed_slots(
+async def get_detailed_slots(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get detailed time slot information including availability per slot.
@@ -216,7 +254,7 @@ def get_detailed_slots(
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
     # Get unavailable slots
-    unavailable_slots = get_booked_slots(db, check_date)
+    unavailable_slots = await get_booked_slots(db, check_date)
 
     # Generate all slots with availability
     all_slots = generate_time_slots()
@@ -224,7 +262,7 @@ def get_detailed_slots(
     now = datetime.now()
     buffer_time = now + timedelta(minutes=60)
 
-    detailed_slots = []
+    available = {}
     for slot in all_slots:
         is_available = slot["value"] not in unavailable_slots
 
@@ -236,14 +274,21 @@ def get_detailed_slots(
             if slot_time <= buffer_time:
                 is_available = False
 
-        expert_count = get_available_expert_count(db, check_date, slot["value"]) if is_available else 0
+        available[slot["value"]] = is_available
+
+    expert_counts = await get_available_expert_counts(
+        db, check_date, [value for value, is_available in available.items() if is_available]
+    )
 
-        detailed_slots.append(TimeSlotResponse(
+    detailed_slots = [
+        TimeSlotResponse(
             value=slot["value"],
             display=slot["display"],
-            available=is_available,
-            expert_count=expert_count
-        ))
+            available=available[slot["value"]],
+            expert_count=expert_counts.get(slot["value"], 0)
+        )
+        for slot in all_slots
+    ]
 
     return {
         "date": date,
@@ -344,8 +389,8 @@ def get_available_experts(
 
 
 @router.get("/check")
-def check_instant_availability(
-    db: Session = Depends(get_db)
+async def check_instant_availability(
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Quick check if instant booking is available right now.
@@ -355,12 +400,12 @@ def check_instant_availability(
     now = datetime.now()
 
     # Get available expert count for the rest of today
-    expert_count = get_available_expert_count(db, today)
+    expert_count = await get_available_expert_count(db, today)
 
     # Get next available slot
     buffer_time = now + timedelta(minutes=60)
     all_slots = generate_time_slots()
-    unavailable = get_booked_slots(db, today)
+    unavailable = await get_booked_slots(db, today)
 
     next_available = None
     for slot in all_slots:
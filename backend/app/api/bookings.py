@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime, timezone, timedelta
-from app.database import get_db
-from app.api.deps import get_current_user, get_admin_user, get_staff_user
+from app.database import get_db, get_async_db, get_read_db, get_async_read_db
+from app.api.deps import (
+    get_current_user, get_admin_user, get_staff_user,
+    get_current_user_async, get_admin_user_async
+)
 from app.core.security import generate_booking_number, generate_subscription_number
+from app.core.pagination import Keyset, NEXT_CURSOR_HEADER
+from app.core.responses import json_response
 from app.core.exceptions import (
     NotFoundException, ForbiddenException, BadRequestException,
     BookingNotFoundException, BookingCannotBeCancelledException
@@ -14,24 +19,32 @@ from app.core.exceptions import (
 from app.models import (
     Booking, BookingStatus, BookingStatusHistory, PaymentStatus, BookingType,
     Service, AddOn, Address, User, Payment, booking_add_ons,
-    UserRole, UserStatus, Subscription, SubscriptionStatus, SubscriptionVisit, SubscriptionPlan,
-    TransactionType, Review, Employee
+    UserStatus, Subscription, SubscriptionStatus, SubscriptionVisit, SubscriptionPlan,
+    TransactionType, Review
 )
 from app.api.wallet import get_or_create_wallet, create_transaction
 from app.schemas import (
     BookingCreate, BookingUpdate, BookingStatusUpdate,
     BookingAssignCleaner, BookingReschedule, BookingCancel,
-    BookingResponse, BookingListResponse,
+    BookingResponse, BookingListResponse, BookingSearchResult,
     AvailabilityRequest, AvailabilityResponse, AvailableSlot
 )
-from app.services.events import event_publisher, EventType
-from app.services.cache import cache_service
+from app.services.events import EventType
+from app.services.stats_rollup import booking_stats
+from app.services.idempotency import run_idempotent, stage_completion
+from app.services.outbox import enqueue_event, outbox_relay
 from app.services.discount_service import DiscountService, DiscountValidationError
 from app.services.pricing_engine import PricingEngine
 from app.services.cleaner_assignment import get_region_from_city
+from app.services.booking_search import search_bookings, matching_booking_ids
+from app.repositories.booking_list import booking_list_query, booking_list_items
+from app.services.sla_monitor import schedule_sla_deadline, schedule_payment_timeout
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+# Booking lists page newest first
+BOOKINGS_BY_CREATED = Keyset(Booking.created_at, Booking.id)
+
 
 def _calculate_booking_price(
     service: Service,
@@ -172,6 +185,11 @@ def _booking_to_response(booking: Booking) -> BookingResponse:
     )
 
 
+def _booking_region(booking: Booking) -> Optional[str]:
+    """Region code for routing booking events to region-scoped dashboards."""
+    return get_region_from_city(booking.address.city) if booking.address else None
+
+
 def _process_cancellation_refund(booking: Booking, db: Session) -> None:
     """Process wallet refund for cancelled booking if paid by wallet."""
     from app.models.wallet import WalletTransaction
@@ -373,10 +391,24 @@ async def get_pricing_preview(
 @router.post("/", response_model=BookingResponse)
 async def create_booking(
     data: BookingCreate,
+    x_idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new booking."""
+    """
+    Create a new booking.
+
+    Retries that send the same X-Idempotency-Key get the first response
+    back instead of creating another booking; see app.services.idempotency.
+    """
+    return await run_idempotent(
+        db, current_user.id, "POST /bookings/", x_idempotency_key, data,
+        lambda: _create_booking(data, current_user, db)
+    )
+
+
+async def _create_booking(data: BookingCreate, current_user: User, db: Session) -> BookingResponse:
+    """Price, validate and store a booking for create_booking."""
     # Validate service
     service = db.query(Service).filter(
         Service.id == data.service_id,
@@ -781,6 +813,26 @@ async def create_booking(
         )
         db.add(visit)
 
+    # The idempotency key commits with the booking: a retry from here on
+    # replays it rather than booking twice
+    stage_completion(db, _booking_to_response(booking))
+
+    # Written with the booking; a cleaner assigned below gets its own
+    # JOB_ASSIGNED event in the assignment's transaction
+    enqueue_event(db, EventType.JOB_CREATED, {
+        "job_id": booking.id,
+        "booking_number": booking.booking_number,
+        "status": booking.status.value,
+        "customer_id": booking.customer_id,
+        "region": _booking_region(booking),
+        "customer_name": current_user.full_name,
+        "service_name": service.name,
+        "scheduled_date": booking.scheduled_date.isoformat(),
+        "total_price": float(booking.total_price),
+        "city": address.city,
+        "assigned_cleaner": None
+    })
+
     # Process wallet transaction if applicable (Commits the session)
     if wallet_transaction_needed and wallet:
         create_transaction(
@@ -797,7 +849,8 @@ async def create_booking(
 
     # Auto-assign a cleaner using enhanced allocation engine (weighted scoring + fallback)
     from app.services.allocation_engine import enhanced_auto_assign
-    assigned_cleaner = await enhanced_auto_assign(booking, db, duration_hours=float(service.base_duration_hours or 2.5))
+    await enhanced_auto_assign(booking, db, duration_hours=float(service.base_duration_hours or 2.5))
+    outbox_relay.notify()
 
     # Reload with relationships
     booking = db.query(Booking).options(
@@ -808,36 +861,11 @@ async def create_booking(
         joinedload(Booking.add_ons)
     ).filter(Booking.id == booking.id).first()
 
-    # Publish booking created event
-    await event_publisher.publish(EventType.JOB_CREATED, {
-        "job_id": booking.id,
-        "booking_number": booking.booking_number,
-        "status": booking.status.value,
-        "customer_id": booking.customer_id,
-        "customer_name": current_user.full_name,
-        "service_name": service.name,
-        "scheduled_date": booking.scheduled_date.isoformat(),
-        "total_price": float(booking.total_price),
-        "city": address.city,
-        "assigned_cleaner": assigned_cleaner.full_name if assigned_cleaner else None
-    })
-
-    # If a cleaner was auto-assigned, also publish JOB_ASSIGNED event
-    if assigned_cleaner:
-        await event_publisher.publish(EventType.JOB_ASSIGNED, {
-            "job_id": booking.id,
-            "booking_number": booking.booking_number,
-            "status": booking.status.value,
-            "customer_id": booking.customer_id,
-            "cleaner_id": str(assigned_cleaner.id),
-            "cleaner_name": assigned_cleaner.full_name,
-            "employee_id": assigned_cleaner.employee_id,
-            "scheduled_date": booking.scheduled_date.isoformat(),
-            "auto_assigned": True
-        })
-
-    # Update dashboard stats cache
-    await cache_service.update_dashboard_stat("pending_jobs", 1)
+    # Arm payment timeout / start SLA checks
+    if booking.status == BookingStatus.PENDING and booking.payment_status == PaymentStatus.PENDING:
+        schedule_payment_timeout(booking)
+    if booking.sla_deadline:
+        schedule_sla_deadline(booking)
 
     return _booking_to_response(booking)
 
@@ -845,68 +873,24 @@ async def create_booking(
 @router.get("/", response_model=List[BookingListResponse])
 async def list_my_bookings(
     status: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get current user's bookings."""
-    query = db.query(Booking).filter(Booking.customer_id == current_user.id)
+    """Get current user's bookings, newest first."""
+    query = booking_list_query().where(Booking.customer_id == current_user.id)
     
     if status:
-        query = query.filter(Booking.status == status)
+        query = query.where(Booking.status == status)
     
-    bookings = query.options(
-        joinedload(Booking.service),
-        joinedload(Booking.address),
-        joinedload(Booking.cleaner),  # Legacy User-based cleaner
-        joinedload(Booking.review)    # Check if reviewed
-    ).order_by(Booking.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for booking in bookings:
-        scheduled_dt = booking.scheduled_date
-        date_str = scheduled_dt.strftime('%Y-%m-%d') if scheduled_dt else ''
-        time_str = scheduled_dt.strftime('%I:%M %p') if scheduled_dt else ''
-        
-        # Get cleaner info (check new Employee system first, fallback to legacy User)
-        cleaner_name = None
-        cleaner_phone = None
-        
-        if booking.assigned_employee_id:
-            employee = db.query(Employee).filter(Employee.id == booking.assigned_employee_id).first()
-            if employee:
-                cleaner_name = employee.full_name
-                cleaner_phone = employee.phone_number
-        elif booking.cleaner:
-            cleaner_name = f"{booking.cleaner.first_name} {booking.cleaner.last_name}"
-            cleaner_phone = booking.cleaner.phone
-        
-        # Address string
-        address_str = booking.address.street_address
-        if booking.address.apartment:
-            address_str = f"{booking.address.apartment}, {address_str}"
-        
-        result.append(BookingListResponse(
-            id=booking.id,
-            booking_number=booking.booking_number,
-            customer_name=f"{booking.customer.first_name} {booking.customer.last_name}",
-            customer_email=booking.customer.email,
-            service_name=booking.service.name,
-            address=address_str,
-            city=booking.address.city,
-            scheduled_date=date_str,
-            scheduled_time=time_str,
-            status=booking.status.value if hasattr(booking.status, 'value') else str(booking.status),
-            payment_status=booking.payment_status.value if hasattr(booking.payment_status, 'value') else str(booking.payment_status),
-            total_price=booking.total_price,
-            created_at=booking.created_at,
-            cleaner_name=cleaner_name,
-            cleaner_phone=cleaner_phone,
-            has_review=booking.review is not None
-        ))
+    rows = (await db.execute(BOOKINGS_BY_CREATED.apply(query, cursor, limit))).all()
+    rows, next_cursor = BOOKINGS_BY_CREATED.page(rows, limit)
     
-    return result
+    return json_response(
+        booking_list_items(rows),
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
@@ -979,20 +963,22 @@ async def cancel_booking(
     if booking.payment_status == PaymentStatus.PAID:
         _process_cancellation_refund(booking, db)
 
-    db.commit()
-
-    # Publish booking cancelled event
-    await event_publisher.publish(EventType.JOB_CANCELLED, {
+    # Stage booking cancelled event with the status change
+    enqueue_event(db, EventType.JOB_CANCELLED, {
         "job_id": booking.id,
         "booking_number": booking.booking_number,
         "status": "cancelled",
         "previous_status": old_status.value,
         "customer_id": booking.customer_id,
+        "region": _booking_region(booking),
         "cleaner_id": booking.cleaner_id,
         "cancellation_reason": data.reason,
         "cancelled_by_id": current_user.id
     })
 
+    db.commit()
+    outbox_relay.notify()
+
     return {"message": "Booking cancelled successfully"}
 
 
@@ -1032,21 +1018,23 @@ async def reschedule_booking(
         reason=f"Rescheduled from {old_date} to {data.new_date}. Reason: {data.reason or 'Not specified'}"
     )
     db.add(history)
-    
-    db.commit()
 
-    # Publish rescheduled event (using JOB_ASSIGNED as it's a status-related update)
-    await event_publisher.publish(EventType.JOB_ASSIGNED, {
+    # Stage rescheduled event (using JOB_ASSIGNED as it's a status-related update)
+    enqueue_event(db, EventType.JOB_ASSIGNED, {
         "job_id": booking.id,
         "booking_number": booking.booking_number,
         "status": booking.status.value,
         "customer_id": booking.customer_id,
+        "region": _booking_region(booking),
         "cleaner_id": booking.cleaner_id,
         "action": "rescheduled",
         "old_date": old_date.isoformat(),
         "new_date": data.new_date.isoformat(),
         "reason": data.reason
     })
+    
+    db.commit()
+    outbox_relay.notify()
 
     return {"message": "Booking rescheduled successfully", "new_date": data.new_date}
 
@@ -1060,84 +1048,48 @@ async def list_all_bookings(
     from_date: Optional[datetime] = Query(None),
     to_date: Optional[datetime] = Query(None),
     search: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     limit: int = Query(50, ge=1, le=100),
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Admin: List all bookings with filters."""
-    query = db.query(Booking)
+    query = booking_list_query(include_add_ons=True, dialect_name=db.get_bind().dialect.name)
     
     if status:
-        query = query.filter(Booking.status == status)
+        query = query.where(Booking.status == status)
     if payment_status:
-        query = query.filter(Booking.payment_status == payment_status)
+        query = query.where(Booking.payment_status == payment_status)
     if from_date:
-        query = query.filter(Booking.scheduled_date >= from_date)
+        query = query.where(Booking.scheduled_date >= from_date)
     if to_date:
-        query = query.filter(Booking.scheduled_date <= to_date)
-    if search:
-        query = query.join(User, Booking.customer_id == User.id).filter(
-            (Booking.booking_number.ilike(f"%{search}%")) |
-            (User.email.ilike(f"%{search}%")) |
-            (User.first_name.ilike(f"%{search}%")) |
-            (User.last_name.ilike(f"%{search}%"))
-        )
+        query = query.where(Booking.scheduled_date <= to_date)
+    if search and search.strip():
+        query = query.where(Booking.id.in_(matching_booking_ids(search)))
     
-    bookings = query.options(
-        joinedload(Booking.customer),
-        joinedload(Booking.service),
-        joinedload(Booking.address),
-        joinedload(Booking.cleaner),
-        joinedload(Booking.review),
-    joinedload(Booking.add_ons)
-    ).order_by(Booking.created_at.desc()).offset(skip).limit(limit).all()
+    rows = db.execute(BOOKINGS_BY_CREATED.apply(query, cursor, limit)).all()
+    rows, next_cursor = BOOKINGS_BY_CREATED.page(rows, limit)
     
-    result = []
-    for booking in bookings:
-        scheduled_dt = booking.scheduled_date
-        date_str = scheduled_dt.strftime('%Y-%m-%d') if scheduled_dt else ''
-        time_str = scheduled_dt.strftime('%I:%M %p') if scheduled_dt else ''
-        
-        # Get cleaner info
-        cleaner_name = None
-        cleaner_phone = None
-        
-        if booking.assigned_employee_id:
-            employee = db.query(Employee).filter(Employee.id == booking.assigned_employee_id).first()
-            if employee:
-                cleaner_name = employee.full_name
-                cleaner_phone = employee.phone_number
-        elif booking.cleaner:
-            cleaner_name = f"{booking.cleaner.first_name} {booking.cleaner.last_name}"
-            cleaner_phone = booking.cleaner.phone
-        
-        # Address string
-        address_str = booking.address.street_address
-        if booking.address.apartment:
-            address_str = f"{booking.address.apartment}, {address_str}"
-        
-        result.append(BookingListResponse(
-            id=booking.id,
-            booking_number=booking.booking_number,
-            customer_name=f"{booking.customer.first_name} {booking.customer.last_name}",
-            customer_email=booking.customer.email,
-            service_name=booking.service.name,
-            address=address_str,
-            city=booking.address.city,
-            scheduled_date=date_str,
-            scheduled_time=time_str,
-            status=booking.status.value if hasattr(booking.status, 'value') else str(booking.status),
-            payment_status=booking.payment_status.value if hasattr(booking.payment_status, 'value') else str(booking.payment_status),
-            total_price=booking.total_price,
-            created_at=booking.created_at,
-            cleaner_name=cleaner_name,
-            cleaner_phone=cleaner_phone,
-            has_review=booking.review is not None,
-            add_ons=[addon.name for addon in booking.add_ons]
-        ))
+    return json_response(
+        booking_list_items(rows),
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
+
+
+@router.get("/admin/search", response_model=List[BookingSearchResult])
+async def search_all_bookings(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Admin: Ranked booking search.
     
-    return result
+    Matches booking number and phone prefixes, and (from 3 characters)
+    substrings of booking number, customer email and name.
+    """
+    return search_bookings(db, q, limit)
 
 
 @router.put("/admin/{booking_id}/status")
@@ -1171,8 +1123,6 @@ async def update_booking_status(
         reason=data.reason
     )
     db.add(history)
-    
-    db.commit()
 
     # Map status to event type
     status_event_map = {
@@ -1182,17 +1132,29 @@ async def update_booking_status(
         BookingStatus.ASSIGNED: EventType.JOB_ASSIGNED,
     }
 
+    # Stage the event in the same transaction as the status change
     event_type = status_event_map.get(data.status)
     if event_type:
-        await event_publisher.publish(event_type, {
+        payload = {
             "job_id": booking.id,
             "booking_number": booking.booking_number,
             "status": data.status.value,
             "previous_status": old_status.value,
             "customer_id": booking.customer_id,
+            "region": _booking_region(booking),
             "cleaner_id": booking.cleaner_id,
             "reason": data.reason
-        })
+        }
+        if data.status == BookingStatus.COMPLETED:
+            payload["completed_at"] = booking.actual_end_time.isoformat()
+            payload["total_price"] = float(booking.total_price)
+        enqueue_event(db, event_type, payload)
+    
+    db.commit()
+    outbox_relay.notify()
+
+    if data.status == BookingStatus.ASSIGNED:
+        schedule_sla_deadline(booking)
 
     return {"message": f"Booking status updated to {data.status.value}"}
 
@@ -1220,26 +1182,13 @@ async def assign_cleaner(
 
 @router.get("/admin/stats")
 async def get_booking_stats(
-    admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    admin: User = Depends(get_admin_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Admin: Get booking statistics."""
-    total_bookings = db.query(Booking).count()
-    pending_bookings = db.query(Booking).filter(Booking.status == BookingStatus.PENDING).count()
-    confirmed_bookings = db.query(Booking).filter(Booking.status == BookingStatus.CONFIRMED).count()
-    completed_bookings = db.query(Booking).filter(Booking.status == BookingStatus.COMPLETED).count()
-    
-    total_revenue = db.query(func.sum(Booking.total_price)).filter(
-        Booking.payment_status == PaymentStatus.PAID
-    ).scalar() or 0
-    
-    total_customers = db.query(User).filter(User.role == UserRole.CUSTOMER).count()
-    
-    return {
-        "total_bookings": total_bookings,
-        "pending_bookings": pending_bookings,
-        "confirmed_bookings": confirmed_bookings,
-        "completed_bookings": completed_bookings,
-        "total_customers": total_customers,
-        "total_revenue": float(total_revenue)
-    }
+    """
+    Admin: Get booking statistics.
+
+    Served from a rollup refreshed on job events and at most every
+    booking_stats.ttl_seconds; see app.services.stats_rollup.
+    """
+    return await booking_stats.get(db)
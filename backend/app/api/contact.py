@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
 from app.database import get_db
 from app.api.deps import get_admin_user
 from app.core.exceptions import NotFoundException
+from app.core.pagination import Keyset, NEXT_CURSOR_HEADER
 from app.models import ContactMessage, User
 from app.schemas import (
     ContactMessageCreate, ContactMessageUpdate, 
@@ -13,6 +14,8 @@ from app.schemas import (
 
 router = APIRouter(prefix="/contact", tags=["Contact"])
 
+MESSAGES_BY_CREATED = Keyset(ContactMessage.created_at, ContactMessage.id)
+
 
 @router.post("/", response_model=ContactMessageResponse)
 async def submit_contact_message(
@@ -38,17 +41,23 @@ async def submit_contact_message(
 
 @router.get("/admin", response_model=List[ContactMessageResponse])
 async def list_contact_messages(
+    response: Response,
     status: str = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=100),
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Admin: List all contact messages."""
+    """Admin: List contact messages, newest first."""
     query = db.query(ContactMessage)
     
     if status:
         query = query.filter(ContactMessage.status == status)
     
-    messages = query.order_by(ContactMessage.created_at.desc()).all()
+    messages = MESSAGES_BY_CREATED.apply(query, cursor, limit).all()
+    messages, next_cursor = MESSAGES_BY_CREATED.page(messages, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return messages
 
 
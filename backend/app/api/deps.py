@@ -1,7 +1,8 @@
 from fastapi import Depends, Header
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.core.security import decode_token
 from app.core.exceptions import UnauthorizedException, ForbiddenException
 from app.models import User, UserRole, UserStatus
@@ -9,11 +10,8 @@ from app.models.employee import Employee, EmployeeAccountStatus
 import uuid
 
 
-async def get_current_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user (customer/admin) from JWT token."""
+def _user_id_from_authorization(authorization: Optional[str]) -> int:
+    """Validate a customer/admin bearer token and return its user ID."""
     if not authorization or not authorization.startswith("Bearer "):
         raise UnauthorizedException("Missing or invalid authorization header")
     
@@ -32,12 +30,13 @@ async def get_current_user(
         raise UnauthorizedException("Use employee endpoints for employee tokens")
         
     try:
-        user_id = int(payload.get("sub"))
+        return int(payload.get("sub"))
     except (ValueError, TypeError):
         raise UnauthorizedException("Invalid user ID in token")
-        
-    user = db.query(User).filter(User.id == user_id).first()
-    
+
+
+def _check_user(user: Optional[User]) -> User:
+    """Reject missing or inactive users."""
     if not user:
         raise UnauthorizedException("User not found")
     
@@ -47,6 +46,31 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user (customer/admin) from JWT token."""
+    user_id = _user_id_from_authorization(authorization)
+    user = db.query(User).filter(User.id == user_id).first()
+    return _check_user(user)
+
+
+async def get_current_user_async(
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Get current authenticated user for routes on the async session.
+
+    Shares the request's AsyncSession with the route, so the user lookup
+    does not open a second (blocking) connection.
+    """
+    user_id = _user_id_from_authorization(authorization)
+    user = await db.get(User, user_id)
+    return _check_user(user)
+
+
 async def get_current_employee(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
@@ -106,6 +130,15 @@ async def get_admin_user(
     return current_user
 
 
+async def get_admin_user_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    """Require admin role (async session routes)."""
+    if current_user.role != UserRole.ADMIN:
+        raise ForbiddenException("Admin access required")
+    return current_user
+
+
 async def get_cleaner_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -126,6 +159,7 @@ async def get_staff_user(
 
 # Alias for consistency
 get_current_admin_user = get_admin_user
+get_current_admin_user_async = get_admin_user_async
 require_admin = get_admin_user
 require_cleaner = get_cleaner_user
 require_employee = get_current_employee
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Header, Request
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Optional
 from app.database import get_db
 from app.api.deps import get_current_user, get_admin_user
 from app.core.exceptions import (
@@ -20,6 +21,9 @@ from app.schemas import (
     RefundCreateRequest, RefundResponse
 )
 from app.config import settings
+from app.services.events import EventType
+from app.services.outbox import enqueue_event, outbox_relay
+from app.services.idempotency import run_idempotent, stage_completion
 from emergentintegrations.payments.stripe.checkout import (
     StripeCheckout, CheckoutSessionRequest, CheckoutSessionResponse
 )
@@ -36,14 +40,51 @@ async def _get_stripe_checkout(request: Request) -> StripeCheckout:
     return StripeCheckout(api_key=settings.STRIPE_API_KEY, webhook_url=webhook_url)
 
 
+def _stage_payment_confirmed(
+    db: Session,
+    booking: Booking,
+    previous_status: BookingStatus,
+    payment: Payment
+) -> None:
+    """Stage PAYMENT_CONFIRMED in the outbox with the booking's status change."""
+    enqueue_event(db, EventType.PAYMENT_CONFIRMED, {
+        "job_id": booking.id,
+        "booking_number": booking.booking_number,
+        "status": booking.status.value,
+        "previous_status": previous_status.value,
+        "customer_id": booking.customer_id,
+        "payment_id": payment.id,
+        "amount": float(payment.amount),
+    })
+
+
 @router.post("/checkout", response_model=PaymentCreateResponse)
 async def create_checkout(
     data: PaymentCreateRequest,
     request: Request,
+    x_idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create Stripe checkout session for a booking."""
+    """
+    Create Stripe checkout session for a booking.
+
+    Retries that send the same X-Idempotency-Key get the first checkout
+    session back instead of opening another one.
+    """
+    return await run_idempotent(
+        db, current_user.id, "POST /payments/checkout", x_idempotency_key, data,
+        lambda: _create_checkout(data, request, current_user, db)
+    )
+
+
+async def _create_checkout(
+    data: PaymentCreateRequest,
+    request: Request,
+    current_user: User,
+    db: Session
+) -> PaymentCreateResponse:
+    """Open a Stripe checkout session and record the pending payment."""
     # Get booking
     booking = db.query(Booking).filter(Booking.id == data.booking_id).first()
     
@@ -93,13 +134,15 @@ async def create_checkout(
     else:
         payment.stripe_session_id = session.session_id
         payment.status = PaymentStatus.PENDING
-    
-    db.commit()
-    
-    return PaymentCreateResponse(
+
+    response = PaymentCreateResponse(
         checkout_url=session.url,
         session_id=session.session_id
     )
+    stage_completion(db, response)
+    db.commit()
+
+    return response
 
 
 @router.get("/status/{session_id}", response_model=PaymentVerifyResponse)
@@ -143,10 +186,13 @@ async def verify_payment(
             payment.paid_at = datetime.now(timezone.utc)
             
             # Update booking
+            previous_status = booking.status
             booking.payment_status = PaymentStatus.PAID
             booking.status = BookingStatus.CONFIRMED
+            _stage_payment_confirmed(db, booking, previous_status, payment)
             
             db.commit()
+            outbox_relay.notify()
             
             # TODO: Send confirmation notification
             
@@ -363,14 +409,17 @@ async def stripe_webhook(
                     ).first()
 
                     if booking:
+                        previous_status = booking.status
                         booking.payment_status = PaymentStatus.PAID
                         booking.status = BookingStatus.CONFIRMED
+                        _stage_payment_confirmed(db, booking, previous_status, payment)
 
                     logger.info(f"Payment {payment.id} marked as paid via webhook")
 
             # Mark event as successfully processed
             processed_event.status = "processed"
             db.commit()
+            outbox_relay.notify()
 
             return {
                 "status": "success",
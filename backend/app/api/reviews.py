@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime, timezone
 from app.database import get_db
 from app.api.deps import get_current_user, get_admin_user
 from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from app.core.pagination import Keyset, NEXT_CURSOR_HEADER
 from app.models import Review, Booking, User, BookingStatus
 from app.schemas import (
     ReviewCreate, ReviewUpdate, ReviewResponse, ReviewResponseAdd, ReviewStats
@@ -13,6 +14,8 @@ from app.schemas import (
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
+REVIEWS_BY_CREATED = Keyset(Review.created_at, Review.id)
+
 
 @router.post("/", response_model=ReviewResponse)
 async def create_review(
@@ -79,9 +82,10 @@ async def create_review(
 
 @router.get("/", response_model=List[ReviewResponse])
 async def list_reviews(
+    response: Response,
     service_id: Optional[int] = Query(None),
     min_rating: Optional[int] = Query(None, ge=1, le=5),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
@@ -94,11 +98,16 @@ async def list_reviews(
     if min_rating:
         query = query.filter(Review.overall_rating >= min_rating)
     
-    reviews = query.order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+    reviews = REVIEWS_BY_CREATED.apply(
+        query.options(joinedload(Review.customer)), cursor, limit
+    ).all()
+    reviews, next_cursor = REVIEWS_BY_CREATED.page(reviews, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     result = []
     for review in reviews:
-        customer = db.query(User).filter(User.id == review.customer_id).first()
+        customer = review.customer
         result.append(ReviewResponse(
             id=review.id,
             booking_id=review.booking_id,
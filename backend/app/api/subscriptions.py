@@ -13,7 +13,7 @@ from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.api.deps import get_current_user, get_admin_user
 from app.models import User, Booking
 from app.models.subscription import (
@@ -172,7 +172,7 @@ async def get_my_active_subscription(
         joinedload(Subscription.plan),
         joinedload(Subscription.service),
         joinedload(Subscription.address),
-        joinedload(Subscription.visits)
+        joinedload(Subscription.visits).joinedload(SubscriptionVisit.booking)
     ).filter(
         Subscription.user_id == current_user.id,
         Subscription.status == SubscriptionStatus.ACTIVE
@@ -196,11 +196,7 @@ async def get_my_active_subscription(
             can_modify = time_until > timedelta(hours=24)
 
         # Get booking info if exists
-        booking_number = None
-        if visit.booking_id:
-            booking = db.query(Booking).filter(Booking.id == visit.booking_id).first()
-            if booking:
-                booking_number = booking.booking_number
+        booking_number = visit.booking.booking_number if visit.booking else None
 
         upcoming_visits.append(UpcomingVisitResponse(
             id=visit.id,
@@ -267,7 +263,9 @@ async def get_my_upcoming_visits(
     if not subscription:
         raise HTTPException(status_code=404, detail="No active subscription found")
 
-    query = db.query(SubscriptionVisit).filter(
+    query = db.query(SubscriptionVisit).options(
+        joinedload(SubscriptionVisit.booking)
+    ).filter(
         SubscriptionVisit.subscription_id == subscription.id
     )
 
@@ -288,11 +286,7 @@ async def get_my_upcoming_visits(
             time_until = visit.scheduled_date - now
             can_modify = time_until > timedelta(hours=24) and not visit.is_used
 
-        booking_number = None
-        if visit.booking_id:
-            booking = db.query(Booking).filter(Booking.id == visit.booking_id).first()
-            if booking:
-                booking_number = booking.booking_number
+        booking_number = visit.booking.booking_number if visit.booking else None
 
         result.append(UpcomingVisitResponse(
             id=visit.id,
@@ -921,7 +915,7 @@ async def list_subscription_billing(
 @router.get("/admin/stats", response_model=SubscriptionStats)
 async def get_subscription_stats(
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get subscription statistics (admin only)."""
     service = SubscriptionService(db)
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from app.database import get_db
 from app.api.deps import get_current_user, get_admin_user
 from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
+from app.core.pagination import Keyset, NEXT_CURSOR_HEADER
 from app.models import User, Address, Booking, UserRole, UserStatus
 from app.schemas import (
     UserResponse, UserUpdate, UserListResponse,
@@ -13,6 +14,8 @@ from app.schemas import (
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+USERS_BY_CREATED = Keyset(User.created_at, User.id)
+
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
@@ -250,8 +253,9 @@ async def set_default_address(
 
 @router.get("/admin/customers")
 async def list_customers(
+    response: Response,
     search: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     limit: int = Query(50, ge=1, le=100),
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -267,7 +271,10 @@ async def list_customers(
             (User.last_name.ilike(search_term))
         )
     
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    users = USERS_BY_CREATED.apply(query, cursor, limit).all()
+    users, next_cursor = USERS_BY_CREATED.page(users, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     # Get booking counts and format response
     result = []
@@ -289,10 +296,11 @@ async def list_customers(
 
 @router.get("/", response_model=List[UserListResponse])
 async def list_users(
+    response: Response,
     role: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     limit: int = Query(50, ge=1, le=100),
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -320,7 +328,10 @@ async def list_users(
             (User.last_name.ilike(search_term))
         )
     
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    users = USERS_BY_CREATED.apply(query, cursor, limit).all()
+    users, next_cursor = USERS_BY_CREATED.page(users, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     # Get booking counts
     result = []
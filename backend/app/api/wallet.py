@@ -12,6 +12,7 @@ import uuid
 
 from app.database import get_db
 from app.api.deps import get_current_user
+from app.core.pagination import Keyset
 from app.models.user import User
 from app.models.wallet import (
     Wallet, WalletTransaction, TransactionType, TransactionStatus
@@ -19,6 +20,8 @@ from app.models.wallet import (
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 
+TRANSACTIONS_BY_CREATED = Keyset(WalletTransaction.created_at, WalletTransaction.id)
+
 
 # Pydantic Schemas
 class WalletBalanceResponse(BaseModel):
@@ -56,6 +59,7 @@ class TransactionListResponse(BaseModel):
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class TopUpRequest(BaseModel):
@@ -166,8 +170,9 @@ def get_wallet_balance(
 
 @router.get("/transactions", response_model=TransactionListResponse)
 def get_transactions(
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, description="Deprecated: pass next_cursor as cursor instead"),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     type: Optional[str] = Query(None, description="Filter by transaction type"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -186,13 +191,14 @@ def get_transactions(
         except ValueError:
             pass  # Invalid type, ignore filter
 
-    # Get total count
+    # Per-wallet count, served by the wallet_id index
     total = query.count()
 
-    # Paginate
-    offset = (page - 1) * page_size
-    transactions = query.order_by(WalletTransaction.created_at.desc())\
-        .offset(offset).limit(page_size).all()
+    # Keyset from the cursor; page numbers still work for older clients
+    paged = TRANSACTIONS_BY_CREATED.apply(query, cursor, page_size)
+    if not cursor and page > 1:
+        paged = paged.offset((page - 1) * page_size)
+    transactions, next_cursor = TRANSACTIONS_BY_CREATED.page(paged.all(), page_size)
 
     return TransactionListResponse(
         transactions=[
@@ -214,7 +220,8 @@ def get_transactions(
         total=total,
         page=page,
         page_size=page_size,
-        has_more=(offset + len(transactions)) < total
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor
     )
 
 
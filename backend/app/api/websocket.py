@@ -5,13 +5,26 @@ Provides real-time WebSocket connections for:
 - Admin dashboard updates
 - Cleaner app notifications
 - Customer booking updates
+
+The server sends {"type": "ping"} to quiet connections; clients reply with
+{"type": "pong"} (or any message). Connections silent for longer than
+WS_HEARTBEAT_TIMEOUT_SECONDS are closed with code 4408.
+
+Pass ?encoding=msgpack or ?encoding=cbor to receive compact binary frames
+(see services/ws_protocol). JSON text is the default, and client messages
+are always JSON text.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Depends
 from typing import Optional
 import logging
 import json
 
+from app.api.deps import get_admin_user
+from app.database import SessionLocal
+from app.models import User
+from app.services.cleaner_assignment import get_cleaner_region
 from app.services.websocket_manager import ws_manager
+from app.services.ws_protocol import negotiate_encoding
 from app.core.security import decode_token
 
 logger = logging.getLogger(__name__)
@@ -40,17 +53,32 @@ async def get_user_from_token(token: Optional[str]) -> Optional[dict]:
 @router.websocket("/ws/admin")
 async def admin_websocket(
     websocket: WebSocket,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    regions: Optional[str] = Query(None),
+    encoding: Optional[str] = Query(None)
 ):
     """
     WebSocket endpoint for admin dashboard real-time updates.
     
     Connect: ws://localhost:8000/api/ws/admin?token=<jwt_token>
+    Region-scoped: ws://localhost:8000/api/ws/admin?token=<jwt_token>&regions=DXB,AUH
     
-    Receives all job and cleaner events:
+    Without regions, receives all job and cleaner events:
     - job.assigned, job.started, job.completed, etc.
     - cleaner.status_changed
     - stats.updated
+    
+    With regions, receives only events and cleaner locations for those
+    regions plus stats.
+    
+    Client messages:
+    - {"type": "subscribe", "channel": "region:DXB", "event_types": ["job.*"]}
+    - {"type": "subscribe", "channel": "job:123"}
+    - {"type": "unsubscribe", "channel": "admin"}
+    - {"type": "resync"}  -> replies with a full stats.snapshot
+    
+    Stats arrive as stats.updated deltas carrying version/base_version;
+    on a version gap, send resync and replace local state with the snapshot.
     """
     user = await get_user_from_token(token)
     
@@ -60,28 +88,65 @@ async def admin_websocket(
         return
     
     user_id = user.get("user_id")
+    encoding = negotiate_encoding(encoding)
+    
+    # Region-scoped dashboards skip the fleet-wide admin channel
+    region_channels = [
+        f"region:{code.strip().upper()}" for code in regions.split(",") if code.strip()
+    ] if regions else []
+    region_channels = [c for c in region_channels if ws_manager.is_valid_admin_channel(c)]
     
     try:
-        await ws_manager.connect(websocket, "admin", user_id)
+        if region_channels:
+            await ws_manager.connect(websocket, region_channels[0], user_id, encoding)
+            for channel in region_channels[1:]:
+                await ws_manager.subscribe(websocket, channel)
+        else:
+            await ws_manager.connect(websocket, "admin", user_id, encoding)
+        await ws_manager.subscribe(websocket, ws_manager.STATS_CHANNEL)
+        await ws_manager.send_personal(websocket, ws_manager.stats_snapshot())
         
         # Keep connection alive and handle incoming messages
         while True:
             try:
                 # Wait for messages with timeout for heartbeat
                 data = await websocket.receive_text()
+                ws_manager.record_activity(websocket)
                 message = json.loads(data)
                 
                 # Handle ping/pong for keepalive
                 if message.get("type") == "ping":
                     await ws_manager.send_personal(websocket, {"type": "pong"})
                 
+                # Client missed a stats delta: send the full snapshot
+                elif message.get("type") == "resync":
+                    await ws_manager.send_personal(websocket, ws_manager.stats_snapshot())
+                
                 # Handle subscription requests
                 elif message.get("type") == "subscribe":
                     channel = message.get("channel")
-                    if channel:
-                        await ws_manager.subscribe(websocket, channel)
+                    if channel and ws_manager.is_valid_admin_channel(channel):
+                        event_types = message.get("event_types")
+                        if not isinstance(event_types, list):
+                            event_types = None
+                        await ws_manager.subscribe(websocket, channel, event_types)
                         await ws_manager.send_personal(websocket, {
                             "type": "subscribed",
+                            "channel": channel,
+                            "event_types": event_types
+                        })
+                    else:
+                        await ws_manager.send_personal(websocket, {
+                            "type": "error",
+                            "message": f"Unknown channel: {channel}"
+                        })
+                
+                elif message.get("type") == "unsubscribe":
+                    channel = message.get("channel")
+                    if channel:
+                        await ws_manager.unsubscribe(websocket, channel)
+                        await ws_manager.send_personal(websocket, {
+                            "type": "unsubscribed",
                             "channel": channel
                         })
                 
@@ -99,7 +164,8 @@ async def admin_websocket(
 @router.websocket("/ws/cleaner")
 async def cleaner_websocket(
     websocket: WebSocket,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    encoding: Optional[str] = Query(None)
 ):
     """
     WebSocket endpoint for cleaner app real-time updates.
@@ -121,30 +187,34 @@ async def cleaner_websocket(
     user_id = user.get("user_id")
     cleaner_channel = f"cleaner:{user_id}"
     
+    # Location updates also go to the region channel of the cleaner's current job
+    db = SessionLocal()
+    try:
+        ws_manager.set_cleaner_region(user_id, get_cleaner_region(db, user_id))
+    finally:
+        db.close()
+    
     try:
         # Connect to personal cleaner channel
-        await ws_manager.connect(websocket, cleaner_channel, user_id)
+        await ws_manager.connect(websocket, cleaner_channel, user_id, negotiate_encoding(encoding))
         
         while True:
             try:
                 data = await websocket.receive_text()
+                ws_manager.record_activity(websocket)
                 message = json.loads(data)
                 
                 # Handle ping/pong
                 if message.get("type") == "ping":
                     await ws_manager.send_personal(websocket, {"type": "pong"})
                 
-                # Handle location updates
+                # Handle location updates (coalesced: admins get one batch frame per tick)
                 elif message.get("type") == "location_update":
-                    # Could broadcast to admin dashboard
-                    await ws_manager.broadcast_to_channel("admin", {
-                        "type": "cleaner.location",
-                        "payload": {
-                            "cleaner_id": user_id,
-                            "latitude": message.get("latitude"),
-                            "longitude": message.get("longitude")
-                        }
-                    })
+                    ws_manager.queue_location_update(
+                        user_id,
+                        message.get("latitude"),
+                        message.get("longitude")
+                    )
                 
             except json.JSONDecodeError:
                 pass
@@ -160,7 +230,8 @@ async def cleaner_websocket(
 @router.websocket("/ws/customer")
 async def customer_websocket(
     websocket: WebSocket,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    encoding: Optional[str] = Query(None)
 ):
     """
     WebSocket endpoint for customer booking updates.
@@ -182,11 +253,12 @@ async def customer_websocket(
     customer_channel = f"customer:{user_id}"
     
     try:
-        await ws_manager.connect(websocket, customer_channel, user_id)
+        await ws_manager.connect(websocket, customer_channel, user_id, negotiate_encoding(encoding))
         
         while True:
             try:
                 data = await websocket.receive_text()
+                ws_manager.record_activity(websocket)
                 message = json.loads(data)
                 
                 # Handle ping/pong
@@ -205,6 +277,9 @@ async def customer_websocket(
 
 
 @router.get("/ws/stats")
-async def get_websocket_stats():
+async def get_websocket_stats(
+    connections: bool = Query(False, description="Include a record per live connection"),
+    admin: User = Depends(get_admin_user)
+):
     """Get WebSocket connection statistics (admin only)."""
-    return ws_manager.get_stats()
+    return ws_manager.get_stats(include_connections=connections)
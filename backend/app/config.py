@@ -14,6 +14,14 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
     DB_POOL_SIZE: int = 5
     DB_MAX_OVERFLOW: int = 10
+    # Pool of the async engine (async routes), separate from the sync pool
+    # above; a worker holds up to the sum of both
+    DB_ASYNC_POOL_SIZE: int = 5
+    DB_ASYNC_MAX_OVERFLOW: int = 5
+
+    # Read replica for admin/reporting reads; empty = everything on the primary
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
 
     # JWT - require from environment, no insecure default
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
@@ -37,6 +45,29 @@ class Settings(BaseSettings):
     # Redis (for caching and rate limiting)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+    # WebSocket event coalescing (high-frequency streams: location, stats)
+    WS_COALESCE_INTERVAL_SECONDS: float = 1.0
+    WS_CHANNEL_MAX_FRAMES_PER_SECOND: int = 10
+
+    # WebSocket liveness: server pings idle sockets, reaps ones silent past the timeout
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 20.0
+    WS_HEARTBEAT_TIMEOUT_SECONDS: float = 75.0
+
+    # Per-request query counting (X-Query-Count, Server-Timing, N+1 warnings in logs)
+    QUERY_INSTRUMENTATION_ENABLED: bool = True
+    QUERY_SERVER_TIMING_ENABLED: bool = True
+
+    # Audit log writes: buffered and inserted in batches, or all synchronous
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_SYNC_WRITES: bool = False
+
+    # Monthly partitions (PostgreSQL): months created ahead, and the age after
+    # which partitions move to the archive tablespace (unset: never moved)
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_ARCHIVE_AFTER_MONTHS: int = 12
+    PARTITION_ARCHIVE_TABLESPACE: Optional[str] = None
+
     # CORS - default to localhost for security, configure via environment
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
     
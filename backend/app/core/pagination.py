@@ -0,0 +1,153 @@
+"""
+Keyset pagination.
+
+OFFSET pagination makes the database read and discard every row before the
+requested page, so deep pages get linearly slower and rows shift between
+pages when new ones arrive. Keyset pagination instead continues from the
+last row seen: WHERE (sort_key, id) < (:last_sort_key, :last_id), which an
+index on the sort key serves at the same cost for every page.
+
+Cursors are opaque to clients: base64url-encoded (sort_key, id) of the last
+row on the page. The id is the tie-breaker, so rows sharing a sort key are
+neither skipped nor repeated.
+
+Usage:
+    BY_CREATED = Keyset(Booking.created_at, Booking.id)
+
+    rows = BY_CREATED.apply(query, cursor, limit).all()
+    rows, next_cursor = BY_CREATED.page(rows, limit)
+
+Endpoints that return a bare list put next_cursor in the X-Next-Cursor
+response header (absent on the last page); clients pass it back as ?cursor=.
+
+Exact totals defeat the point on large tables (COUNT(*) reads every
+matching row), so list endpoints report estimated_row_count() for
+unfiltered tables and cached_count() for filtered ones.
+"""
+import base64
+import inspect
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, Union
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import BadRequestException
+from app.services.cache import cache_service
+
+# How long cached_count() reuses a count
+COUNT_CACHE_TTL_SECONDS = 60
+
+# Endpoints returning a bare list report the next page's cursor in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, row_id: Any = None) -> str:
+    """Encode the keyset position of a row as an opaque cursor."""
+    if isinstance(sort_value, datetime):
+        payload = ["dt", sort_value.isoformat(), row_id]
+    else:
+        payload = ["v", sort_value, row_id]
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decode a cursor into (sort_value, row_id). Raises BadRequestException."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        kind, value, row_id = json.loads(raw)
+        if kind == "dt":
+            value = datetime.fromisoformat(value)
+        elif kind != "v":
+            raise ValueError(kind)
+    except (ValueError, TypeError):
+        raise BadRequestException("Invalid pagination cursor", error_code="INVALID_CURSOR")
+    return value, row_id
+
+
+class Keyset:
+    """
+    Keyset ordering over a sort column with an id tie-breaker.
+
+    The sort column must be NOT NULL in practice (created_at, id): rows
+    with a NULL sort key are never reached by a cursor.
+    """
+
+    def __init__(self, sort_column, id_column=None, descending: bool = True):
+        self.sort_column = sort_column
+        # Paginating by the primary key alone needs no tie-breaker
+        self.id_column = None if id_column is None or id_column is sort_column else id_column
+        self.descending = descending
+
+    def apply(self, query, cursor: Optional[str], limit: int):
+        """
+        Filter past the cursor, order and fetch one extra row.
+
+        Works on ORM queries and select() statements alike. The extra row
+        tells page() whether there is a next page without a COUNT.
+        """
+        if cursor:
+            value, row_id = decode_cursor(cursor)
+            if self.id_column is None:
+                key, bound = self.sort_column, value
+            else:
+                key, bound = tuple_(self.sort_column, self.id_column), tuple_(value, row_id)
+            query = query.filter(key < bound if self.descending else key > bound)
+
+        columns = [self.sort_column] if self.id_column is None else [self.sort_column, self.id_column]
+        order = [c.desc() if self.descending else c.asc() for c in columns]
+        return query.order_by(*order).limit(limit + 1)
+
+    def page(self, rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+        """Trim the extra row fetched by apply() and build the next cursor."""
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        sort_value = getattr(last, self.sort_column.key)
+        if self.id_column is None:
+            return rows, encode_cursor(sort_value)
+        return rows, encode_cursor(sort_value, getattr(last, self.id_column.key))
+
+
+def estimated_row_count(db: Session, table_name: str) -> int:
+    """
+    Row count of a whole table from planner statistics.
+
+    Postgres keeps pg_class.reltuples current through autovacuum/ANALYZE,
+    so this is a catalog lookup instead of a full scan. It is an estimate;
+    use it where "about N" is acceptable. Other databases get COUNT(*).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table_name}
+        ).scalar()
+        # -1 (or NULL) until the table is first analyzed
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return db.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar() or 0
+
+
+async def cached_count(
+    cache_key: str,
+    compute: Callable[[], Union[int, Awaitable[int]]],
+    ttl: int = COUNT_CACHE_TTL_SECONDS
+) -> int:
+    """
+    Count matching rows at most once per ttl for a given filter set.
+
+    cache_key must identify the filters (not the page). compute may be a
+    plain or async callable.
+    """
+    cached = await cache_service.get(f"count:{cache_key}")
+    if cached is not None:
+        return int(cached)
+
+    count = compute()
+    if inspect.isawaitable(count):
+        count = await count
+    await cache_service.set(f"count:{cache_key}", str(count), ttl=ttl)
+    return count
@@ -0,0 +1,51 @@
+"""
+Fast JSON responses.
+
+Endpoints that build plain dicts and rows (no Pydantic models) can return
+json_response() to skip response_model validation and serialize in one
+pass. Output matches Pydantic's JSON for the types used: datetimes in ISO
+8601 with Z for UTC, Decimals as strings.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import orjson
+from fastapi.responses import Response
+
+
+def _isoformat(value: datetime) -> str:
+    text = value.isoformat()
+    if value.utcoffset() == timedelta(0):
+        return text[:-6] + "Z"
+    return text
+
+
+def _default(value: Any) -> Any:
+    """Encode the types orjson does not handle natively."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    if isinstance(value, (date, UUID)):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    JSON response built without Pydantic validation.
+
+    Headers set on an injected Response parameter are not applied to a
+    returned Response; pass them here.
+    """
+    return Response(content=dumps(content), status_code=status_code, headers=headers, media_type="application/json")
@@ -1,22 +1,199 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import TextClause
 from contextlib import contextmanager
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def engine_options(
+    database_url,
+    pool_size: int = settings.DB_POOL_SIZE,
+    max_overflow: int = settings.DB_MAX_OVERFLOW
+) -> dict:
+    """Pool and logging options shared by every engine."""
+    options = {
+        "pool_pre_ping": True,  # Verify connections before use
+        "echo": settings.DEBUG  # Log SQL queries in debug mode
+    }
+    # SQLite drivers pick their own pool (static/null) that takes no sizing
+    if make_url(database_url).get_backend_name() != "sqlite":
+        options["pool_size"] = pool_size
+        options["max_overflow"] = max_overflow
+    return options
+
+
+def async_engine_options(database_url) -> dict:
+    """Options for async engines, which keep a pool of their own."""
+    return engine_options(database_url, settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW)
+
+
 # Create engine with connection pooling
-# Create engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_pre_ping=True,  # Verify connections before use
-    echo=settings.DEBUG  # Log SQL queries in debug mode
-)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the same database, used by async route handlers
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str):
+    """Rewrite the sync DATABASE_URL for the matching async driver."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if not driver:
+        return url
+    url = url.set(drivername=driver)
+
+    # asyncpg takes ssl=, not libpq's sslmode=
+    if url.get_backend_name() == "postgresql" and "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url
+
+
+# Async engine: queries await the network instead of blocking the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **async_engine_options(settings.DATABASE_URL)
+)
+
+# Async session factory; objects stay readable after commit (no lazy refresh under asyncio)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read replica (optional): admin and reporting reads, configured by DATABASE_REPLICA_URL
+replica_engine = None
+async_replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        **engine_options(settings.DATABASE_REPLICA_URL)
+    )
+    async_replica_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_REPLICA_URL),
+        **async_engine_options(settings.DATABASE_REPLICA_URL)
+    )
+
+
+class ReplicaLagMonitor:
+    """
+    Tracks whether the read replica is reachable and close enough to the primary.
+
+    Lag is measured at most every CHECK_INTERVAL_SECONDS by the read
+    dependencies; between checks the cached result is used. A replica that
+    is unreachable or more than REPLICA_MAX_LAG_SECONDS behind is skipped
+    and reads go to the primary.
+    """
+
+    CHECK_INTERVAL_SECONDS = 5.0
+
+    # Seconds behind the primary; 0 when fully replayed or not a standby
+    LAG_QUERY = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """
+
+    def __init__(self, max_lag_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_seconds: Optional[float] = None
+        self._checked_at: Optional[float] = None
+
+    def needs_check(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.CHECK_INTERVAL_SECONDS
+
+    def is_usable(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
+
+    def _record(self, lag_seconds: Optional[float]) -> None:
+        if lag_seconds is not None and lag_seconds > self.max_lag_seconds and self.is_usable():
+            logger.warning(f"Read replica {lag_seconds:.1f}s behind, routing reads to the primary")
+        self.lag_seconds = lag_seconds
+        self._checked_at = time.monotonic()
+
+    def check(self) -> None:
+        """Measure lag through the sync replica engine."""
+        try:
+            with replica_engine.connect() as conn:
+                lag = conn.execute(text(self.LAG_QUERY)).scalar() if conn.dialect.name == "postgresql" else 0
+            self._record(float(lag))
+        except Exception as e:
+            logger.error(f"Read replica unavailable, routing reads to the primary: {e}")
+            self._record(None)
+
+    async def check_async(self) -> None:
+        """Measure lag through the async replica engine."""
+        try:
+            async with async_replica_engine.connect() as conn:
+                lag = (await conn.execute(text(self.LAG_QUERY))).scalar() if conn.dialect.name == "postgresql" else 0
+            self._record(float(lag))
+        except Exception as e:
+            logger.error(f"Read replica unavailable, routing reads to the primary: {e}")
+            self._record(None)
+
+
+replica_monitor = ReplicaLagMonitor(settings.REPLICA_MAX_LAG_SECONDS)
+
+
+def _is_write(clause) -> bool:
+    """Statements that must run on the primary: DML, locking reads and raw SQL."""
+    if clause is None:
+        return False
+    if isinstance(clause, TextClause):
+        return True
+    return bool(getattr(clause, "is_dml", False) or getattr(clause, "_for_update_arg", None) is not None)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the read replica.
+
+    Writes, SELECT ... FOR UPDATE and raw text() statements go to the
+    primary. The first write (or flush) pins the session to the primary
+    for the rest of its life, so a request always reads its own writes.
+    Without a usable replica it behaves like a plain primary session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica_bind")
+        if replica is not None and not self.info.get("pinned_primary"):
+            if self._flushing or _is_write(clause):
+                self.info["pinned_primary"] = True
+            else:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -30,6 +207,51 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency for async routes to get an AsyncSession.
+
+    Relationships are not lazy-loaded under asyncio: load what the route
+    needs with joins, selectinload or column projections.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """
+    Dependency for read-heavy admin and reporting routes.
+
+    Reads go to the replica when one is configured and within
+    REPLICA_MAX_LAG_SECONDS; writes pin the session to the primary.
+    """
+    replica_bind = None
+    if replica_engine is not None:
+        if replica_monitor.needs_check():
+            replica_monitor.check()
+        if replica_monitor.is_usable():
+            replica_bind = replica_engine
+
+    db = ReadSessionLocal(info={"replica_bind": replica_bind})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Async variant of get_read_db for routes on the async session."""
+    replica_bind = None
+    if async_replica_engine is not None:
+        if replica_monitor.needs_check():
+            await replica_monitor.check_async()
+        if replica_monitor.is_usable():
+            replica_bind = async_replica_engine.sync_engine
+
+    async with AsyncReadSessionLocal(info={"replica_bind": replica_bind}) as db:
+        yield db
+
+
 @contextmanager
 def get_db_context():
     """Context manager for non-route database operations."""
@@ -1 +1,4 @@
 from app.middleware.rate_limiter import RateLimiter, RateLimitMiddleware, rate_limiter
+from app.middleware.query_counter import (
+    QueryCounterMiddleware, count_queries, assert_max_queries, assert_query_budget, QueryBudgetExceeded
+)
@@ -0,0 +1,197 @@
+"""
+Query Counter Middleware
+
+Counts SQL statements and database time per request through SQLAlchemy
+cursor events, and flags statement shapes repeated within one request
+(the signature of an N+1 loop).
+
+Per request it:
+- adds a Server-Timing header: db;dur=<ms>;desc="<n> queries"
+- adds X-Query-Count (read by assert_query_budget in tests)
+- logs one structured line, at WARNING when a statement shape repeats
+  N_PLUS_ONE_THRESHOLD or more times
+
+The listeners are registered on the Engine class, so sync, async and
+replica engines are all counted. Statements outside a request (background
+tasks, scripts) are ignored unless wrapped in count_queries().
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# A statement shape repeated this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+# Longest statement text kept in log lines
+MAX_SHAPE_LENGTH = 300
+
+# Expanded IN lists and bulk VALUES differ only in placeholder count; collapse them
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeats with different parameters compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+class QueryStats:
+    """Statements and database time collected for one request (or count_queries block)."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time_ms = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.db_time_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statement shapes run at least threshold times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.db_time_ms, 2),
+            "repeated": [
+                {"statement": shape[:MAX_SHAPE_LENGTH], "count": n}
+                for shape, n in self.repeated()
+            ],
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get("query_start_time")
+    if stats is None or not starts:
+        return
+    stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+@contextmanager
+def count_queries():
+    """
+    Collect query stats for the enclosed block.
+
+    Usage:
+        with count_queries() as stats:
+            monitor.get_delayed_jobs()
+        assert stats.count <= 2
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by the test helpers when a request or block runs too many queries."""
+    pass
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, max_repeats: Optional[int] = None):
+    """
+    Fail when the enclosed block runs more than max_queries statements,
+    or repeats one statement shape more than max_repeats times.
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.count} queries run, budget is {max_queries}: {json.dumps(stats.to_dict())}"
+        )
+    if max_repeats is not None:
+        over = [(shape, n) for shape, n in stats.shapes.items() if n > max_repeats]
+        if over:
+            raise QueryBudgetExceeded(f"Statement repeated {over[0][1]} times: {over[0][0][:MAX_SHAPE_LENGTH]}")
+
+
+def assert_query_budget(response, max_queries: int) -> None:
+    """
+    Fail when an endpoint response reports more than max_queries statements.
+
+    For TestClient responses, where the request runs outside the test's
+    context; reads the X-Query-Count header set by the middleware.
+    """
+    count = int(response.headers["X-Query-Count"])
+    if count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{response.request.method} {response.request.url.path} ran {count} queries, "
+            f"budget is {max_queries} (Server-Timing: {response.headers.get('Server-Timing')})"
+        )
+
+
+class QueryCounterMiddleware(BaseHTTPMiddleware):
+    """
+    FastAPI middleware that counts queries per request.
+    """
+
+    def __init__(self, app, enabled: bool = True, server_timing: bool = True):
+        super().__init__(app)
+        self.enabled = enabled
+        self.server_timing = server_timing
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if not self.enabled:
+            return await call_next(request)
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current_stats.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        response.headers['X-Query-Count'] = str(stats.count)
+        if self.server_timing:
+            response.headers.append(
+                'Server-Timing',
+                f'db;dur={stats.db_time_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+            )
+
+        record = {
+            "event": "request.queries",
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 2),
+            **stats.to_dict(),
+        }
+        if record["repeated"]:
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+        return response
@@ -0,0 +1,226 @@
+"""
+Database migration script for composite and partial booking indexes.
+
+The hot booking predicates combine columns that were only indexed one by
+one, so Postgres had to pick a single-column index and filter the rest:
+- cleaner conflict checks and daily job counts
+  (assigned_employee_id + status + scheduled_date)
+- availability slots and SLA checks (active status + scheduled_date)
+- "my bookings" (customer_id, newest first)
+- payment timeout sweeps (status + payment_status + created_at)
+
+Status filters go into partial index predicates instead of key columns:
+the indexes only hold the rows those queries can match, stay small as
+completed and cancelled bookings pile up, and skip index maintenance for
+updates to rows outside the predicate.
+
+Indexes are built CONCURRENTLY so bookings stay writable during the build.
+A failed concurrent build leaves an INVALID index that IF NOT EXISTS would
+skip; the migration reports those so they can be dropped and rebuilt.
+
+After building, the migration EXPLAINs each hot predicate and checks that
+the planner uses its index (verify_index_usage). Run it against a seeded
+database (staging snapshot) to catch regressions when queries or indexes
+change.
+
+Run with: python -m app.migrations.add_booking_hot_path_indexes
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+from typing import Any, List, Tuple
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+
+
+# Enum columns store member names
+ACTIVE_STATUSES = "('PENDING', 'PENDING_ASSIGNMENT', 'CONFIRMED', 'ASSIGNED', 'IN_PROGRESS', 'PAUSED')"
+
+INDEXES = [
+    # 1. Cleaner conflict checks, daily counts, cleaner dashboard:
+    #    assigned_employee_id = ? AND status ... AND scheduled_date range
+    (
+        "idx_bookings_employee_live_schedule",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_employee_live_schedule
+        ON bookings(assigned_employee_id, scheduled_date)
+        WHERE assigned_employee_id IS NOT NULL AND status NOT IN ('CANCELLED', 'NO_SHOW');
+        """,
+    ),
+
+    # 2. Availability slots and SLA start checks: active status AND scheduled_date range
+    (
+        "idx_bookings_active_schedule",
+        f"""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_active_schedule
+        ON bookings(scheduled_date)
+        WHERE status IN {ACTIVE_STATUSES};
+        """,
+    ),
+
+    # 3. My bookings: customer_id = ? ORDER BY created_at DESC LIMIT n
+    (
+        "idx_bookings_customer_created",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_customer_created
+        ON bookings(customer_id, created_at DESC);
+        """,
+    ),
+
+    # 4. Payment timeouts: unpaid pending bookings older than the timeout
+    (
+        "idx_bookings_unpaid_created",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_unpaid_created
+        ON bookings(created_at)
+        WHERE status = 'PENDING' AND payment_status = 'PENDING';
+        """,
+    ),
+]
+
+# (index expected in the plan, query shaped like the one issued by the app)
+HOT_PREDICATES: List[Tuple[str, str]] = [
+    (
+        "idx_bookings_employee_live_schedule",
+        """
+        SELECT id, scheduled_date, scheduled_end_time FROM bookings
+        WHERE assigned_employee_id = (SELECT assigned_employee_id FROM bookings
+                                      WHERE assigned_employee_id IS NOT NULL LIMIT 1)
+          AND status NOT IN ('CANCELLED', 'NO_SHOW')
+          AND scheduled_date < NOW() + INTERVAL '1 day'
+        """,
+    ),
+    (
+        "idx_bookings_employee_live_schedule",
+        """
+        SELECT id FROM bookings
+        WHERE assigned_employee_id = (SELECT assigned_employee_id FROM bookings
+                                      WHERE assigned_employee_id IS NOT NULL LIMIT 1)
+          AND status IN ('ASSIGNED', 'IN_PROGRESS', 'PAUSED', 'COMPLETED')
+        """,
+    ),
+    (
+        "idx_bookings_active_schedule",
+        """
+        SELECT scheduled_date FROM bookings
+        WHERE scheduled_date >= date_trunc('day', NOW())
+          AND scheduled_date <= date_trunc('day', NOW()) + INTERVAL '1 day'
+          AND status IN ('PENDING', 'PENDING_ASSIGNMENT', 'CONFIRMED', 'ASSIGNED', 'IN_PROGRESS')
+        """,
+    ),
+    (
+        "idx_bookings_active_schedule",
+        """
+        SELECT id FROM bookings
+        WHERE status = 'ASSIGNED' AND scheduled_date < NOW() - INTERVAL '15 minutes'
+        """,
+    ),
+    (
+        "idx_bookings_customer_created",
+        """
+        SELECT id FROM bookings
+        WHERE customer_id = (SELECT customer_id FROM bookings LIMIT 1)
+        ORDER BY created_at DESC LIMIT 20
+        """,
+    ),
+    (
+        "idx_bookings_unpaid_created",
+        """
+        SELECT id FROM bookings
+        WHERE status = 'PENDING' AND payment_status = 'PENDING'
+          AND created_at <= NOW() - INTERVAL '15 minutes'
+        ORDER BY id LIMIT 500
+        """,
+    ),
+]
+
+
+def _plan_indexes(node: Any) -> List[str]:
+    """Collect every index name referenced in an EXPLAIN (FORMAT JSON) plan."""
+    names = []
+    if isinstance(node, dict):
+        if "Index Name" in node:
+            names.append(node["Index Name"])
+        for value in node.values():
+            names.extend(_plan_indexes(value))
+    elif isinstance(node, list):
+        for item in node:
+            names.extend(_plan_indexes(item))
+    return names
+
+
+def verify_index_usage(db) -> List[str]:
+    """
+    EXPLAIN each hot predicate and check the planner uses its index.
+
+    Sequential scans are disabled for the check so the outcome does not
+    depend on table size: a small staging table would otherwise be scanned
+    even when the index is usable. Returns the failures.
+    """
+    failures = []
+    for expected, query in HOT_PREDICATES:
+        try:
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+            plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = _plan_indexes(plan)
+        finally:
+            db.rollback()
+
+        label = " ".join(query.split())[:90]
+        if expected in used:
+            print(f"   ✅ {expected}: {label}")
+        else:
+            print(f"   ❌ {expected} not used (plan uses {used or 'no index'}): {label}")
+            failures.append(f"{expected}: {label}")
+    return failures
+
+
+def run_migration():
+    """Execute the migration."""
+    db = SessionLocal()
+
+    try:
+        print("Starting Booking Hot Path Index migration...")
+
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for i, (name, query) in enumerate(INDEXES):
+                try:
+                    conn.execute(text(query))
+                    print(f"   Step {i + 1}/{len(INDEXES)} completed ({name})")
+                except Exception as e:
+                    print(f"   Step {i + 1} warning: {e}")
+
+            conn.execute(text("ANALYZE bookings"))
+
+            invalid = conn.execute(text("""
+                SELECT c.relname FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = 'bookings'::regclass AND NOT i.indisvalid
+            """)).scalars().all()
+            for name in invalid:
+                print(f"   ❌ {name} is INVALID (interrupted build): DROP INDEX CONCURRENTLY {name}; then re-run")
+
+        print("\nVerifying index usage...")
+        failures = verify_index_usage(db)
+
+        if invalid or failures:
+            print(f"\n❌ Migration finished with {len(invalid)} invalid indexes and {len(failures)} unused indexes")
+        else:
+            print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
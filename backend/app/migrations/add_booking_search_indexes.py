@@ -0,0 +1,88 @@
+"""
+Database migration script for admin booking search indexes.
+
+Enables pg_trgm and adds the indexes used by app.services.booking_search:
+- trigram GIN indexes for substring (ILIKE '%term%') matches on booking
+  number, customer email and customer full name
+- pattern_ops btree indexes for booking number and phone digits prefix
+  (LIKE 'term%') matches; the default-collation btree on booking_number
+  cannot serve LIKE
+
+The full name and phone digits indexes are on the same expressions as
+booking_search.customer_name_expr() and customer_phone_digits_expr();
+change both together. The phone index replaces idx_users_phone_prefix on
+the raw column, which digits-only search terms could not use.
+
+Indexes are built CONCURRENTLY so bookings and users stay writable.
+Creating the extension needs a role allowed to CREATE EXTENSION (pg_trgm
+is a trusted extension from Postgres 13, so the database owner suffices).
+
+Run with: python -m app.migrations.add_booking_search_indexes
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        print("Starting Booking Search Index migration...")
+
+        migration_queries = [
+            # 1. Trigram operator classes and similarity functions
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+
+            # 2. Substring matches
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_number_trgm
+            ON bookings USING gin (booking_number gin_trgm_ops);
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email_trgm
+            ON users USING gin (email gin_trgm_ops);
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_full_name_trgm
+            ON users USING gin ((first_name || ' ' || last_name) gin_trgm_ops);
+            """,
+
+            # 3. Prefix matches
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_number_prefix
+            ON bookings (booking_number varchar_pattern_ops);
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_phone_digits_prefix
+            ON users ((
+                replace(replace(replace(replace(replace(replace(
+                    phone, '+', ''), ' ', ''), '-', ''), '(', ''), ')', ''), '.', '')
+            ) text_pattern_ops);
+            """,
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_users_phone_prefix;",
+
+            "ANALYZE bookings;",
+            "ANALYZE users;",
+        ]
+
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for i, query in enumerate(migration_queries):
+                try:
+                    conn.execute(text(query))
+                    print(f"   Step {i + 1}/{len(migration_queries)} completed")
+                except Exception as e:
+                    print(f"   Step {i + 1} warning: {e}")
+
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,83 @@
+"""
+Database migration script for the transactional event outbox.
+
+Creates the event_outbox table that job and booking events are written to
+in the same transaction as the state change, and which the background
+relay drains.
+
+Run with: python -m app.migrations.add_event_outbox
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+
+
+def run_migration():
+    """Execute the migration."""
+    db = SessionLocal()
+
+    try:
+        print("Starting Event Outbox migration...")
+
+        migration_queries = [
+            # 1. Create event_outbox table
+            """
+            CREATE TABLE IF NOT EXISTS event_outbox (
+                id SERIAL PRIMARY KEY,
+                event_id VARCHAR(36) UNIQUE NOT NULL,
+                event_type VARCHAR(50) NOT NULL,
+                payload TEXT NOT NULL,
+                timestamp VARCHAR(40) NOT NULL,
+                published_at TIMESTAMP WITH TIME ZONE,
+                attempts INTEGER DEFAULT 0 NOT NULL,
+                claimed_until TIMESTAMP WITH TIME ZONE,
+                last_error TEXT,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            );
+            """,
+
+            # 2. Relay lease, for tables created before it existed
+            """
+            ALTER TABLE event_outbox
+            ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP WITH TIME ZONE;
+            """,
+
+            # 3. Relay scans only undelivered rows in id order
+            """
+            CREATE INDEX IF NOT EXISTS idx_event_outbox_pending
+            ON event_outbox(id) WHERE published_at IS NULL;
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_event_outbox_published_at
+            ON event_outbox(published_at);
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_event_outbox_type
+            ON event_outbox(event_type);
+            """,
+        ]
+
+        for i, query in enumerate(migration_queries):
+            try:
+                db.execute(text(query))
+                db.commit()
+                print(f"   Step {i + 1}/{len(migration_queries)} completed")
+            except Exception as e:
+                print(f"   Step {i + 1} warning: {e}")
+                db.rollback()
+
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,70 @@
+"""
+Database migration script for idempotency keys.
+
+Creates the idempotency_keys table that stores request fingerprints and
+responses for retried booking and checkout requests.
+
+Run with: python -m app.migrations.add_idempotency_keys
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+
+
+def run_migration():
+    """Execute the migration."""
+    db = SessionLocal()
+
+    try:
+        print("Starting Idempotency Key migration...")
+
+        migration_queries = [
+            # 1. Create idempotency_keys table
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                scope VARCHAR(100) NOT NULL,
+                key VARCHAR(255) NOT NULL,
+                request_hash VARCHAR(64) NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'in_progress',
+                response_status INTEGER,
+                response_body TEXT,
+                locked_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                CONSTRAINT uq_idempotency_keys_user_scope_key UNIQUE (user_id, scope, key)
+            );
+            """,
+
+            # 2. Expired keys are purged by expiry
+            """
+            CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at
+            ON idempotency_keys(expires_at);
+            """,
+        ]
+
+        for i, query in enumerate(migration_queries):
+            try:
+                db.execute(text(query))
+                db.commit()
+                print(f"   Step {i + 1}/{len(migration_queries)} completed")
+            except Exception as e:
+                print(f"   Step {i + 1} warning: {e}")
+                db.rollback()
+
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,57 @@
+"""
+Database migration script for background task leader election.
+
+Creates the leader_leases table holding the current leader and fencing
+epoch for roles elected through Postgres advisory locks.
+
+Run with: python -m app.migrations.add_leader_leases
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+
+
+def run_migration():
+    """Execute the migration."""
+    db = SessionLocal()
+
+    try:
+        print("Starting Leader Lease migration...")
+
+        migration_queries = [
+            # 1. Create leader_leases table
+            """
+            CREATE TABLE IF NOT EXISTS leader_leases (
+                name VARCHAR(100) PRIMARY KEY,
+                holder VARCHAR(255) NOT NULL,
+                epoch BIGINT NOT NULL DEFAULT 1,
+                acquired_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                renewed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            );
+            """,
+        ]
+
+        for i, query in enumerate(migration_queries):
+            try:
+                db.execute(text(query))
+                db.commit()
+                print(f"   Step {i + 1}/{len(migration_queries)} completed")
+            except Exception as e:
+                print(f"   Step {i + 1} warning: {e}")
+                db.rollback()
+
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
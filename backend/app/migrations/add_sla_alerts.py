@@ -0,0 +1,73 @@
+"""
+Database migration script for SLA alert state.
+
+Creates the sla_alerts table that records, per job, the first SLA breach,
+its escalation level and when admins were last notified.
+
+Run with: python -m app.migrations.add_sla_alerts
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+
+
+def run_migration():
+    """Execute the migration."""
+    db = SessionLocal()
+
+    try:
+        print("Starting SLA Alert migration...")
+
+        migration_queries = [
+            # 1. Create sla_alerts table
+            """
+            CREATE TABLE IF NOT EXISTS sla_alerts (
+                id SERIAL PRIMARY KEY,
+                booking_id INTEGER UNIQUE NOT NULL REFERENCES bookings(id) ON DELETE CASCADE,
+                breach_type VARCHAR(20) NOT NULL,
+                sla_deadline TIMESTAMP WITH TIME ZONE NOT NULL,
+                first_breach_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                escalation_level INTEGER DEFAULT 1 NOT NULL,
+                delay_minutes INTEGER DEFAULT 0 NOT NULL,
+                last_notified_at TIMESTAMP WITH TIME ZONE,
+                resolved_at TIMESTAMP WITH TIME ZONE,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            );
+            """,
+
+            # 2. Dashboard reads only open alerts
+            """
+            CREATE INDEX IF NOT EXISTS idx_sla_alerts_open
+            ON sla_alerts(sla_deadline) WHERE resolved_at IS NULL;
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_sla_alerts_resolved_at
+            ON sla_alerts(resolved_at);
+            """,
+        ]
+
+        for i, query in enumerate(migration_queries):
+            try:
+                db.execute(text(query))
+                db.commit()
+                print(f"   Step {i + 1}/{len(migration_queries)} completed")
+            except Exception as e:
+                print(f"   Step {i + 1} warning: {e}")
+                db.rollback()
+
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,143 @@
+"""
+Database migration script for monthly partitioning (PostgreSQL 11+ only).
+
+Converts audit_logs, booking_status_history and otp_requests into tables
+range-partitioned by month on created_at (see app.services.partitions):
+1. the existing table is renamed to <table>_unpartitioned
+2. a partitioned table with the same columns, defaults and checks is
+   created under the original name; created_at becomes NOT NULL and the
+   primary key becomes (id, created_at), as PostgreSQL requires the
+   partition key in it
+3. monthly partitions are created from the oldest row's month through
+   PARTITION_PREMAKE_MONTHS ahead, plus <table>_default
+4. rows are copied over, the id sequence is moved to the new table and the
+   old table is dropped
+5. foreign keys and the ORM's indexes are recreated on the new table
+
+Each table is converted in one transaction and takes an exclusive lock on
+it while rows are copied; run during a maintenance window. Tables that are
+already partitioned are skipped, so the script can be re-run.
+
+Run with: python -m app.migrations.partition_time_series_tables
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from app.config import settings
+from app.database import SessionLocal
+from app.services.partitions import (
+    add_months, create_partition_sql, default_partition_name, is_partitioned, month_start
+)
+
+# Foreign keys and indexes of each table, recreated after the conversion
+TABLES = {
+    "audit_logs": {
+        "foreign_keys": [
+            "FOREIGN KEY (user_id) REFERENCES users(id)",
+        ],
+        "indexes": ["id", "action", "entity_type", "entity_id", "created_at"],
+    },
+    "booking_status_history": {
+        "foreign_keys": [
+            "FOREIGN KEY (booking_id) REFERENCES bookings(id) ON DELETE CASCADE",
+            "FOREIGN KEY (changed_by_id) REFERENCES users(id)",
+        ],
+        "indexes": ["id", "booking_id"],
+    },
+    "otp_requests": {
+        "foreign_keys": [],
+        "indexes": ["phone_number"],
+    },
+}
+
+
+def migration_queries(db, table: str, foreign_keys, indexes):
+    """Statements converting table, in order."""
+    old = f"{table}_unpartitioned"
+    queries = [
+        f"ALTER TABLE {table} RENAME TO {old}",
+        # Frees the name for the new primary key
+        f"ALTER INDEX IF EXISTS {table}_pkey RENAME TO {old}_pkey",
+        f"UPDATE {old} SET created_at = NOW() WHERE created_at IS NULL",
+        f"""
+        CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (created_at)
+        """,
+        f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL",
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)",
+    ]
+    queries += [f"ALTER TABLE {table} ADD {foreign_key}" for foreign_key in foreign_keys]
+
+    oldest = db.execute(text(f"SELECT MIN(created_at) FROM {table}")).scalar()
+    now = datetime.now(timezone.utc)
+    month = month_start(oldest or now)
+    last = add_months(month_start(now), settings.PARTITION_PREMAKE_MONTHS)
+    while month <= last:
+        queries.append(create_partition_sql(table, month))
+        month = add_months(month, 1)
+    queries.append(f"CREATE TABLE {default_partition_name(table)} PARTITION OF {table} DEFAULT")
+
+    queries += [
+        f"INSERT INTO {table} SELECT * FROM {old}",
+        # Serial ids keep counting from the old table's sequence
+        f"""
+        DO $$
+        DECLARE seq text := pg_get_serial_sequence('{old}', 'id');
+        BEGIN
+            IF seq IS NOT NULL THEN
+                EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id', seq);
+            END IF;
+        END $$
+        """,
+        f"DROP TABLE {old}",
+    ]
+    queries += [
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"
+        for column in indexes
+    ]
+    return queries
+
+
+def run_migration():
+    """Execute the migration."""
+    db = SessionLocal()
+
+    try:
+        print("Starting Time Series Partitioning migration...")
+
+        if db.bind.dialect.name != "postgresql":
+            print("   Skipped: partitioning requires PostgreSQL")
+            return
+
+        for table, spec in TABLES.items():
+            if is_partitioned(db, table):
+                print(f"   {table}: already partitioned")
+                continue
+
+            try:
+                queries = migration_queries(db, table, spec["foreign_keys"], spec["indexes"])
+                for query in queries:
+                    db.execute(text(query))
+                db.commit()
+                print(f"   {table}: partitioned ({len(queries)} statements)")
+            except Exception as e:
+                print(f"   {table} failed, left unchanged: {e}")
+                db.rollback()
+                raise
+
+        print("\n✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
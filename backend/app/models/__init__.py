@@ -17,6 +17,10 @@ from app.models.wallet import (
     Wallet, WalletTransaction, Referral, ReferralCode, Promotion, PromotionUsage,
     TransactionType, TransactionStatus, ReferralStatus
 )
+from app.models.outbox import EventOutbox
+from app.models.leader_lease import LeaderLease
+from app.models.sla_alert import SLAAlert
+from app.models.idempotency import IdempotencyKey
 
 __all__ = [
     # User
@@ -41,6 +45,14 @@ __all__ = [
     # Wallet & Referral
     "Wallet", "WalletTransaction", "Referral", "ReferralCode", "Promotion", "PromotionUsage",
     "TransactionType", "TransactionStatus", "ReferralStatus",
+    # Events
+    "EventOutbox",
+    # Coordination
+    "LeaderLease",
+    # SLA
+    "SLAAlert",
+    # Idempotency
+    "IdempotencyKey",
 ]
 
 
@@ -141,7 +141,8 @@ class BookingStatusHistory(Base):
     changed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     reason = Column(Text, nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key on PostgreSQL (monthly ranges, see services/partitions.py)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
 class TimeSlot(Base):
@@ -138,8 +138,9 @@ class OTPRequest(Base):
     # Status
     verified = Column(Boolean, default=False)
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Timestamps; created_at is the partition key on PostgreSQL (monthly
+    # ranges, see services/partitions.py)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     verified_at = Column(DateTime(timezone=True), nullable=True)
     
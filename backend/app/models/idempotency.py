@@ -0,0 +1,39 @@
+"""
+Idempotency key model for safely retried write requests.
+
+One row per (user, scope, key). A row in progress doubles as the lock
+that makes concurrent duplicates wait; a completed row holds the stored
+response that replays are answered with until it expires.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Client-supplied idempotency key and the response it produced.
+
+    scope names the operation (e.g., "POST /bookings/"); request_hash is
+    the SHA-256 fingerprint of the request body, so a key reused with a
+    different body is rejected instead of replayed.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_scope_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    scope = Column(String(100), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+
+    # in_progress while the first request runs, completed once its response is stored
+    status = Column(String(20), nullable=False, default="in_progress")
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON as returned to the client
+
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
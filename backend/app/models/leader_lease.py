@@ -0,0 +1,26 @@
+"""
+Leader lease model for coordinating background work across workers.
+
+One row per elected role. The epoch is bumped every time a worker takes
+over and serves as a fencing token for the current leader.
+"""
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class LeaderLease(Base):
+    """
+    Current holder of an elected role (e.g., "background-tasks").
+
+    Exclusivity comes from a Postgres advisory lock held by the leader;
+    this row records who holds it and the fencing epoch.
+    """
+    __tablename__ = "leader_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)  # hostname:pid of the leader
+    epoch = Column(BigInteger, nullable=False, default=1)  # Fencing token, increases on every takeover
+
+    acquired_at = Column(DateTime(timezone=True), server_default=func.now())
+    renewed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,34 @@
+"""
+Event Outbox model for transactional event publishing.
+
+Events are written to this table in the same transaction as the state
+change that produced them, then drained by a background relay.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class EventOutbox(Base):
+    """
+    Pending and delivered domain events.
+
+    Rows with published_at NULL are still waiting for the relay.
+    Delivered rows are kept for a retention window so dashboards
+    can rebuild their state by replaying the outbox.
+    """
+    __tablename__ = "event_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(36), unique=True, nullable=False, index=True)  # UUID, used for consumer dedup
+    event_type = Column(String(50), nullable=False, index=True)  # e.g., "job.started"
+    payload = Column(Text, nullable=False)  # JSON string
+    timestamp = Column(String(40), nullable=False)  # ISO timestamp carried on the published event
+
+    # Delivery tracking
+    published_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    claimed_until = Column(DateTime(timezone=True), nullable=True)  # relay lease while publishing
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
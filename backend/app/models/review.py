@@ -108,7 +108,8 @@ class AuditLog(Base):
     old_values = Column(Text, nullable=True)  # JSON - deprecated, use previous_state
     new_values = Column(Text, nullable=True)  # JSON - deprecated, use new_state
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Partition key on PostgreSQL (monthly ranges, see services/partitions.py)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
 
 
 class Notification(Base):
@@ -0,0 +1,40 @@
+"""
+SLA alert state model.
+
+One row per job that breached its start SLA, tracking how far the alert
+has escalated so notifications fire only on a new breach or escalation.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SLAAlert(Base):
+    """
+    Alert state for a job that missed its start SLA.
+
+    The alert stays open while the job is active (assigned, in progress
+    or paused) and is resolved once the job leaves those states.
+    """
+    __tablename__ = "sla_alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), unique=True, nullable=False, index=True)
+
+    breach_type = Column(String(20), nullable=False)  # start_delayed, started_late
+    sla_deadline = Column(DateTime(timezone=True), nullable=False)
+    first_breach_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Escalation tracking
+    escalation_level = Column(Integer, default=1, nullable=False)  # 1-based; see SLAMonitor.ESCALATION_STEPS_MINUTES
+    delay_minutes = Column(Integer, default=0, nullable=False)  # Latest observed (final for started_late)
+    last_notified_at = Column(DateTime(timezone=True), nullable=True)
+
+    resolved_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    booking = relationship("Booking")
@@ -0,0 +1,137 @@
+"""
+Booking list projection.
+
+One statement for a page of booking list rows: the booking columns the
+list shows plus customer, service, address, assigned employee (or legacy
+cleaner), review presence and, for admin lists, add-on names, all through
+joins. Rows come back as tuples, not ORM objects, and are turned into
+BookingListResponse-shaped dicts by booking_list_items() for json_response().
+
+Usage:
+    stmt = booking_list_query().where(Booking.customer_id == user.id)
+    rows = db.execute(BOOKINGS_BY_CREATED.apply(stmt, cursor, limit)).all()
+    items = booking_list_items(rows)
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import aliased
+
+from app.models import Address, AddOn, Booking, Employee, Review, Service, User, booking_add_ons
+
+# Joins add_on names into one column where array_agg is unavailable
+ADD_ON_SEPARATOR = "\x1f"
+
+
+def _add_on_names(dialect_name: str):
+    """Correlated subquery with the booking's add-on names."""
+    names = (
+        func.array_agg(AddOn.name) if dialect_name == "postgresql"
+        else func.group_concat(AddOn.name, ADD_ON_SEPARATOR)
+    )
+    return (
+        select(names)
+        .join(booking_add_ons, booking_add_ons.c.add_on_id == AddOn.id)
+        .where(booking_add_ons.c.booking_id == Booking.id)
+        .scalar_subquery()
+        .label("add_on_names")
+    )
+
+
+def booking_list_query(include_add_ons: bool = False, dialect_name: str = "postgresql"):
+    """
+    Select of projected booking list columns.
+
+    Labels keep the booking's own id and created_at as "id" and
+    "created_at" so Keyset pagination can read them from the rows.
+    """
+    customer = aliased(User)
+    cleaner = aliased(User)
+
+    columns = [
+        Booking.id,
+        Booking.booking_number,
+        Booking.scheduled_date,
+        Booking.status,
+        Booking.payment_status,
+        Booking.total_price,
+        Booking.created_at,
+        customer.first_name.label("customer_first_name"),
+        customer.last_name.label("customer_last_name"),
+        customer.email.label("customer_email"),
+        Service.name.label("service_name"),
+        Address.street_address,
+        Address.apartment,
+        Address.city,
+        Booking.assigned_employee_id,
+        Employee.full_name.label("employee_name"),
+        Employee.phone_number.label("employee_phone"),
+        cleaner.first_name.label("cleaner_first_name"),
+        cleaner.last_name.label("cleaner_last_name"),
+        cleaner.phone.label("cleaner_phone"),
+        Review.id.label("review_id"),
+    ]
+    if include_add_ons:
+        columns.append(_add_on_names(dialect_name))
+
+    return (
+        select(*columns)
+        .join(customer, customer.id == Booking.customer_id)
+        .join(Service, Service.id == Booking.service_id)
+        .join(Address, Address.id == Booking.address_id)
+        .outerjoin(Employee, Employee.id == Booking.assigned_employee_id)
+        .outerjoin(cleaner, cleaner.id == Booking.cleaner_id)
+        .outerjoin(Review, Review.booking_id == Booking.id)
+    )
+
+
+def _add_ons(row: Row) -> List[str]:
+    names = row._mapping.get("add_on_names")
+    if not names:
+        return []
+    if isinstance(names, str):
+        return names.split(ADD_ON_SEPARATOR)
+    return list(names)
+
+
+def booking_list_items(rows: List[Row]) -> List[Dict[str, Any]]:
+    """BookingListResponse-shaped dicts for booking_list_query() rows."""
+    items = []
+    for row in rows:
+        scheduled_dt = row.scheduled_date
+
+        # Assigned employee first, legacy User-based cleaner as fallback
+        cleaner_name = None
+        cleaner_phone = None
+        if row.assigned_employee_id:
+            cleaner_name = row.employee_name
+            cleaner_phone = row.employee_phone
+        elif row.cleaner_first_name is not None:
+            cleaner_name = f"{row.cleaner_first_name} {row.cleaner_last_name}"
+            cleaner_phone = row.cleaner_phone
+
+        address = row.street_address
+        if row.apartment:
+            address = f"{row.apartment}, {address}"
+
+        items.append({
+            "id": row.id,
+            "booking_number": row.booking_number,
+            "customer_name": f"{row.customer_first_name} {row.customer_last_name}",
+            "customer_email": row.customer_email,
+            "service_name": row.service_name,
+            "address": address,
+            "city": row.city,
+            "scheduled_date": scheduled_dt.strftime('%Y-%m-%d') if scheduled_dt else '',
+            "scheduled_time": scheduled_dt.strftime('%I:%M %p') if scheduled_dt else '',
+            "status": row.status.value,
+            "payment_status": row.payment_status.value,
+            "total_price": row.total_price,
+            "created_at": row.created_at,
+            "cleaner_name": cleaner_name,
+            "cleaner_phone": cleaner_phone,
+            "has_review": row.review_id is not None,
+            "add_ons": _add_ons(row),
+        })
+    return items
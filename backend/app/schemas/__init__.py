@@ -14,7 +14,7 @@ from app.schemas.service import (
 from app.schemas.booking import (
     BookingCreate, BookingUpdate, BookingStatusUpdate,
     BookingAssignCleaner, BookingReschedule, BookingCancel,
-    BookingResponse, BookingListResponse,
+    BookingResponse, BookingListResponse, BookingSearchResult,
     TimeSlotResponse, AvailabilityRequest, AvailabilityResponse, AvailableSlot,
     BookingStatus, PaymentStatus
 )
@@ -55,7 +55,7 @@ __all__ = [
     # Booking
     "BookingCreate", "BookingUpdate", "BookingStatusUpdate",
     "BookingAssignCleaner", "BookingReschedule", "BookingCancel",
-    "BookingResponse", "BookingListResponse",
+    "BookingResponse", "BookingListResponse", "BookingSearchResult",
     "TimeSlotResponse", "AvailabilityRequest", "AvailabilityResponse", "AvailableSlot",
     "BookingStatus", "PaymentStatus",
     # Payment
@@ -200,6 +200,20 @@ class BookingListResponse(BaseModel):
     add_ons: List[str] = []
 
 
+class BookingSearchResult(BaseModel):
+    """Admin search hit, ranked by score (1.0 = exact booking number)."""
+    id: int
+    booking_number: str
+    customer_name: str
+    customer_email: str
+    customer_phone: Optional[str] = None
+    scheduled_date: datetime
+    status: str
+    payment_status: str
+    total_price: Decimal
+    score: float
+
+
 # ============ Time Slot Schemas ============
 
 class TimeSlotResponse(BaseModel):
@@ -20,17 +20,19 @@ import logging
 import math
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
-from typing import Optional, List, Dict, Tuple, Any
+from typing import Optional, List, Dict, Tuple, Any, Union
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 
 from app.models.employee import Employee, EmployeeAccountStatus, EmployeeCleanerStatus
 from app.models.booking import Booking, BookingStatus
 from app.models import Address
 from app.services.cache import cache_service
+from app.services.sla_monitor import schedule_sla_deadline
 from app.services.cleaner_assignment import (
-    get_region_from_city, has_time_conflict, CITY_REGION_MAP
+    get_region_from_city, has_time_conflict, stage_auto_assigned_event, CITY_REGION_MAP
 )
 
 logger = logging.getLogger(__name__)
@@ -109,7 +111,12 @@ class AllocationEngine:
     Enhanced allocation engine with Redis support and scoring algorithm.
     """
 
-    def __init__(self, db: Session, config: Optional[AllocationConfig] = None):
+    def __init__(self, db: Union[Session, AsyncSession], config: Optional[AllocationConfig] = None):
+        """
+        db is a sync Session for allocation; the read-only dashboard
+        methods (get_queue_status, get_allocation_metrics) also accept an
+        AsyncSession.
+        """
         self.db = db
         self.config = config or AllocationConfig()
 
@@ -424,33 +431,40 @@ class AllocationEngine:
         # Fallback: calculate from recent job completions
         return await self._calculate_queue_positions(region_code)
 
+    async def _execute(self, statement):
+        """Run a read statement on either a sync Session or an AsyncSession."""
+        if isinstance(self.db, AsyncSession):
+            return await self.db.execute(statement)
+        return self.db.execute(statement)
+
     async def _calculate_queue_positions(self, region_code: str) -> Dict[str, int]:
         """
         Calculate queue positions based on last job completion time.
         Cleaners who completed jobs earlier are at the front of the queue.
         """
-        from sqlalchemy import desc
-
-        # Get last completion time for each cleaner in region
-        cleaners = self.db.query(Employee).filter(
-            Employee.account_status == EmployeeAccountStatus.ACTIVE,
-            Employee.region_code == region_code
-        ).all()
-
-        cleaner_times = []
-        for cleaner in cleaners:
-            # Get most recent completed job
-            last_job = self.db.query(Booking).filter(
-                Booking.assigned_employee_id == cleaner.id,
+        # Last completion time for each active cleaner in the region, in one query
+        last_end_time = (
+            select(func.max(Booking.actual_end_time))
+            .where(
+                Booking.assigned_employee_id == Employee.id,
                 Booking.status == BookingStatus.COMPLETED,
                 Booking.actual_end_time != None
-            ).order_by(desc(Booking.actual_end_time)).first()
+            )
+            .correlate(Employee)
+            .scalar_subquery()
+        )
+        rows = (await self._execute(
+            select(Employee.id, last_end_time).where(
+                Employee.account_status == EmployeeAccountStatus.ACTIVE,
+                Employee.region_code == region_code
+            )
+        )).all()
 
-            if last_job and last_job.actual_end_time:
-                cleaner_times.append((str(cleaner.id), last_job.actual_end_time))
-            else:
-                # No recent jobs = front of queue
-                cleaner_times.append((str(cleaner.id), datetime.min.replace(tzinfo=timezone.utc)))
+        # No recent jobs = front of queue
+        cleaner_times = [
+            (str(employee_id), last_end_time or datetime.min.replace(tzinfo=timezone.utc))
+            for employee_id, last_end_time in rows
+        ]
 
         # Sort by completion time (oldest first = front of queue)
         cleaner_times.sort(key=lambda x: x[1])
@@ -498,7 +512,9 @@ class AllocationEngine:
             # Calculate SLA deadline (scheduled time + 10 min buffer)
             booking.sla_deadline = booking.scheduled_date + timedelta(minutes=10)
 
+            stage_auto_assigned_event(self.db, booking, cleaner)
             self.db.commit()
+            schedule_sla_deadline(booking)
 
             logger.info(
                 f"Allocated cleaner {cleaner.full_name} ({cleaner.employee_id}) "
@@ -633,23 +649,29 @@ class AllocationEngine:
         """
         positions = await self._get_queue_positions(region_code)
 
-        cleaners = self.db.query(Employee).filter(
-            Employee.account_status == EmployeeAccountStatus.ACTIVE,
-            Employee.region_code == region_code
-        ).all()
+        cleaners = (await self._execute(
+            select(Employee).where(
+                Employee.account_status == EmployeeAccountStatus.ACTIVE,
+                Employee.region_code == region_code
+            )
+        )).scalars().all()
+
+        # Today's booking count for every cleaner in one grouped query
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0)
+        booking_counts = dict((await self._execute(
+            select(Booking.assigned_employee_id, func.count(Booking.id))
+            .where(
+                Booking.assigned_employee_id.in_([cleaner.id for cleaner in cleaners]),
+                Booking.scheduled_date >= today,
+                Booking.status.notin_([BookingStatus.CANCELLED, BookingStatus.NO_SHOW])
+            )
+            .group_by(Booking.assigned_employee_id)
+        )).all()) if cleaners else {}
 
         queue_status = []
         for cleaner in cleaners:
             pos = positions.get(str(cleaner.id), 999)
 
-            # Get today's booking count
-            today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0)
-            booking_count = self.db.query(func.count(Booking.id)).filter(
-                Booking.assigned_employee_id == cleaner.id,
-                Booking.scheduled_date >= today,
-                Booking.status.notin_([BookingStatus.CANCELLED, BookingStatus.NO_SHOW])
-            ).scalar() or 0
-
             queue_status.append({
                 "employee_id": str(cleaner.id),
                 "employee_number": cleaner.employee_id,
@@ -657,7 +679,7 @@ class AllocationEngine:
                 "queue_position": pos,
                 "status": cleaner.cleaner_status.value if cleaner.cleaner_status else "unknown",
                 "rating": float(cleaner.rating) if cleaner.rating else None,
-                "todays_bookings": booking_count
+                "todays_bookings": booking_counts.get(cleaner.id, 0)
             })
 
         # Sort by queue position
@@ -0,0 +1,228 @@
+"""
+Audit Log Writer
+
+Audit rows are buffered in-process and inserted in batches instead of one
+INSERT inside every request transaction:
+- add() stages an entry on the caller's session; it joins the buffer only
+  when that session commits, and is dropped if it rolls back, so the audit
+  trail never records a change that did not happen.
+- A background task writes the buffer once it holds batch_size entries or
+  every flush_interval seconds: COPY on PostgreSQL (psycopg2), one
+  multi-row INSERT elsewhere. stop() flushes what is left at shutdown.
+
+Durable entries are inserted in the caller's transaction instead,
+committed (or rolled back) with the change they describe. add() writes
+durably when asked to, when AUDIT_SYNC_WRITES is set, when the writer is
+not running (scripts, tests) and when the buffer is full (the database is
+not keeping up).
+
+A crash loses at most the buffered, non-durable entries.
+
+Usage:
+    await audit_writer.start(SessionLocal)        # once, at startup
+    audit_writer.add(db, {"entity_type": "booking", ...})
+    audit_writer.add(db, {...}, durable=True)     # critical entry
+    db.commit()
+    await audit_writer.stop()                     # at shutdown
+"""
+import asyncio
+import io
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Columns written for every entry; absent keys are NULL
+AUDIT_COLUMNS = (
+    "user_id", "actor_type", "action", "entity_type", "entity_id",
+    "previous_state", "new_state", "reason", "extra_data",
+    "ip_address", "user_agent", "created_at",
+)
+
+# Session.info key holding entries staged until the session commits
+PENDING_KEY = "audit_pending"
+
+
+def _row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    row = {column: entry.get(column) for column in AUDIT_COLUMNS}
+    row["actor_type"] = row["actor_type"] or "user"
+    row["created_at"] = row["created_at"] or datetime.now(timezone.utc)
+    return row
+
+
+def _csv_field(value: Any) -> str:
+    # COPY csv reads an unquoted empty field as NULL and a quoted one as ''
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class AuditWriter:
+    """Batches audit log inserts; see module docstring."""
+
+    # Entries held in memory before add() falls back to synchronous writes
+    MAX_BUFFERED = 50000
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._session_factory = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Counters exposed through get_stats()
+        self._buffered = 0
+        self._written = 0
+        self._batches = 0
+        self._sync_writes = 0
+        self._failed_batches = 0
+
+    # ============ Recording ============
+
+    def add(self, db: Session, entry: Dict[str, Any], durable: bool = False) -> None:
+        """Record an audit entry as part of db's current transaction."""
+        self.add_many(db, [entry], durable=durable)
+
+    def add_many(self, db: Session, entries: List[Dict[str, Any]], durable: bool = False) -> None:
+        """Record several audit entries as part of db's current transaction."""
+        if not entries:
+            return
+        rows = [_row(entry) for entry in entries]
+
+        if (
+            durable
+            or settings.AUDIT_SYNC_WRITES
+            or not self._running
+            or len(self._buffer) >= self.MAX_BUFFERED
+        ):
+            db.execute(insert(AuditLog), rows)
+            self._sync_writes += len(rows)
+            return
+
+        db.info.setdefault(PENDING_KEY, []).extend(rows)
+
+    def _on_commit(self, session: Session) -> None:
+        rows = session.info.pop(PENDING_KEY, None)
+        if not rows:
+            return
+        self._buffer.extend(rows)
+        self._buffered += len(rows)
+        if len(self._buffer) >= self.batch_size and self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _on_transaction_end(self, session: Session, transaction) -> None:
+        # Entries still staged when the outermost transaction ends were rolled back
+        if transaction.parent is None:
+            session.info.pop(PENDING_KEY, None)
+
+    # ============ Writing ============
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert one batch in its own transaction."""
+        with self._session_factory() as db:
+            if db.bind.dialect.driver == "psycopg2":
+                data = io.StringIO()
+                for row in rows:
+                    data.write(",".join(_csv_field(row[column]) for column in AUDIT_COLUMNS))
+                    data.write("\n")
+                data.seek(0)
+                cursor = db.connection().connection.cursor()
+                cursor.copy_expert(
+                    f"COPY {AuditLog.__tablename__} ({', '.join(AUDIT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    data
+                )
+            else:
+                db.execute(insert(AuditLog), rows)
+            db.commit()
+
+    async def flush(self) -> int:
+        """
+        Write everything buffered, batch_size entries per statement.
+
+        A failed batch is put back for the next flush. Returns the number
+        of entries written.
+        """
+        written = 0
+        while self._buffer and self._session_factory:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                self._buffer.extendleft(reversed(batch))
+                self._failed_batches += 1
+                logger.error(f"Audit log flush of {len(batch)} entries failed: {e}")
+                break
+            written += len(batch)
+            self._batches += 1
+
+        self._written += written
+        return written
+
+    async def _run(self) -> None:
+        """Flush when a batch fills up or flush_interval passes."""
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Audit writer error: {e}")
+
+    async def start(self, session_factory) -> None:
+        """Start buffering; session_factory opens the sessions batches are written with."""
+        if self._task:
+            return
+        self._session_factory = session_factory
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop buffering and write whatever is left."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._buffer:
+            logger.error(f"Audit writer stopped with {len(self._buffer)} entries unwritten")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get audit writer statistics."""
+        return {
+            "pending": len(self._buffer),
+            "buffered": self._buffered,
+            "written": self._written,
+            "batches": self._batches,
+            "sync_writes": self._sync_writes,
+            "failed_batches": self._failed_batches,
+        }
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS
+)
+
+event.listen(Session, "after_commit", audit_writer._on_commit)
+event.listen(Session, "after_transaction_end", audit_writer._on_transaction_end)
@@ -0,0 +1,178 @@
+"""
+Booking Search
+
+Admin search over booking numbers and customer email, name and phone.
+
+Every match is driven by an index (see migrations/add_booking_search_indexes):
+- booking number prefixes use a varchar_pattern_ops btree index, phone
+  prefixes a text_pattern_ops btree index on the phone's digits, so
+  "+971 50-123" is found by 97150123
+- substring matches on booking number, email and full name use pg_trgm GIN
+  indexes, which serve ILIKE '%term%' without scanning the table
+
+Matching booking ids are collected per table and UNIONed, so each branch
+can use its own index; a single OR spanning bookings and users can only be
+evaluated after joining every booking to its customer.
+
+Results are ranked: exact booking number, then booking number or phone
+prefix, then trigram similarity of email/name (Postgres). Other databases
+get the same matches with the prefix ranking only.
+
+Usage:
+    results = search_bookings(db, "BH2401", limit=20)
+    query = query.filter(Booking.id.in_(matching_booking_ids("jane")))
+"""
+import re
+from typing import Any, Dict, List
+
+from sqlalchemy import case, func, literal, literal_column, or_, select, union
+from sqlalchemy.orm import Session
+
+from app.models import Booking, User
+
+# Trigram indexes need at least one full trigram to narrow anything down;
+# shorter terms only match prefixes
+MIN_SUBSTRING_LENGTH = 3
+
+# Ranks for index-exact matches; trigram similarity is in [0, 1]
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+
+# Digits a phone term needs before it is matched against phones
+MIN_PHONE_DIGITS = 3
+
+_PHONE_TERM = re.compile(r"^\+?[\d\s\-()]{3,}$")
+
+# Formatting stripped from stored phones by customer_phone_digits_expr
+_PHONE_SEPARATORS = ("+", " ", "-", "(", ")", ".")
+
+
+def _escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def customer_name_expr(user=User):
+    """
+    Full name as indexed by idx_users_full_name_trgm.
+
+    The separator is rendered inline, not as a bound parameter, so the
+    expression matches the index definition.
+    """
+    return user.first_name + literal_column("' '") + user.last_name
+
+
+def customer_phone_digits_expr(user=User):
+    """
+    Phone without formatting, as indexed by idx_users_phone_digits_prefix.
+
+    Literals are rendered inline, as in customer_name_expr.
+    """
+    expr = user.phone
+    for separator in _PHONE_SEPARATORS:
+        expr = func.replace(expr, literal_column(f"'{separator}'"), literal_column("''"))
+    return expr
+
+
+def _phone_matches(term: str) -> List[Any]:
+    """Digits-prefix match on the customer's phone for a numeric term."""
+    if not _PHONE_TERM.match(term):
+        return []
+    digits = re.sub(r"\D", "", term)
+    # Separators alone would match every phone
+    if len(digits) < MIN_PHONE_DIGITS:
+        return []
+    return [customer_phone_digits_expr().like(f"{digits}%")]
+
+
+def matching_booking_ids(term: str):
+    """
+    Select of booking ids matching a search term.
+
+    Suitable for Booking.id.in_(...) in filtered list queries.
+    """
+    term = term.strip()
+    number_prefix = f"{_escape_like(term.upper())}%"
+
+    branches = [
+        select(Booking.id).where(Booking.booking_number.like(number_prefix, escape="\\"))
+    ]
+
+    customer_match = _phone_matches(term)
+    if len(term) >= MIN_SUBSTRING_LENGTH:
+        contains = f"%{_escape_like(term)}%"
+        branches.append(
+            select(Booking.id).where(Booking.booking_number.ilike(contains, escape="\\"))
+        )
+        customer_match += [
+            User.email.ilike(contains, escape="\\"),
+            customer_name_expr().ilike(contains, escape="\\"),
+        ]
+
+    if customer_match:
+        branches.append(
+            select(Booking.id)
+            .join(User, User.id == Booking.customer_id)
+            .where(or_(*customer_match))
+        )
+
+    return union(*branches)
+
+
+def search_bookings(db: Session, term: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked bookings matching a search term, best match first."""
+    term = term.strip()
+    if not term:
+        return []
+
+    number = term.upper()
+    prefix_matches = [Booking.booking_number.like(f"{_escape_like(number)}%", escape="\\")]
+    prefix_matches += _phone_matches(term)
+    score = case(
+        (Booking.booking_number == number, literal(EXACT_SCORE)),
+        (or_(*prefix_matches), literal(PREFIX_SCORE)),
+        else_=literal(0.0)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        score = func.greatest(
+            score,
+            func.similarity(User.email, term),
+            func.word_similarity(term, customer_name_expr()),
+        )
+    score = score.label("score")
+
+    rows = db.execute(
+        select(
+            Booking.id,
+            Booking.booking_number,
+            Booking.status,
+            Booking.payment_status,
+            Booking.scheduled_date,
+            Booking.total_price,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.phone,
+            score,
+        )
+        .join(User, User.id == Booking.customer_id)
+        .where(Booking.id.in_(matching_booking_ids(term)))
+        .order_by(score.desc(), Booking.created_at.desc())
+        .limit(limit)
+    ).all()
+
+    return [
+        {
+            "id": row.id,
+            "booking_number": row.booking_number,
+            "customer_name": f"{row.first_name} {row.last_name}",
+            "customer_email": row.email,
+            "customer_phone": row.phone,
+            "scheduled_date": row.scheduled_date,
+            "status": row.status.value,
+            "payment_status": row.payment_status.value,
+            "total_price": row.total_price,
+            "score": round(float(row.score or 0), 3),
+        }
+        for row in rows
+    ]
@@ -218,6 +218,19 @@ class CacheService:
         for key, value in stats.items():
             await self.client.hset(self.DASHBOARD_STATS_KEY, key, str(value))
     
+    async def replace_dashboard_stats(self, stats: Dict[str, int]) -> None:
+        """Replace all dashboard statistics, dropping fields not in stats."""
+        values = {key: str(value) for key, value in stats.items()}
+        if self._using_redis:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.delete(self.DASHBOARD_STATS_KEY)
+            pipe.hset(self.DASHBOARD_STATS_KEY, mapping=values)
+            await pipe.execute()
+        else:
+            await self.client.delete(self.DASHBOARD_STATS_KEY)
+            for key, value in values.items():
+                await self.client.hset(self.DASHBOARD_STATS_KEY, key, value)
+
     async def update_dashboard_stat(self, field: str, delta: int = 1) -> int:
         """Increment/decrement a dashboard stat."""
         return await self.client.hincrby(self.DASHBOARD_STATS_KEY, field, delta)
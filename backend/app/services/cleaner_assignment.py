@@ -10,11 +10,14 @@ Assigns cleaners to bookings automatically based on:
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Iterable
 import logging
 
 from app.models.employee import Employee, EmployeeAccountStatus, RegionCode
 from app.models.booking import Booking, BookingStatus
+from app.models.user import Address
+from app.services.events import EventType
+from app.services.outbox import enqueue_event
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +45,48 @@ def get_region_from_city(city: str) -> Optional[str]:
     return CITY_REGION_MAP.get(city_lower)
 
 
+def stage_auto_assigned_event(db: Session, booking: Booking, cleaner: Employee) -> None:
+    """
+    Add the JOB_ASSIGNED event of an automatic assignment to the outbox.
+
+    Call before committing the assignment, so the event commits with it.
+    """
+    enqueue_event(db, EventType.JOB_ASSIGNED, {
+        "job_id": booking.id,
+        "booking_number": booking.booking_number,
+        "status": booking.status.value,
+        "customer_id": booking.customer_id,
+        "region": get_region_from_city(booking.address.city) if booking.address else None,
+        "cleaner_id": str(cleaner.id),
+        "cleaner_name": cleaner.full_name,
+        "employee_id": cleaner.employee_id,
+        "scheduled_date": booking.scheduled_date.isoformat(),
+        "auto_assigned": True
+    })
+
+
+def get_job_regions(db: Session, job_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """Region code of each job's address, in one query."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+    rows = db.query(Booking.id, Address.city).outerjoin(
+        Address, Address.id == Booking.address_id
+    ).filter(Booking.id.in_(job_ids)).all()
+    return {job_id: get_region_from_city(city) for job_id, city in rows}
+
+
+def get_cleaner_region(db: Session, cleaner_id: int) -> Optional[str]:
+    """Region of the cleaner's most recently assigned active job, if any."""
+    row = db.query(Address.city).join(
+        Booking, Booking.address_id == Address.id
+    ).filter(
+        Booking.cleaner_id == cleaner_id,
+        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED])
+    ).order_by(Booking.assigned_at.desc()).first()
+    return get_region_from_city(row.city) if row else None
+
+
 def find_available_cleaners(
     region_code: str,
     scheduled_date: datetime,
@@ -215,6 +260,7 @@ def auto_assign_cleaner(
     if assigned_cleaner:
         # Assign the cleaner to the booking
         booking.assigned_employee_id = assigned_cleaner.id
+        stage_auto_assigned_event(db, booking, assigned_cleaner)
         db.commit()
         logger.info(
             f"Auto-assigned cleaner {assigned_cleaner.full_name} ({assigned_cleaner.employee_id}) "
@@ -0,0 +1,283 @@
+"""
+Deadline Scheduler
+
+In-process min-heap of timed checks (SLA start deadlines, cooldown expiries,
+payment timeouts). Deadlines are registered when the state change that
+creates them happens and rebuilt from the database on startup, so the
+scheduler sleeps until the next deadline instead of polling tables on a
+fixed interval.
+
+Entries are (kind, key) pairs with a due time. Rescheduling a key replaces
+its previous deadline; superseded heap entries are skipped lazily when they
+reach the top. Handlers receive every key of their kind that fell due and
+must re-check state in the database, since the deadline may no longer apply
+(job started, booking paid, changed by another worker).
+
+The scheduler only holds deadlines while activated, which the background
+runner does in the elected leader. In other workers schedule() buffers the
+deadline for forwarding: the background runner writes the buffer to the
+outbox and the leader schedules what it reads back (see
+BackgroundTaskRunner in sla_monitor).
+
+Usage:
+    deadline_scheduler.register("payment_timeout", handle_payment_timeouts)
+    deadline_scheduler.schedule("payment_timeout", booking.id, booking.created_at + timeout)
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Optional
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DeadlineHandler = Callable[[Session, List[Any]], Awaitable[None]]
+
+
+class DeadlineScheduler:
+    """
+    Fires registered handlers when their deadlines pass.
+
+    schedule() and cancel() are thread-safe so they can be called from
+    sync endpoints running in the threadpool.
+    """
+
+    # Longest sleep between wakeups, bounding the effect of clock adjustments
+    MAX_SLEEP_SECONDS = 60.0
+
+    # A handler that raised sees its keys again after this long
+    RETRY_DELAY_SECONDS = 30.0
+
+    # Deadlines buffered for forwarding while inactive; the oldest are dropped
+    # beyond this (the leader's resync still finds them)
+    MAX_FORWARDED = 10000
+
+    def __init__(self):
+        # (due_ts, seq, kind, key); seq keeps ordering stable for equal deadlines
+        self._heap: List[Tuple[float, int, str, Any]] = []
+
+        # (kind, key) -> current due timestamp; heap entries not matching are stale
+        self._due: Dict[Tuple[str, Any], float] = {}
+
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, DeadlineHandler] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._active = False
+
+        # (kind, key, due_ts) scheduled while inactive, waiting to be forwarded
+        self._forwarded: deque = deque(maxlen=self.MAX_FORWARDED)
+        self._forward_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._forward_wakeup: Optional[asyncio.Event] = None
+
+        # Counters exposed through get_stats()
+        self._fired = 0
+        self._handler_errors = 0
+        self._forwarded_count = 0
+
+    def register(self, kind: str, handler: DeadlineHandler) -> None:
+        """Register the handler called with (db, keys) when deadlines of a kind fall due."""
+        self._handlers[kind] = handler
+
+    def activate(self) -> None:
+        """Start accepting deadlines (this process is the leader)."""
+        with self._lock:
+            self._active = True
+            buffered = list(self._forwarded)
+            self._forwarded.clear()
+        for kind, key, due_ts in buffered:
+            self.schedule(kind, key, datetime.fromtimestamp(due_ts, timezone.utc))
+
+    def deactivate(self) -> None:
+        """Stop accepting deadlines and drop the pending ones."""
+        with self._lock:
+            self._active = False
+            self._heap = []
+            self._due = {}
+
+    def schedule(self, kind: str, key: Any, due_at: datetime) -> None:
+        """Set (or move) the deadline for a key; buffered for forwarding while inactive."""
+        due_ts = due_at.timestamp()
+        with self._lock:
+            if not self._active:
+                self._forwarded.append((kind, key, due_ts))
+                forward = True
+            else:
+                forward = False
+        if forward:
+            self._notify_forwarder()
+            return
+
+        with self._lock:
+            if self._due.get((kind, key)) == due_ts:
+                return
+            self._due[(kind, key)] = due_ts
+            heapq.heappush(self._heap, (due_ts, next(self._seq), kind, key))
+            earliest = self._heap[0][0] >= due_ts
+
+            # Superseded entries accumulate on reschedule; rebuild when they dominate
+            if len(self._heap) > 2 * len(self._due) + 1024:
+                self._compact()
+
+        if earliest:
+            self._notify()
+
+    def is_scheduled(self, kind: str, key: Any) -> bool:
+        """Check whether a key currently has a deadline."""
+        with self._lock:
+            return (kind, key) in self._due
+
+    def cancel(self, kind: str, key: Any) -> None:
+        """Drop the deadline for a key, if any."""
+        with self._lock:
+            self._due.pop((kind, key), None)
+
+    def _compact(self) -> None:
+        """Rebuild the heap from live deadlines. Caller holds the lock."""
+        self._heap = [
+            (due_ts, next(self._seq), kind, key)
+            for (kind, key), due_ts in self._due.items()
+        ]
+        heapq.heapify(self._heap)
+
+    def _notify(self) -> None:
+        """Wake the run loop so it re-evaluates its sleep."""
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # Loop already closed (shutdown)
+            pass
+
+    def _notify_forwarder(self) -> None:
+        if self._forward_loop is None or self._forward_wakeup is None:
+            return
+        try:
+            self._forward_loop.call_soon_threadsafe(self._forward_wakeup.set)
+        except RuntimeError:
+            pass
+
+    async def wait_forwarded(self, timeout: float) -> List[Tuple[str, Any, datetime]]:
+        """
+        Wait up to timeout for deadlines scheduled while inactive, then
+        take them all as (kind, key, due_at).
+        """
+        if self._forward_wakeup is None:
+            self._forward_loop = asyncio.get_running_loop()
+            self._forward_wakeup = asyncio.Event()
+        if not self._forwarded:
+            try:
+                await asyncio.wait_for(self._forward_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._forward_wakeup.clear()
+
+        with self._lock:
+            taken = list(self._forwarded)
+            self._forwarded.clear()
+        self._forwarded_count += len(taken)
+        return [(kind, key, datetime.fromtimestamp(due_ts, timezone.utc)) for kind, key, due_ts in taken]
+
+    def pop_due(self, now_ts: Optional[float] = None) -> Dict[str, List[Any]]:
+        """Remove and return all keys whose deadline has passed, grouped by kind."""
+        now_ts = time.time() if now_ts is None else now_ts
+        due: Dict[str, List[Any]] = {}
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now_ts:
+                due_ts, _, kind, key = heapq.heappop(self._heap)
+                if self._due.get((kind, key)) != due_ts:
+                    continue
+                del self._due[(kind, key)]
+                due.setdefault(kind, []).append(key)
+        return due
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Seconds until the earliest live deadline, or None when nothing is scheduled."""
+        with self._lock:
+            while self._heap:
+                due_ts, _, kind, key = self._heap[0]
+                if self._due.get((kind, key)) == due_ts:
+                    return max(0.0, due_ts - time.time())
+                heapq.heappop(self._heap)
+        return None
+
+    async def fire_due(self, db_session_factory) -> int:
+        """Run handlers for every deadline that has passed. Returns keys fired."""
+        due = self.pop_due()
+        if not due:
+            return 0
+
+        fired = 0
+        db = db_session_factory()
+        try:
+            for kind, keys in due.items():
+                handler = self._handlers.get(kind)
+                if not handler:
+                    logger.warning(f"No deadline handler registered for {kind}")
+                    continue
+                try:
+                    await handler(db, keys)
+                    fired += len(keys)
+                except Exception as e:
+                    self._handler_errors += 1
+                    db.rollback()
+                    logger.error(f"Deadline handler {kind} failed for {len(keys)} keys: {e}")
+                    retry_at = datetime.fromtimestamp(time.time() + self.RETRY_DELAY_SECONDS, timezone.utc)
+                    for key in keys:
+                        if not self.is_scheduled(kind, key):
+                            self.schedule(kind, key, retry_at)
+        finally:
+            db.close()
+
+        self._fired += fired
+        return fired
+
+    async def run(self, db_session_factory, is_running) -> None:
+        """Scheduler loop; sleeps until the next deadline or until an earlier one is added."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        while is_running():
+            self._wakeup.clear()
+            try:
+                await self.fire_due(db_session_factory)
+            except Exception as e:
+                logger.error(f"Deadline scheduler error: {e}")
+
+            wait = self.seconds_until_next()
+            timeout = self.MAX_SLEEP_SECONDS if wait is None else min(wait, self.MAX_SLEEP_SECONDS)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics."""
+        with self._lock:
+            pending: Dict[str, int] = {}
+            for kind, _ in self._due:
+                pending[kind] = pending.get(kind, 0) + 1
+            heap_size = len(self._heap)
+
+        return {
+            "active": self._active,
+            "pending": pending,
+            "heap_size": heap_size,
+            "next_due_in_seconds": self.seconds_until_next(),
+            "fired": self._fired,
+            "handler_errors": self._handler_errors,
+            "forwarded": self._forwarded_count,
+        }
+
+
+# Global deadline scheduler instance
+deadline_scheduler = DeadlineScheduler()
@@ -0,0 +1,162 @@
+"""
+Event Coalescer
+
+Buffers high-frequency WebSocket updates (cleaner GPS pings, dashboard stat
+changes) and keeps only the latest value per key. Pending values are flushed
+to their channel on a fixed tick as a single frame carrying many updates,
+so admin dashboards receive one frame per tick instead of one per ping.
+
+Two frame shapes are produced:
+- list frames: {"type": "cleaner.location.batch", "payload": {"updates": [...], "count": n}}
+- merge frames: {"type": "stats.updated", "payload": {"field": value, ...}}  (only changed fields)
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Awaitable, Optional, Set
+
+from app.middleware.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class EventCoalescer:
+    """
+    Latest-value-per-key buffer flushed to channels on a fixed tick.
+
+    Usage:
+        coalescer = EventCoalescer(send=ws_manager.broadcast_to_channel)
+        await coalescer.start()
+
+        coalescer.offer("admin", "cleaner.location.batch", key=cleaner_id, value={...})
+        coalescer.offer_fields("admin", "stats.updated", {"active_jobs_count": 12})
+    """
+
+    # Upper bound on updates packed into a single list frame
+    MAX_UPDATES_PER_FRAME = 500
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict[str, Any]], Awaitable[None]],
+        flush_interval: float = 1.0,
+        max_frames_per_second: int = 10
+    ):
+        self._send = send
+        self.flush_interval = flush_interval
+
+        # channel -> frame_type -> key -> latest value
+        self._pending: Dict[str, Dict[str, Dict[Any, Any]]] = {}
+
+        # Frame types whose values are merged into one payload dict
+        self._merge_types: Set[str] = set()
+
+        # Per-channel frame rate cap; over-cap frames stay pending and keep coalescing
+        self._channel_limiter = TokenBucket(max_frames_per_second, 1)
+
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Counters exposed through get_stats()
+        self._offered = 0
+        self._superseded = 0
+        self._frames_sent = 0
+        self._frames_deferred = 0
+
+    def offer(self, channel: str, frame_type: str, key: Any, value: Any) -> None:
+        """Buffer an update; replaces any pending value for the same key."""
+        frames = self._pending.setdefault(channel, {})
+        updates = frames.setdefault(frame_type, {})
+        if key in updates:
+            self._superseded += 1
+        updates[key] = value
+        self._offered += 1
+
+    def offer_fields(self, channel: str, frame_type: str, fields: Dict[str, Any]) -> None:
+        """Buffer field-level changes that are flushed as a single merged payload."""
+        self._merge_types.add(frame_type)
+        for field_name, value in fields.items():
+            self.offer(channel, frame_type, field_name, value)
+
+    def _build_frames(self, frame_type: str, updates: Dict[Any, Any]):
+        """Yield frames for one channel/frame_type, chunking large list batches."""
+        timestamp = datetime.now(timezone.utc).isoformat()
+
+        if frame_type in self._merge_types:
+            yield {"type": frame_type, "payload": dict(updates), "timestamp": timestamp}
+            return
+
+        values = list(updates.values())
+        for start in range(0, len(values), self.MAX_UPDATES_PER_FRAME):
+            chunk = values[start:start + self.MAX_UPDATES_PER_FRAME]
+            yield {
+                "type": frame_type,
+                "payload": {"updates": chunk, "count": len(chunk)},
+                "timestamp": timestamp
+            }
+
+    async def flush(self) -> int:
+        """
+        Send all pending updates that fit within each channel's rate cap.
+
+        Returns the number of frames sent.
+        """
+        sent = 0
+        for channel in list(self._pending.keys()):
+            frames = self._pending[channel]
+            for frame_type in list(frames.keys()):
+                allowed, _ = self._channel_limiter.allow(channel)
+                if not allowed:
+                    self._frames_deferred += 1
+                    continue
+
+                updates = frames.pop(frame_type)
+                for frame in self._build_frames(frame_type, updates):
+                    try:
+                        await self._send(channel, frame)
+                        sent += 1
+                    except Exception as e:
+                        logger.error(f"Coalescer flush to {channel} failed: {e}")
+
+            if not frames:
+                del self._pending[channel]
+
+        self._frames_sent += sent
+        return sent
+
+    async def _run(self) -> None:
+        """Flush loop."""
+        while self._running:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Coalescer error: {e}")
+
+    async def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task after delivering whatever is pending."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "pending_keys": sum(
+                len(updates) for frames in self._pending.values() for updates in frames.values()
+            ),
+            "offered": self._offered,
+            "superseded": self._superseded,
+            "frames_sent": self._frames_sent,
+            "frames_deferred": self._frames_deferred,
+            "flush_interval_seconds": self.flush_interval,
+        }
@@ -6,6 +6,7 @@ For MVP: Uses in-memory pub/sub with asyncio.
 Production: Can be extended to use Redis pub/sub, Kafka, or AWS SQS.
 """
 import asyncio
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Dict, List, Callable, Any, Optional
 from dataclasses import dataclass, field
@@ -35,10 +36,16 @@ class EventType(str, Enum):
     CLEANER_STATUS_CHANGED = "cleaner.status_changed"
     CLEANER_OFFLINE_ALERT = "cleaner.offline_alert"  # Cleaner offline with active job
 
+    # Payment events
+    PAYMENT_CONFIRMED = "payment.confirmed"
+
     # Dashboard events
     STATS_UPDATED = "stats.updated"
     ADMIN_ALERT = "admin.alert"  # General admin alerts
 
+    # Internal events, stored in the outbox but never published
+    DEADLINE_SCHEDULED = "deadline.scheduled"  # Deadline forwarded to the leader
+
 
 @dataclass
 class Event:
@@ -78,6 +85,9 @@ class EventPublisher:
     """
     
     _instance: Optional['EventPublisher'] = None
+
+    # Number of recent event IDs remembered for duplicate suppression
+    DEDUP_WINDOW_SIZE = 10000
     
     def __new__(cls):
         """Singleton pattern for global event publisher."""
@@ -93,6 +103,7 @@ class EventPublisher:
         self._subscribers: Dict[EventType, List[Callable]] = {}
         self._global_subscribers: List[Callable] = []
         self._event_queue: asyncio.Queue = asyncio.Queue()
+        self._seen_event_ids: "OrderedDict[str, None]" = OrderedDict()
         self._running = False
         self._initialized = True
     
@@ -123,15 +134,42 @@ class EventPublisher:
         except ValueError:
             pass
     
-    async def publish(self, event_type: EventType, payload: Dict[str, Any]) -> Event:
-        """Publish an event to all subscribers."""
+    def _is_duplicate(self, event_id: str) -> bool:
+        """Record an event ID and report whether it was already delivered."""
+        if event_id in self._seen_event_ids:
+            return True
+        self._seen_event_ids[event_id] = None
+        if len(self._seen_event_ids) > self.DEDUP_WINDOW_SIZE:
+            self._seen_event_ids.popitem(last=False)
+        return False
+    
+    async def publish(
+        self,
+        event_type: EventType,
+        payload: Dict[str, Any],
+        event_id: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Optional[Event]:
+        """
+        Publish an event to all subscribers.
+
+        Events relayed from the outbox carry their original event_id and
+        timestamp. Delivery is at-least-once, so an event_id that was
+        already delivered is dropped and None is returned.
+        """
         import uuid
         
+        if event_id and self._is_duplicate(event_id):
+            logger.debug(f"Skipping duplicate event: {event_type.value} - {event_id}")
+            return None
+        
         event = Event(
             type=event_type,
             payload=payload,
-            event_id=str(uuid.uuid4())
+            event_id=event_id or str(uuid.uuid4())
         )
+        if timestamp:
+            event.timestamp = timestamp
         
         logger.info(f"Publishing event: {event_type.value} - {event.event_id}")
         
@@ -0,0 +1,313 @@
+"""
+Idempotency Keys
+
+Clients send X-Idempotency-Key on write requests they may retry. The
+first request with a key claims it by inserting an idempotency_keys row
+(user, scope, key), runs, and stores its response on the row. Later
+requests with the same key:
+- get the stored response back (with Idempotent-Replayed: true) without
+  running the handler again, for KEY_TTL after the first request
+- wait up to LOCK_WAIT_SECONDS while the first request is still running,
+  then replay its response, or get 409 if it has not finished
+- get 422 if the request body differs from the one the key was first
+  used with
+
+Handlers that commit their state change and then do more work call
+stage_completion() before that commit: the key is marked completed in the
+same transaction, so a retry after the commit replays instead of applying
+the change twice, even if the handler fails afterwards.
+
+A handler that raises releases the key, unless it already committed the
+key completed, so the client can retry after fixing the request. A key
+whose request died mid-flight (worker crash) is taken over after
+LOCK_TIMEOUT.
+
+Usage:
+    return await run_idempotent(
+        db, current_user.id, "POST /bookings/", x_idempotency_key, data,
+        lambda: _create_booking(data, current_user, db)
+    )
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import BadRequestException, ConflictException, ValidationException
+from app.core.responses import dumps
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+# How long a completed key replays its response
+KEY_TTL = timedelta(hours=24)
+
+# An in-progress key older than this belongs to a request that died
+LOCK_TIMEOUT = timedelta(seconds=60)
+
+# How long a concurrent duplicate waits for the first request to finish
+LOCK_WAIT_SECONDS = 10
+LOCK_POLL_SECONDS = 0.2
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Session.info entry holding the key of the handler run_idempotent is running
+_RUNNING_KEY = "idempotency_key"
+
+
+def request_fingerprint(request: Any) -> str:
+    """SHA-256 of the request body in canonical JSON."""
+    if isinstance(request, BaseModel):
+        request = request.model_dump(mode="json")
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _serialize(result: Any) -> str:
+    if isinstance(result, BaseModel):
+        return result.model_dump_json()
+    return dumps(result).decode()
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.response_status,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def find_key(db: Session, user_id: int, scope: str, key: str) -> Optional[IdempotencyKey]:
+    """Unexpired key row, if any."""
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at > datetime.now(timezone.utc)
+    ).first()
+
+
+def record_completed_key(db: Session, user_id: int, scope: str, key: str) -> None:
+    """
+    Add a completed key row to the caller's transaction.
+
+    For operations whose result is the state change itself: the key
+    commits (or rolls back) together with it, and a concurrent duplicate
+    fails the commit on the unique constraint.
+    """
+    now = datetime.now(timezone.utc)
+    db.add(IdempotencyKey(
+        user_id=user_id,
+        scope=scope,
+        key=key,
+        request_hash=request_fingerprint(scope),
+        status=COMPLETED,
+        locked_at=now,
+        expires_at=now + KEY_TTL
+    ))
+
+
+def _complete_key(db: Session, user_id: int, scope: str, key: str, status_code: int, result: Any) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        )
+        .values(status=COMPLETED, response_status=status_code, response_body=_serialize(result))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def stage_completion(db: Session, response: Any) -> None:
+    """
+    Mark the running request's key completed in the caller's transaction.
+
+    Call before committing the handler's state change. Retries replay
+    response until the handler returns, when its return value replaces
+    it. Does nothing outside run_idempotent or without a key.
+    """
+    running = db.info.get(_RUNNING_KEY)
+    if running is not None:
+        _complete_key(db, *running, response)
+
+
+def _insert_key(db: Session, values: dict) -> bool:
+    """Insert a key row unless (user, scope, key) exists. Returns whether it did."""
+    if db.bind.dialect.name == "postgresql":
+        inserted = db.execute(
+            pg_insert(IdempotencyKey).values(**values)
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_user_scope_key")
+            .returning(IdempotencyKey.id)
+        ).first()
+        db.commit()
+        return inserted is not None
+
+    exists = db.query(IdempotencyKey.id).filter(
+        IdempotencyKey.user_id == values["user_id"],
+        IdempotencyKey.scope == values["scope"],
+        IdempotencyKey.key == values["key"]
+    ).first()
+    if exists:
+        return False
+    try:
+        db.add(IdempotencyKey(**values))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _take_over(db: Session, values: dict) -> bool:
+    """
+    Reclaim the key if it expired or its request was abandoned.
+
+    The conditions are checked in the UPDATE itself, so only one of
+    several contenders wins.
+    """
+    now = values["locked_at"]
+    claimed = db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.user_id == values["user_id"],
+            IdempotencyKey.scope == values["scope"],
+            IdempotencyKey.key == values["key"],
+            or_(
+                IdempotencyKey.expires_at <= now,
+                and_(IdempotencyKey.status == IN_PROGRESS, IdempotencyKey.locked_at < now - LOCK_TIMEOUT)
+            )
+        )
+        .values(
+            request_hash=values["request_hash"],
+            status=IN_PROGRESS,
+            response_status=None,
+            response_body=None,
+            locked_at=now,
+            expires_at=values["expires_at"]
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+
+async def run_idempotent(
+    db: Session,
+    user_id: int,
+    scope: str,
+    key: Optional[str],
+    request: Any,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = 200
+) -> Any:
+    """
+    Run handler once per (user, scope, key) and replay its response.
+
+    Without a key the handler simply runs. handler returns the endpoint's
+    response (a Pydantic model or JSON-serializable value).
+    """
+    if not key:
+        return await handler()
+    if len(key) > MAX_KEY_LENGTH:
+        raise BadRequestException(
+            f"Idempotency key must be at most {MAX_KEY_LENGTH} characters",
+            "INVALID_IDEMPOTENCY_KEY"
+        )
+
+    request_hash = request_fingerprint(request)
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+
+    while True:
+        now = datetime.now(timezone.utc)
+        values = {
+            "user_id": user_id,
+            "scope": scope,
+            "key": key,
+            "request_hash": request_hash,
+            "status": IN_PROGRESS,
+            "locked_at": now,
+            "expires_at": now + KEY_TTL,
+        }
+        if _insert_key(db, values) or _take_over(db, values):
+            break
+
+        record = db.query(IdempotencyKey).populate_existing().filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        ).first()
+        if record is None:
+            # Released between our insert and read; try again
+            continue
+
+        if record.request_hash != request_hash:
+            raise ValidationException(
+                "Idempotency key was already used with a different request",
+                "IDEMPOTENCY_KEY_REUSED"
+            )
+
+        if record.status == COMPLETED:
+            logger.info(f"Replaying idempotent response for {scope} {key}")
+            return _replay(record)
+
+        if time.monotonic() >= deadline:
+            raise ConflictException(
+                "A request with this idempotency key is still being processed",
+                "IDEMPOTENCY_KEY_IN_USE"
+            )
+        db.rollback()
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+
+    db.info[_RUNNING_KEY] = (user_id, scope, key, status_code)
+    try:
+        result = await handler()
+    except Exception:
+        db.rollback()
+        # A key the handler committed completed stays; its change is done
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == IN_PROGRESS
+        ).delete(synchronize_session=False)
+        db.commit()
+        raise
+    finally:
+        db.info.pop(_RUNNING_KEY, None)
+
+    _complete_key(db, user_id, scope, key, status_code, result)
+    db.commit()
+    return result
+
+
+def purge_expired_keys(db: Session, batch_size: int = 1000) -> int:
+    """Delete up to batch_size expired keys. Returns the number deleted."""
+    expired_ids = [
+        row.id for row in db.query(IdempotencyKey.id).filter(
+            IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+        ).limit(batch_size)
+    ]
+    if not expired_ids:
+        return 0
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.id.in_(expired_ids)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return len(expired_ids)
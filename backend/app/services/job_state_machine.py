@@ -5,25 +5,36 @@ Implements the job lifecycle state machine with:
 - Valid transition definitions
 - Pre-transition validations
 - Post-transition actions
+- Compare-and-set transitions (conditional UPDATE ... RETURNING)
 - Optimistic locking for concurrency control
-- Audit logging
+- Audit logging (batched; durable for critical transitions)
+- Transactional outbox for events (written in the same commit as the change)
 """
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, case, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 import json
+import logging
 
 from app.models import (
     Booking, BookingStatus, BookingStatusHistory,
     CleanerProfile, CleanerStatus,
-    AuditLog, User
+    User
 )
 from app.core.exceptions import (
     BadRequestException, ForbiddenException, NotFoundException
 )
-from app.services.events import event_publisher, EventType
+from app.services.events import EventType
 from app.services.cache import cache_service
+from app.services.outbox import enqueue_event, outbox_relay
+from app.services.idempotency import find_key, record_completed_key
+from app.services.audit_writer import audit_writer
+from app.services.cleaner_assignment import get_job_regions, get_region_from_city
+from app.services.sla_monitor import schedule_sla_deadline, schedule_sla_recheck, schedule_cooldown_release
+
+logger = logging.getLogger(__name__)
 
 
 class ConcurrentModificationError(Exception):
@@ -91,6 +102,32 @@ class JobStateMachine:
     
     # Cooldown duration after completing a job
     COOLDOWN_DURATION_MINUTES = 15
+
+    # Admin bulk operations: target status -> statuses a job can be moved from
+    BULK_TRANSITIONS: Dict[BookingStatus, List[BookingStatus]] = {
+        BookingStatus.CANCELLED: [
+            BookingStatus.PENDING,
+            BookingStatus.PENDING_ASSIGNMENT,
+            BookingStatus.CONFIRMED,
+            BookingStatus.ASSIGNED,
+            BookingStatus.IN_PROGRESS,
+            BookingStatus.PAUSED,
+        ],
+        # Unassign for reassignment; also requeues failed jobs
+        BookingStatus.PENDING_ASSIGNMENT: [
+            BookingStatus.ASSIGNED,
+            BookingStatus.FAILED,
+        ],
+    }
+
+    # Statuses in which a job holds its cleaner
+    ACTIVE_STATUSES = [BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED]
+
+    # Jobs per bulk transaction, keeping row locks short
+    BULK_CHUNK_SIZE = 500
+
+    # Transitions whose audit entry is written in the transaction, not batched
+    DURABLE_AUDIT_STATUSES = [BookingStatus.CANCELLED, BookingStatus.FAILED, BookingStatus.REFUNDED]
     
     def __init__(self, db: Session):
         self.db = db
@@ -103,6 +140,13 @@ class JobStateMachine:
         """Check if a transition is valid."""
         allowed = self.VALID_TRANSITIONS.get(current_status, [])
         return new_status in allowed
+
+    def _statuses_allowing(self, new_status: BookingStatus) -> List[BookingStatus]:
+        """Statuses a job can move to new_status from."""
+        return [
+            status for status, allowed in self.VALID_TRANSITIONS.items()
+            if new_status in allowed
+        ]
     
     def transition(
         self,
@@ -111,10 +155,15 @@ class JobStateMachine:
         actor: User,
         expected_version: Optional[int] = None,
         reason: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        changes: Optional[Dict[str, Any]] = None
     ) -> Booking:
         """
-        Execute a state transition with optimistic locking.
+        Execute a state transition as one conditional UPDATE ... RETURNING.
+
+        Concurrent transitions of the same job cannot both apply: the
+        second matches no row and gets the same error it would have got
+        had it run afterwards.
         
         Args:
             job_id: The booking/job ID
@@ -122,7 +171,9 @@ class JobStateMachine:
             actor: User performing the action
             expected_version: Expected version for optimistic locking
             reason: Reason for the transition
-            metadata: Additional context (idempotency key, etc.)
+            metadata: Additional context; an "idempotency_key" makes retries
+                of a committed transition return the job unchanged
+            changes: Other columns to set in the same UPDATE
             
         Returns:
             Updated Booking object
@@ -131,41 +182,42 @@ class JobStateMachine:
             NotFoundException: Job not found
             InvalidTransitionError: Transition not allowed
             ConcurrentModificationError: Version mismatch
+            ForbiddenException, BadRequestException: Pre-transition validation failed
         """
-        # Fetch the job
-        job = self.db.query(Booking).filter(Booking.id == job_id).first()
-        if not job:
-            raise NotFoundException(f"Job {job_id} not found")
-        
-        current_status = job.status
-        
-        # Validate transition
-        if not self.can_transition(current_status, new_status):
-            raise InvalidTransitionError(current_status.value, new_status.value)
-        
-        # Optimistic locking check
-        if expected_version is not None and job.version != expected_version:
-            raise ConcurrentModificationError(
-                f"Job was modified. Expected version {expected_version}, got {job.version}"
-            )
-        
-        # Run pre-transition validations
-        self._validate_transition(job, new_status, actor)
-        
+        now = datetime.now(timezone.utc)
+
+        # A retry of a transition that already committed returns the job as is
+        idempotency_key = (metadata or {}).get("idempotency_key")
+        idempotency_scope = f"job:{job_id}:{new_status.value}"
+        if idempotency_key and find_key(self.db, actor.id, idempotency_scope, idempotency_key):
+            job = self.db.query(Booking).filter(Booking.id == job_id).first()
+            if job:
+                return job
+
+        criteria = [
+            Booking.status.in_(self._statuses_allowing(new_status)),
+            *self._transition_guards(new_status, actor, now),
+        ]
+        if expected_version is not None:
+            criteria.append(Booking.version == expected_version)
+
+        values = self._transition_values(new_status, actor, reason, now)
+        values.update(changes or {})
+
+        row = self._compare_and_set(job_id, criteria, values)
+        if row is None:
+            self._raise_transition_failure(job_id, new_status, actor, expected_version)
+        job, current_status = row
+
         # Capture previous state for audit
         previous_state = {
             "status": current_status.value,
-            "version": job.version,
+            "version": job.version - 1,
         }
-        
-        # Execute transition actions
+
+        # Execute transition side effects
         self._execute_transition_actions(job, current_status, new_status, actor, reason)
         
-        # Update status and version
-        job.status = new_status
-        job.version += 1
-        job.updated_at = datetime.now(timezone.utc)
-        
         # Create status history record
         history = BookingStatusHistory(
             booking_id=job.id,
@@ -189,27 +241,253 @@ class JobStateMachine:
             previous_state=previous_state,
             new_state=new_state,
             reason=reason,
-            metadata=metadata
+            metadata=metadata,
+            durable=new_status in self.DURABLE_AUDIT_STATUSES
         )
+
+        # Stage the transition event in the outbox (same transaction)
+        self._enqueue_transition_event(job, current_status, new_status, actor)
+
+        # Record the key with the transition so a retry cannot apply it twice
+        if idempotency_key:
+            record_completed_key(self.db, actor.id, idempotency_scope, idempotency_key)
         
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent request with the same key committed first
+            self.db.rollback()
+            if not (idempotency_key and find_key(self.db, actor.id, idempotency_scope, idempotency_key)):
+                raise
+            return self.db.query(Booking).filter(Booking.id == job_id).first()
         self.db.refresh(job)
 
-        # Publish event for the transition (async in background)
-        self._publish_transition_event(job, current_status, new_status, actor)
+        # Let the relay deliver now rather than on its next tick
+        outbox_relay.notify()
+
+        # Arm the timed checks this transition started
+        if new_status == BookingStatus.ASSIGNED:
+            schedule_sla_deadline(job)
+        elif new_status == BookingStatus.COMPLETED and job.cleaner_id:
+            schedule_cooldown_release(
+                job.cleaner_id,
+                datetime.now(timezone.utc) + timedelta(minutes=self.COOLDOWN_DURATION_MINUTES)
+            )
+
+        # A job past its start deadline may have an open SLA alert to update or resolve
+        if new_status != BookingStatus.ASSIGNED:
+            schedule_sla_recheck(job)
 
         return job
 
-    def _publish_transition_event(
+    def bulk_transition(
+        self,
+        new_status: BookingStatus,
+        actor: User,
+        job_ids: Optional[List[int]] = None,
+        filters: Optional[List[Any]] = None,
+        reason: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Move many jobs to new_status (a BULK_TRANSITIONS target) at once.
+
+        Jobs are selected by job_ids and/or filters (Booking column
+        conditions). Each chunk of at most BULK_CHUNK_SIZE jobs is one
+        transaction: one conditional UPDATE per previous status, one
+        multi-row INSERT each into the status history and audit log, one
+        UPDATE releasing cleaners left without an active job, and one
+        aggregated event for the chunk. A job whose status changed after
+        it was selected is skipped.
+
+        Returns {"updated": [job ids], "skipped": [{"job_id", "status", "reason"}]}.
+        """
+        allowed = self.BULK_TRANSITIONS.get(new_status)
+        if allowed is None:
+            raise BadRequestException(
+                f"Bulk transition to {new_status.value} is not supported",
+                "BULK_TRANSITION_NOT_SUPPORTED"
+            )
+
+        query = select(Booking.id, Booking.status, Booking.cleaner_id).order_by(Booking.id)
+        if job_ids is not None:
+            query = query.where(Booking.id.in_(job_ids))
+        for condition in filters or []:
+            query = query.where(condition)
+        candidates = self.db.execute(query).all()
+
+        skipped = []
+        if job_ids is not None:
+            found = {row.id for row in candidates}
+            skipped.extend(
+                {"job_id": job_id, "status": None, "reason": "not_found"}
+                for job_id in sorted(set(job_ids) - found)
+            )
+        eligible = []
+        for row in candidates:
+            if row.status in allowed:
+                eligible.append(row)
+            elif job_ids is not None:
+                skipped.append({"job_id": row.id, "status": row.status.value, "reason": "invalid_transition"})
+
+        updated = []
+        for start in range(0, len(eligible), self.BULK_CHUNK_SIZE):
+            chunk = eligible[start:start + self.BULK_CHUNK_SIZE]
+            moved = self._bulk_transition_chunk(chunk, new_status, actor, reason)
+            moved_ids = {row.id for row in moved}
+            updated.extend(row.id for row in moved)
+            skipped.extend(
+                {"job_id": row.id, "status": row.status.value, "reason": "modified"}
+                for row in chunk if row.id not in moved_ids
+            )
+
+        return {"updated": updated, "skipped": skipped}
+
+    def _bulk_transition_chunk(
+        self,
+        chunk: List[Any],
+        new_status: BookingStatus,
+        actor: User,
+        reason: Optional[str]
+    ) -> List[Any]:
+        """Apply one chunk of a bulk transition and commit it. Returns the moved rows."""
+        now = datetime.now(timezone.utc)
+        values = self._transition_values(new_status, actor, reason, now)
+        if new_status == BookingStatus.PENDING_ASSIGNMENT:
+            values.update(cleaner_id=None, assigned_employee_id=None, assigned_at=None, sla_deadline=None)
+
+        by_status: Dict[BookingStatus, List[int]] = {}
+        for row in chunk:
+            by_status.setdefault(row.status, []).append(row.id)
+
+        # Conditional on the status each job was read with, so the
+        # previous status recorded below is exact
+        moved = []
+        previous_statuses: Dict[int, BookingStatus] = {}
+        for previous_status, ids in by_status.items():
+            rows = self.db.execute(
+                update(Booking)
+                .where(Booking.id.in_(ids), Booking.status == previous_status)
+                .values(**values)
+                .returning(
+                    Booking.id, Booking.booking_number, Booking.customer_id,
+                    Booking.version, Booking.sla_deadline
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            moved.extend(rows)
+            previous_statuses.update((row.id, previous_status) for row in rows)
+
+        if not moved:
+            self.db.rollback()
+            return []
+
+        history_reason = reason or f"Bulk status change to {new_status.value}"
+        self.db.execute(insert(BookingStatusHistory), [
+            {
+                "booking_id": row.id,
+                "previous_status": previous_statuses[row.id],
+                "new_status": new_status,
+                "changed_by_id": actor.id,
+                "reason": history_reason,
+            }
+            for row in moved
+        ])
+        # Admin bulk operations are audited with the change
+        audit_writer.add_many(self.db, [
+            {
+                "entity_type": "booking",
+                "entity_id": row.id,
+                "action": f"status_change_{new_status.value}",
+                "user_id": actor.id,
+                "actor_type": actor.role.value if actor.role else "user",
+                "previous_state": json.dumps({"status": previous_statuses[row.id].value, "version": row.version - 1}),
+                "new_state": json.dumps({"status": new_status.value, "version": row.version}),
+                "reason": reason,
+                "extra_data": json.dumps({"bulk": True}),
+            }
+            for row in moved
+        ], durable=True)
+
+        # Release cleaners of moved active jobs unless they hold another one
+        cleaner_ids = sorted({
+            row.cleaner_id for row in chunk
+            if row.cleaner_id and row.id in previous_statuses and row.status in self.ACTIVE_STATUSES
+        })
+        released = []
+        if cleaner_ids:
+            other_active_job = select(Booking.id).where(
+                Booking.cleaner_id == CleanerProfile.user_id,
+                Booking.status.in_(self.ACTIVE_STATUSES)
+            ).exists()
+            released = self.db.execute(
+                update(CleanerProfile)
+                .where(
+                    CleanerProfile.user_id.in_(cleaner_ids),
+                    CleanerProfile.status == CleanerStatus.BUSY,
+                    ~other_active_job
+                )
+                .values(
+                    status=CleanerStatus.AVAILABLE,
+                    cooldown_expires_at=None,
+                    active_job_count=0,
+                    updated_at=now
+                )
+                .returning(CleanerProfile.user_id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+        if released:
+            enqueue_event(self.db, EventType.CLEANER_STATUS_CHANGED, {
+                "cleaner_ids": released,
+                "count": len(released),
+                "status": CleanerStatus.AVAILABLE.value,
+                "previous_status": CleanerStatus.BUSY.value,
+                "reason": f"bulk_{new_status.value}",
+            })
+
+        counts: Dict[str, int] = {}
+        for previous_status in previous_statuses.values():
+            counts[previous_status.value] = counts.get(previous_status.value, 0) + 1
+        # Cleaners as read with the chunk; unassigning clears the column
+        cleaners = {row.id: row.cleaner_id for row in chunk}
+        regions = get_job_regions(self.db, [row.id for row in moved])
+        payload = {
+            "status": new_status.value,
+            "previous_statuses": counts,
+            "count": len(moved),
+            "job_ids": [row.id for row in moved],
+            "booking_numbers": [row.booking_number for row in moved],
+            "participants": [
+                {"job_id": row.id, "cleaner_id": cleaners[row.id], "customer_id": row.customer_id}
+                for row in moved
+            ],
+            "regions": sorted({region for region in regions.values() if region}),
+            "changed_by_id": actor.id,
+            "reason": reason,
+            "bulk": True,
+        }
+        if new_status == BookingStatus.CANCELLED:
+            enqueue_event(self.db, EventType.JOB_CANCELLED, payload)
+        else:
+            enqueue_event(self.db, EventType.JOB_ASSIGNED, {**payload, "cleaner_id": None, "action": "unassigned"})
+
+        self.db.commit()
+        outbox_relay.notify()
+        logger.info(f"Bulk transition to {new_status.value}: {len(moved)} jobs by user {actor.id}")
+
+        # Jobs past their start deadline may have an open SLA alert to resolve
+        for row in moved:
+            schedule_sla_recheck(row)
+
+        return moved
+
+    def _enqueue_transition_event(
         self,
         job: Booking,
         old_status: BookingStatus,
         new_status: BookingStatus,
         actor: User
     ) -> None:
-        """Publish event for state transition (fire-and-forget)."""
-        import asyncio
-
+        """Write the event for a state transition to the outbox."""
         event_type_map = {
             BookingStatus.ASSIGNED: EventType.JOB_ASSIGNED,
             BookingStatus.IN_PROGRESS: EventType.JOB_STARTED if old_status == BookingStatus.ASSIGNED else EventType.JOB_RESUMED,
@@ -235,6 +513,7 @@ class JobStateMachine:
             "cleaner_id": job.cleaner_id,
             "cleaner_name": cleaner_name,
             "customer_id": job.customer_id,
+            "region": get_region_from_city(job.address.city) if job.address else None,
         }
 
         # Add status-specific data
@@ -250,16 +529,7 @@ class JobStateMachine:
         elif new_status == BookingStatus.CANCELLED:
             payload["cancellation_reason"] = job.cancellation_reason
 
-        # Fire-and-forget event publishing
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(event_publisher.publish(event_type, payload))
-            else:
-                loop.run_until_complete(event_publisher.publish(event_type, payload))
-        except RuntimeError:
-            # No event loop, create one
-            asyncio.run(event_publisher.publish(event_type, payload))
+        enqueue_event(self.db, event_type, payload)
     
     def _validate_transition(
         self,
@@ -284,6 +554,144 @@ class JobStateMachine:
                     raise BadRequestException(
                         f"Job was paused for more than {self.MAX_PAUSE_DURATION_MINUTES} minutes"
                     )
+
+    def _transition_guards(
+        self,
+        new_status: BookingStatus,
+        actor: User,
+        now: datetime
+    ) -> List[Any]:
+        """The checks in _validate_transition as UPDATE conditions."""
+        guards = []
+        if new_status == BookingStatus.IN_PROGRESS:
+            if actor.role.value == "cleaner":
+                guards.append(Booking.cleaner_id == actor.id)
+            guards.append(or_(
+                Booking.status != BookingStatus.PAUSED,
+                Booking.paused_at == None,
+                Booking.paused_at >= now - timedelta(minutes=self.MAX_PAUSE_DURATION_MINUTES)
+            ))
+        return guards
+
+    def _compare_and_set(
+        self,
+        job_id: int,
+        criteria: List[Any],
+        values: Dict[str, Any]
+    ) -> Optional[Tuple[Booking, BookingStatus]]:
+        """
+        Apply values to the job if it matches criteria, in one UPDATE.
+
+        Returns the updated job and the status it had, or None if the job
+        does not exist or no longer matches.
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            # The locked sub-select yields the pre-update status to RETURNING
+            previous = (
+                select(Booking.id, Booking.status)
+                .where(Booking.id == job_id)
+                .with_for_update()
+                .subquery("previous")
+            )
+            return self.db.execute(
+                update(Booking)
+                .where(Booking.id == previous.c.id, *criteria)
+                .values(**values)
+                .returning(Booking, previous.c.status)
+                .execution_options(synchronize_session="fetch")
+            ).first()
+
+        # RETURNING only sees the target table here: read the status first
+        # and make the UPDATE conditional on it not having changed
+        current_status = self.db.query(Booking.status).filter(Booking.id == job_id).scalar()
+        if current_status is None:
+            return None
+        job = self.db.execute(
+            update(Booking)
+            .where(Booking.id == job_id, Booking.status == current_status, *criteria)
+            .values(**values)
+            .returning(Booking)
+            .execution_options(synchronize_session="fetch")
+        ).scalar()
+        return (job, current_status) if job else None
+
+    def _raise_transition_failure(
+        self,
+        job_id: int,
+        new_status: BookingStatus,
+        actor: User,
+        expected_version: Optional[int]
+    ) -> None:
+        """Raise the error for a transition whose UPDATE matched no row."""
+        # End the transaction so the row lock taken by the UPDATE is released
+        self.db.rollback()
+
+        job = self.db.query(Booking).populate_existing().filter(Booking.id == job_id).first()
+        if not job:
+            raise NotFoundException(f"Job {job_id} not found")
+
+        if not self.can_transition(job.status, new_status):
+            raise InvalidTransitionError(job.status.value, new_status.value)
+
+        if expected_version is not None and job.version != expected_version:
+            raise ConcurrentModificationError(
+                f"Job was modified. Expected version {expected_version}, got {job.version}"
+            )
+
+        self._validate_transition(job, new_status, actor)
+
+        # The job changed between the UPDATE and this read
+        raise ConcurrentModificationError()
+
+    def _transition_values(
+        self,
+        new_status: BookingStatus,
+        actor: User,
+        reason: Optional[str],
+        now: datetime
+    ) -> Dict[str, Any]:
+        """Columns a transition sets; expressions see the row before the update."""
+        values: Dict[str, Any] = {
+            "status": new_status,
+            "version": Booking.version + 1,
+            "updated_at": now,
+        }
+
+        # PENDING_ASSIGNMENT -> ASSIGNED
+        if new_status == BookingStatus.ASSIGNED:
+            values["assigned_at"] = now
+
+        # ASSIGNED -> IN_PROGRESS (start) or PAUSED -> IN_PROGRESS (resume)
+        elif new_status == BookingStatus.IN_PROGRESS:
+            values["actual_start_time"] = case(
+                (Booking.status == BookingStatus.ASSIGNED, now),
+                else_=Booking.actual_start_time
+            )
+            values["resumed_at"] = case(
+                (Booking.status == BookingStatus.PAUSED, now),
+                else_=Booking.resumed_at
+            )
+
+        # IN_PROGRESS -> PAUSED
+        elif new_status == BookingStatus.PAUSED:
+            values["paused_at"] = now
+
+        # IN_PROGRESS -> COMPLETED
+        elif new_status == BookingStatus.COMPLETED:
+            values["actual_end_time"] = now
+
+        # IN_PROGRESS -> FAILED
+        elif new_status == BookingStatus.FAILED:
+            values["failed_at"] = now
+            values["failure_reason"] = reason
+
+        # ANY -> CANCELLED
+        elif new_status == BookingStatus.CANCELLED:
+            values["cancelled_at"] = now
+            values["cancelled_by_id"] = actor.id
+            values["cancellation_reason"] = reason
+
+        return values
     
     def _execute_transition_actions(
         self,
@@ -293,33 +701,17 @@ class JobStateMachine:
         actor: User,
         reason: Optional[str]
     ) -> None:
-        """Execute side effects for the transition."""
-        now = datetime.now(timezone.utc)
-        
+        """Execute side effects for the transition (job is the updated row)."""
         # PENDING_ASSIGNMENT -> ASSIGNED
         if new_status == BookingStatus.ASSIGNED:
-            job.assigned_at = now
             job.sla_deadline = job.scheduled_date + timedelta(minutes=self.SLA_START_THRESHOLD_MINUTES)
             
             # Update cleaner status
             if job.cleaner_id:
                 self._update_cleaner_status(job.cleaner_id, CleanerStatus.BUSY)
         
-        # ASSIGNED -> IN_PROGRESS
-        elif new_status == BookingStatus.IN_PROGRESS:
-            if old_status == BookingStatus.ASSIGNED:
-                job.actual_start_time = now
-            elif old_status == BookingStatus.PAUSED:
-                job.resumed_at = now
-        
-        # IN_PROGRESS -> PAUSED
-        elif new_status == BookingStatus.PAUSED:
-            job.paused_at = now
-        
         # IN_PROGRESS -> COMPLETED
         elif new_status == BookingStatus.COMPLETED:
-            job.actual_end_time = now
-
             # Update cleaner to cooling down
             if job.cleaner_id:
                 self._update_cleaner_status(
@@ -334,9 +726,6 @@ class JobStateMachine:
         
         # IN_PROGRESS -> FAILED
         elif new_status == BookingStatus.FAILED:
-            job.failed_at = now
-            job.failure_reason = reason
-            
             # Release cleaner
             if job.cleaner_id:
                 self._update_cleaner_status(job.cleaner_id, CleanerStatus.AVAILABLE)
@@ -344,10 +733,6 @@ class JobStateMachine:
         
         # ANY -> CANCELLED
         elif new_status == BookingStatus.CANCELLED:
-            job.cancelled_at = now
-            job.cancelled_by_id = actor.id
-            job.cancellation_reason = reason
-            
             # Release cleaner if assigned
             if job.cleaner_id and old_status in [
                 BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED
@@ -390,24 +775,16 @@ class JobStateMachine:
             except RuntimeError:
                 asyncio.run(cache_service.set_cleaner_status(cleaner_id, status.value))
 
-            # Publish cleaner status change event
+            # Stage cleaner status change event (committed with the transition)
             if old_status != status:
                 cleaner = self.db.query(User).filter(User.id == cleaner_id).first()
                 cleaner_name = cleaner.full_name if cleaner else "Unknown"
-                payload = {
+                enqueue_event(self.db, EventType.CLEANER_STATUS_CHANGED, {
                     "cleaner_id": cleaner_id,
                     "cleaner_name": cleaner_name,
                     "status": status.value,
                     "previous_status": old_status.value if old_status else None,
-                }
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        asyncio.create_task(event_publisher.publish(EventType.CLEANER_STATUS_CHANGED, payload))
-                    else:
-                        loop.run_until_complete(event_publisher.publish(EventType.CLEANER_STATUS_CHANGED, payload))
-                except RuntimeError:
-                    asyncio.run(event_publisher.publish(EventType.CLEANER_STATUS_CHANGED, payload))
+                })
     
     def _increment_cleaner_stats(self, cleaner_id: int, completed: bool) -> None:
         """Increment cleaner job statistics."""
@@ -512,21 +889,21 @@ class JobStateMachine:
         previous_state: Dict,
         new_state: Dict,
         reason: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        durable: bool = False
     ) -> None:
-        """Create an audit log entry."""
-        audit = AuditLog(
-            entity_type=entity_type,
-            entity_id=entity_id,
-            action=action,
-            user_id=actor.id,
-            actor_type=actor.role.value if actor.role else "user",
-            previous_state=json.dumps(previous_state),
-            new_state=json.dumps(new_state),
-            reason=reason,
-            extra_data=json.dumps(metadata) if metadata else None
-        )
-        self.db.add(audit)
+        """Create an audit log entry (written with the transaction if durable)."""
+        audit_writer.add(self.db, {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "user_id": actor.id,
+            "actor_type": actor.role.value if actor.role else "user",
+            "previous_state": json.dumps(previous_state),
+            "new_state": json.dumps(new_state),
+            "reason": reason,
+            "extra_data": json.dumps(metadata) if metadata else None,
+        }, durable=durable)
     
     def _get_default_reason(
         self,
@@ -640,13 +1017,11 @@ class JobStateMachine:
         if cleaner_profile and cleaner_profile.status != CleanerStatus.AVAILABLE:
             raise BadRequestException(f"Cleaner is not available (status: {cleaner_profile.status.value})")
         
-        # Update job with cleaner
-        job.cleaner_id = cleaner_id
-        
-        # Transition to ASSIGNED
+        # Transition to ASSIGNED, setting the cleaner in the same UPDATE
         return self.transition(
             job_id=job_id,
             new_status=BookingStatus.ASSIGNED,
             actor=admin,
-            reason=f"Cleaner assigned by admin"
+            reason=f"Cleaner assigned by admin",
+            changes={"cleaner_id": cleaner_id}
         )
@@ -0,0 +1,169 @@
+"""
+Leader Election
+
+Makes sure singleton background work (SLA deadlines, payment timeouts,
+offline-cleaner checks) runs in exactly one worker process.
+
+The leader holds a session-level Postgres advisory lock on a dedicated
+connection. If that worker dies or loses its connection, Postgres releases
+the lock and the next worker to retry takes over. Each takeover bumps the
+epoch in leader_leases; the epoch is the leader's fencing token, checked
+inside the same transaction as leader-only writes so a deposed leader
+cannot commit after a new one has taken over.
+
+On databases without advisory locks (SQLite in local development) every
+process is its own leader.
+"""
+import logging
+import os
+import socket
+import zlib
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class LeadershipLostError(Exception):
+    """Raised when a fencing check finds that another worker has taken over."""
+    pass
+
+
+class LeaderElector:
+    """
+    Advisory-lock leader election for one named role.
+
+    Usage:
+        elector = LeaderElector("background-tasks")
+        if elector.try_acquire():
+            ...  # run leader-only loops, calling elector.renew() periodically
+        elector.check_fencing(db)  # before committing leader-only writes
+    """
+
+    # How often followers retry and the leader re-verifies its lock connection
+    RETRY_INTERVAL_SECONDS = 5
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock_key = zlib.crc32(name.encode())
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.fencing_token: Optional[int] = None
+        self._conn = None
+        self._supported = engine.dialect.name == "postgresql"
+
+    @property
+    def is_leader(self) -> bool:
+        return self.fencing_token is not None
+
+    def try_acquire(self) -> bool:
+        """Try to become leader. Returns True if this process now holds the role."""
+        if self.is_leader:
+            return True
+
+        if not self._supported:
+            self.fencing_token = 0
+            return True
+
+        conn = engine.connect()
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            ).scalar()
+            if not acquired:
+                conn.rollback()
+                conn.close()
+                return False
+
+            token = conn.execute(text("""
+                INSERT INTO leader_leases (name, holder, epoch, acquired_at, renewed_at)
+                VALUES (:name, :holder, 1, NOW(), NOW())
+                ON CONFLICT (name) DO UPDATE SET
+                    epoch = leader_leases.epoch + 1,
+                    holder = EXCLUDED.holder,
+                    acquired_at = NOW(),
+                    renewed_at = NOW()
+                RETURNING epoch
+            """), {"name": self.name, "holder": self.holder}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+
+        self._conn = conn
+        self.fencing_token = token
+        logger.info(f"Became leader for {self.name} (epoch {token}, {self.holder})")
+        return True
+
+    def renew(self) -> bool:
+        """
+        Confirm the lock connection is alive and the epoch is still ours.
+
+        Steps down and returns False if either check fails.
+        """
+        if not self.is_leader:
+            return False
+        if not self._supported:
+            return True
+
+        try:
+            renewed = self._conn.execute(text("""
+                UPDATE leader_leases SET renewed_at = NOW()
+                WHERE name = :name AND epoch = :epoch
+            """), {"name": self.name, "epoch": self.fencing_token}).rowcount
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"Leader lock connection for {self.name} failed: {e}")
+            renewed = 0
+
+        if renewed != 1:
+            logger.warning(f"Lost leadership for {self.name} (epoch {self.fencing_token})")
+            self.release()
+            return False
+        return True
+
+    def check_fencing(self, db: Session) -> None:
+        """
+        Verify, inside the caller's transaction, that this process is still leader.
+
+        The lease row is read FOR SHARE, so a takeover cannot bump the epoch
+        until the caller's transaction ends. Raises LeadershipLostError.
+        """
+        if not self.is_leader:
+            raise LeadershipLostError(f"Not leader for {self.name}")
+        if not self._supported:
+            return
+
+        epoch = db.execute(
+            text("SELECT epoch FROM leader_leases WHERE name = :name FOR SHARE"),
+            {"name": self.name}
+        ).scalar()
+        if epoch != self.fencing_token:
+            raise LeadershipLostError(
+                f"Leadership for {self.name} moved to epoch {epoch} (ours: {self.fencing_token})"
+            )
+
+    def release(self) -> None:
+        """Give up the role and return the lock connection."""
+        self.fencing_token = None
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+            self._conn.commit()
+        except Exception:
+            # Never return a connection that may still hold the lock to the pool
+            self._conn.invalidate()
+        finally:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+# Election for the background task runner
+background_leader = LeaderElector("background-tasks")
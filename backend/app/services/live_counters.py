@@ -0,0 +1,266 @@
+"""
+Live Dashboard Counters
+
+The realtime dashboard reads its numbers from counters in the
+dashboard:stats cache hash instead of querying the database:
+- active_jobs, pending_assignment: jobs in those status buckets
+- available_cleaners, busy_cleaners: cleaner profiles by status
+- completed:<date>, revenue_cents:<date>: jobs completed per UTC day and
+  their total price in cents (HINCRBY only takes integers)
+- delayed_jobs: open SLA alerts (reconciled only)
+
+Job, payment and cleaner events apply atomic HINCRBY deltas from the
+status and previous_status in their payload. Events without a
+previous_status (JOB_CREATED excepted) say nothing about which bucket a
+job left and are ignored. Bulk events carry a count, or a count per
+previous status in previous_statuses.
+
+A reconciler in the background-tasks leader recomputes every counter
+with one aggregate every RECONCILE_INTERVAL_SECONDS and replaces the
+hash, correcting drift from missed events or deltas that raced the
+previous reconcile. Counters older than MAX_AGE_SECONDS (no leader, cache
+restarted) are treated as missing and rebuilt on the next read.
+
+Every change publishes STATS_UPDATED with the new values; WebSocket
+clients receive them coalesced.
+
+Usage:
+    live_counters.subscribe()                 # once, at startup
+    stats = await live_counters.get(db)       # O(1) unless unseeded
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import BookingStatus, CleanerStatus
+from app.services.cache import cache_service
+from app.services.events import event_publisher, Event, EventType
+from app.services.stats_rollup import compute_realtime_stats
+
+logger = logging.getLogger(__name__)
+
+# Counter bucket for each status; statuses not listed are not counted
+JOB_STATUS_COUNTERS = {
+    BookingStatus.ASSIGNED.value: "active_jobs",
+    BookingStatus.IN_PROGRESS.value: "active_jobs",
+    BookingStatus.PAUSED.value: "active_jobs",
+    BookingStatus.PENDING_ASSIGNMENT.value: "pending_assignment",
+    BookingStatus.CONFIRMED.value: "pending_assignment",
+}
+
+CLEANER_STATUS_COUNTERS = {
+    CleanerStatus.AVAILABLE.value: "available_cleaners",
+    CleanerStatus.BUSY.value: "busy_cleaners",
+}
+
+JOB_EVENTS = (
+    EventType.JOB_CREATED,
+    EventType.JOB_ASSIGNED,
+    EventType.JOB_STARTED,
+    EventType.JOB_PAUSED,
+    EventType.JOB_RESUMED,
+    EventType.JOB_COMPLETED,
+    EventType.JOB_CANCELLED,
+    EventType.JOB_FAILED,
+    EventType.PAYMENT_CONFIRMED,
+)
+
+CLEANER_EVENTS = (
+    EventType.CLEANER_ONLINE,
+    EventType.CLEANER_OFFLINE,
+    EventType.CLEANER_STATUS_CHANGED,
+)
+
+SEEDED_FIELD = "reconciled_at"
+
+
+def _day(timestamp: Optional[str] = None) -> str:
+    """UTC date key for a completion time (ISO string) or today."""
+    if timestamp:
+        try:
+            moment = datetime.fromisoformat(timestamp)
+            if moment.tzinfo:
+                moment = moment.astimezone(timezone.utc)
+            return moment.date().isoformat()
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class LiveCounters:
+    """Dashboard counters kept current by event deltas and periodic reconciles."""
+
+    RECONCILE_INTERVAL_SECONDS = 60
+
+    # Counters not reconciled for this long are rebuilt on read
+    MAX_AGE_SECONDS = 3 * RECONCILE_INTERVAL_SECONDS
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._subscribed = False
+        self.deltas_applied = 0
+        self.events_ignored = 0
+        self.reconciles = 0
+        self.drift_corrections = 0
+
+    def subscribe(self) -> None:
+        """Apply deltas for job, payment and cleaner events. Safe to call more than once."""
+        if self._subscribed:
+            return
+        for event_type in JOB_EVENTS:
+            event_publisher.subscribe(event_type, self._on_job_event)
+        for event_type in CLEANER_EVENTS:
+            event_publisher.subscribe(event_type, self._on_cleaner_event)
+        self._subscribed = True
+
+    # ============ Reads ============
+
+    async def read(self) -> Optional[Dict[str, Any]]:
+        """Current counters as DashboardStats fields, or None if unseeded or stale."""
+        counters = await cache_service.get_dashboard_stats()
+        reconciled_at = counters.get(SEEDED_FIELD)
+        if reconciled_at is None or time.time() - reconciled_at > self.MAX_AGE_SECONDS:
+            return None
+
+        day = _day()
+        return {
+            "active_jobs_count": max(0, counters.get("active_jobs", 0)),
+            "available_cleaners_count": max(0, counters.get("available_cleaners", 0)),
+            "busy_cleaners_count": max(0, counters.get("busy_cleaners", 0)),
+            "delayed_jobs_count": max(0, counters.get("delayed_jobs", 0)),
+            "pending_assignment_count": max(0, counters.get("pending_assignment", 0)),
+            "completed_today_count": max(0, counters.get(f"completed:{day}", 0)),
+            "revenue_today": max(0, counters.get(f"revenue_cents:{day}", 0)) / 100,
+        }
+
+    async def get(self, db: AsyncSession) -> Dict[str, Any]:
+        """Counters, reconciled with db first if unseeded or stale."""
+        stats = await self.read()
+        if stats is not None:
+            return stats
+
+        async with self._lock:
+            # Another request may have reconciled while we waited
+            stats = await self.read()
+            if stats is not None:
+                return stats
+            return await self.reconcile(db)
+
+    # ============ Reconcile ============
+
+    async def reconcile(self, db: AsyncSession) -> Dict[str, Any]:
+        """Replace every counter with values from one aggregate query."""
+        previous = await self.read()
+        stats = await compute_realtime_stats(db)
+
+        day = _day()
+        await cache_service.replace_dashboard_stats({
+            "active_jobs": stats["active_jobs_count"],
+            "available_cleaners": stats["available_cleaners_count"],
+            "busy_cleaners": stats["busy_cleaners_count"],
+            "delayed_jobs": stats["delayed_jobs_count"],
+            "pending_assignment": stats["pending_assignment_count"],
+            f"completed:{day}": stats["completed_today_count"],
+            f"revenue_cents:{day}": round(stats["revenue_today"] * 100),
+            SEEDED_FIELD: int(time.time()),
+        })
+        self.reconciles += 1
+
+        if stats != previous:
+            if previous is not None:
+                self.drift_corrections += 1
+                drift = {k: (previous[k], v) for k, v in stats.items() if previous[k] != v}
+                logger.info(f"Live counters corrected: {drift}")
+            await event_publisher.publish(EventType.STATS_UPDATED, stats)
+        return stats
+
+    async def run_reconciler(self, session_factory, is_running: Callable[[], bool]) -> None:
+        """Reconcile every RECONCILE_INTERVAL_SECONDS while is_running() holds."""
+        while is_running():
+            try:
+                async with session_factory() as db:
+                    await self.reconcile(db)
+            except Exception as e:
+                logger.error(f"Live counter reconcile error: {e}")
+
+            await asyncio.sleep(self.RECONCILE_INTERVAL_SECONDS)
+
+    # ============ Deltas ============
+
+    async def _on_job_event(self, event: Event) -> None:
+        payload = event.payload
+        status = payload.get("status")
+        # Bulk transitions report {previous status: count}
+        previous_counts = payload.get("previous_statuses")
+        if previous_counts is None:
+            previous = payload.get("previous_status")
+            if previous is None and event.type != EventType.JOB_CREATED:
+                self.events_ignored += 1
+                return
+            previous_counts = {previous: payload.get("count") or 1}
+
+        deltas = Counter()
+        for previous, count in previous_counts.items():
+            if status == previous:
+                continue
+            if previous in JOB_STATUS_COUNTERS:
+                deltas[JOB_STATUS_COUNTERS[previous]] -= count
+            if status in JOB_STATUS_COUNTERS:
+                deltas[JOB_STATUS_COUNTERS[status]] += count
+
+            if status == BookingStatus.COMPLETED.value:
+                day = _day(payload.get("completed_at"))
+                deltas[f"completed:{day}"] += count
+                deltas[f"revenue_cents:{day}"] += round(Decimal(str(payload.get("total_price") or 0)) * 100)
+
+        await self._apply(deltas)
+
+    async def _on_cleaner_event(self, event: Event) -> None:
+        payload = event.payload
+        status = payload.get("status")
+        previous = payload.get("previous_status")
+        if previous is None:
+            self.events_ignored += 1
+            return
+        if status == previous:
+            return
+
+        count = payload.get("count") or 1
+        deltas = Counter()
+        if previous in CLEANER_STATUS_COUNTERS:
+            deltas[CLEANER_STATUS_COUNTERS[previous]] -= count
+        if status in CLEANER_STATUS_COUNTERS:
+            deltas[CLEANER_STATUS_COUNTERS[status]] += count
+
+        await self._apply(deltas)
+
+    async def _apply(self, deltas: Counter) -> None:
+        """HINCRBY each changed counter and push the new values."""
+        changed = {field: delta for field, delta in deltas.items() if delta}
+        if not changed:
+            return
+
+        for field, delta in changed.items():
+            await cache_service.update_dashboard_stat(field, delta)
+        self.deltas_applied += 1
+
+        stats = await self.read()
+        if stats is not None:
+            await event_publisher.publish(EventType.STATS_UPDATED, stats)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "deltas_applied": self.deltas_applied,
+            "events_ignored": self.events_ignored,
+            "reconciles": self.reconciles,
+            "drift_corrections": self.drift_corrections,
+        }
+
+
+live_counters = LiveCounters()
@@ -68,6 +68,9 @@ class OTPService:
     RESEND_COOLDOWN_SECONDS = 60
     RATE_LIMIT_REQUESTS = 5
     RATE_LIMIT_WINDOW_SECONDS = 3600  # 1 hour
+    # Verify/resend only look at requests this recent (scans only the
+    # current monthly otp_requests partitions); older ones long expired
+    LOOKUP_WINDOW_SECONDS = 86400  # 1 day
     
     def __init__(self, db: Session):
         self.db = db
@@ -188,7 +191,8 @@ class OTPService:
             OTPRequest.id == uuid.UUID(otp_id),
             OTPRequest.phone_number == phone_number,
             OTPRequest.user_type == user_type,
-            OTPRequest.verified == False
+            OTPRequest.verified == False,
+            OTPRequest.created_at >= self._lookup_since()
         ).first()
         
         if not otp_request:
@@ -236,7 +240,8 @@ class OTPService:
         """
         # Invalidate old OTP
         old_request = self.db.query(OTPRequest).filter(
-            OTPRequest.id == uuid.UUID(otp_id)
+            OTPRequest.id == uuid.UUID(otp_id),
+            OTPRequest.created_at >= self._lookup_since()
         ).first()
         
         if old_request:
@@ -249,6 +254,9 @@ class OTPService:
         # Generate new OTP
         return await self.request_otp(phone_number, user_type)
     
+    def _lookup_since(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.LOOKUP_WINDOW_SECONDS)
+    
     async def _check_rate_limit(self, phone_number: str) -> None:
         """Check if phone number has exceeded rate limit."""
         key = f"otp_rate:{phone_number}"
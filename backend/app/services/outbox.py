@@ -0,0 +1,272 @@
+"""
+Transactional Outbox
+
+Events are written to the event_outbox table inside the same database
+transaction as the state change that produced them, so a crash between
+commit and publish can no longer lose an event. A background relay drains
+undelivered rows in batches and hands them to the in-process event publisher.
+
+Delivery is at-least-once: a row is marked published only after the
+publisher accepted it, and consumers deduplicate by event_id. The relay
+claims a batch with a short lease and commits before publishing, so no
+row lock or transaction is held while subscribers run; rows whose lease
+runs out (worker crash mid-publish) are claimed again.
+
+Usage:
+    enqueue_event(db, EventType.JOB_STARTED, {"job_id": 123})
+    db.commit()
+    outbox_relay.notify()  # optional: drain now instead of on the next tick
+"""
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.outbox import EventOutbox
+from app.services.events import event_publisher, EventType
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_event(
+    db: Session,
+    event_type: EventType,
+    payload: Dict[str, Any],
+    dedup_key: Optional[str] = None,
+    publish: bool = True
+) -> Optional[str]:
+    """
+    Stage an event in the outbox as part of the caller's transaction.
+
+    Nothing is published until the caller commits; a rollback discards
+    the event together with the state change.
+
+    dedup_key makes the event_id deterministic: an event whose key was
+    already staged (by any worker) is skipped, which suppresses duplicate
+    alerts across processes.
+
+    publish=False stores the event for outbox readers only (replay_events);
+    it is recorded as already delivered, so the relay never publishes it.
+
+    Returns the event_id assigned to the event, or None if it was a duplicate.
+    """
+    values = {
+        "event_id": str(uuid.uuid5(uuid.NAMESPACE_URL, dedup_key)) if dedup_key else str(uuid.uuid4()),
+        "event_type": event_type.value,
+        "payload": json.dumps(payload, default=str),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    if not publish:
+        values["published_at"] = datetime.now(timezone.utc)
+
+    if not dedup_key:
+        db.add(EventOutbox(**values))
+        return values["event_id"]
+
+    if db.bind.dialect.name == "postgresql":
+        inserted = db.execute(
+            pg_insert(EventOutbox).values(**values)
+            .on_conflict_do_nothing(index_elements=["event_id"])
+            .returning(EventOutbox.id)
+        ).first()
+        return values["event_id"] if inserted else None
+
+    exists = db.query(EventOutbox.id).filter(EventOutbox.event_id == values["event_id"]).first()
+    if exists:
+        return None
+    db.add(EventOutbox(**values))
+    return values["event_id"]
+
+
+def replay_events(
+    db: Session,
+    after_id: int = 0,
+    limit: int = 500,
+    event_types: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Read delivered and pending events in outbox order.
+
+    Used by dashboards to rebuild state after a reconnect: pass the
+    last outbox id seen and apply the returned events in order.
+    """
+    query = db.query(EventOutbox).filter(EventOutbox.id > after_id)
+    if event_types:
+        query = query.filter(EventOutbox.event_type.in_(event_types))
+
+    rows = query.order_by(EventOutbox.id.asc()).limit(limit).all()
+
+    return [
+        {
+            "id": row.id,
+            "event_id": row.event_id,
+            "type": row.event_type,
+            "payload": json.loads(row.payload),
+            "timestamp": row.timestamp,
+            "published": row.published_at is not None,
+        }
+        for row in rows
+    ]
+
+
+class OutboxRelay:
+    """
+    Drains the event outbox into the event publisher.
+
+    A batch is claimed by setting claimed_until on rows that are not
+    published and not under an unexpired claim (SELECT ... FOR UPDATE SKIP
+    LOCKED, then a conditional UPDATE), so several workers can run the
+    relay concurrently without double-claiming a batch.
+    """
+
+    BATCH_SIZE = 100
+    POLL_INTERVAL_SECONDS = 1.0
+    MAX_ATTEMPTS = 10
+
+    # A claimed batch not marked published within this long is claimed again
+    CLAIM_LEASE_SECONDS = 60
+
+    # Delivered rows are kept this long for replay, then pruned
+    RETENTION_DAYS = 7
+    PRUNE_INTERVAL_SECONDS = 3600
+
+    def __init__(self):
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_prune: Optional[datetime] = None
+
+    def notify(self) -> None:
+        """Wake the relay so freshly committed events are drained immediately."""
+        if self._wakeup is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Called outside the event loop (scripts, tests): the next tick picks it up
+            return
+        self._wakeup.set()
+
+    def _claim(self, db: Session) -> List[Any]:
+        """Claim up to BATCH_SIZE undelivered rows and commit the claim."""
+        now = datetime.now(timezone.utc)
+        claimable = (
+            EventOutbox.published_at == None,
+            EventOutbox.attempts < self.MAX_ATTEMPTS,
+            or_(EventOutbox.claimed_until == None, EventOutbox.claimed_until < now)
+        )
+        ids = [
+            row.id for row in db.query(EventOutbox.id).filter(*claimable)
+            .order_by(EventOutbox.id.asc()).limit(self.BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ]
+        if not ids:
+            db.rollback()
+            return []
+
+        rows = db.execute(
+            update(EventOutbox)
+            .where(EventOutbox.id.in_(ids), *claimable)
+            .values(
+                claimed_until=now + timedelta(seconds=self.CLAIM_LEASE_SECONDS),
+                attempts=EventOutbox.attempts + 1
+            )
+            .returning(
+                EventOutbox.id, EventOutbox.event_id, EventOutbox.event_type,
+                EventOutbox.payload, EventOutbox.timestamp
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return sorted(rows, key=lambda row: row.id)
+
+    async def drain_once(self, db: Session) -> int:
+        """
+        Publish one batch of undelivered events.
+
+        The batch is claimed in its own short transaction; publishing
+        happens outside any transaction and the results are recorded in
+        another. Returns the number of events handed to the publisher.
+        """
+        rows = self._claim(db)
+        if not rows:
+            return 0
+
+        published_ids = []
+        errors = {}
+        for row in rows:
+            try:
+                await event_publisher.publish(
+                    EventType(row.event_type),
+                    json.loads(row.payload),
+                    event_id=row.event_id,
+                    timestamp=row.timestamp
+                )
+                published_ids.append(row.id)
+            except Exception as e:
+                errors[row.id] = str(e)
+                logger.error(f"Outbox relay failed to publish {row.event_id}: {e}")
+
+        if published_ids:
+            db.execute(
+                update(EventOutbox)
+                .where(EventOutbox.id.in_(published_ids))
+                .values(published_at=datetime.now(timezone.utc), claimed_until=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+        for row_id, error in errors.items():
+            # Released for the next drain (until MAX_ATTEMPTS)
+            db.execute(
+                update(EventOutbox)
+                .where(EventOutbox.id == row_id)
+                .values(claimed_until=None, last_error=error)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return len(published_ids)
+
+    def prune(self, db: Session) -> int:
+        """Delete delivered events older than the retention window."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.RETENTION_DAYS)
+        deleted = db.query(EventOutbox).filter(
+            EventOutbox.published_at != None,
+            EventOutbox.published_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    async def run(self, db_session_factory, is_running) -> None:
+        """Relay loop; drains until empty, then waits for a notify or the next tick."""
+        self._wakeup = asyncio.Event()
+
+        while is_running():
+            self._wakeup.clear()
+            try:
+                db = db_session_factory()
+                try:
+                    while await self.drain_once(db) >= self.BATCH_SIZE:
+                        pass
+
+                    now = datetime.now(timezone.utc)
+                    if not self._last_prune or (now - self._last_prune).total_seconds() >= self.PRUNE_INTERVAL_SECONDS:
+                        pruned = self.prune(db)
+                        if pruned:
+                            logger.info(f"Pruned {pruned} delivered outbox events")
+                        self._last_prune = now
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global outbox relay instance
+outbox_relay = OutboxRelay()
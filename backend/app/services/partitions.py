@@ -0,0 +1,239 @@
+"""
+Time Partitions
+
+On PostgreSQL the append-heavy tables are range-partitioned by month on
+created_at (see app/migrations/partition_time_series_tables.py):
+audit_logs, booking_status_history and otp_requests. Partition
+<table>_pYYYYMM holds [first of the month, first of the next month) in
+UTC; rows outside every partition land in <table>_default. Each table's
+primary key is (id, created_at), since PostgreSQL requires the partition
+key in it; id alone still identifies a row, so the ORM maps id as the key
+as before.
+
+Queries that bound created_at only scan the matching partitions (partition
+pruning, visible in EXPLAIN): the job history endpoint bounds it by the
+booking's created_at, OTP verification by OTPService.LOOKUP_WINDOW_SECONDS.
+
+The background-tasks leader runs PartitionManager.maintain() daily:
+- creates partitions PARTITION_PREMAKE_MONTHS ahead, so inserts never
+  fall into the default partition; rows that already landed there in a
+  new partition's range are moved into it
+- archives partitions older than PARTITION_ARCHIVE_AFTER_MONTHS by moving
+  them to PARTITION_ARCHIVE_TABLESPACE (cold storage), when configured
+- drops partitions past a table's retention (otp_requests only)
+
+bookings and wallet_transactions are not partitioned: bookings.id is
+referenced by foreign keys from nine tables, which would all need the
+partition key, and wallet balances are derived from full transaction
+history. Their terminal rows' history and audit entries age into the
+archived partitions.
+
+On other databases the tables are ordinary tables and maintain() does
+nothing. A table whose maintenance fails is logged and rolled back; the
+other tables are still maintained.
+"""
+import logging
+import re
+from datetime import date, datetime, time, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> months of partitions kept (None keeps all)
+PARTITIONED_TABLES: Dict[str, Optional[int]] = {
+    "audit_logs": None,
+    "booking_status_history": None,
+    "otp_requests": 3,
+}
+
+PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after month's."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(moment: date) -> date:
+    """First day of moment's month, in UTC for aware datetimes."""
+    if isinstance(moment, datetime) and moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    """DDL creating table's partition for month (UTC bounds), if missing."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00+00')"
+    )
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    return db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {"table": table}).first() is not None
+
+
+def list_partitions(db: Session, table: str) -> Dict[date, Optional[str]]:
+    """Monthly partitions of table: month -> tablespace (None: the default)."""
+    rows = db.execute(text(
+        "SELECT child.relname, ts.spcname "
+        "FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "LEFT JOIN pg_tablespace ts ON ts.oid = child.reltablespace "
+        "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+    ), {"table": table}).all()
+
+    partitions = {}
+    for name, tablespace in rows:
+        match = PARTITION_NAME.search(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = tablespace
+    return partitions
+
+
+def create_partition(db: Session, table: str, month: date) -> None:
+    """
+    Create table's partition for month.
+
+    PostgreSQL refuses to create a partition while the default partition
+    holds rows in its range, so those rows are moved: the default is
+    detached, the partition created, the rows moved into it and the
+    default attached again, all in the caller's transaction.
+    """
+    default = default_partition_name(table)
+    bounds = {
+        "start": datetime.combine(month, time.min, tzinfo=timezone.utc),
+        "end": datetime.combine(add_months(month, 1), time.min, tzinfo=timezone.utc),
+    }
+    in_range = "created_at >= :start AND created_at < :end"
+
+    has_default = db.execute(text(
+        "SELECT 1 FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table AND child.relname = :default AND pg_table_is_visible(parent.oid)"
+    ), {"table": table, "default": default}).first() is not None
+    stranded = has_default and db.execute(
+        text(f"SELECT 1 FROM {default} WHERE {in_range} LIMIT 1"), bounds
+    ).first() is not None
+
+    if not stranded:
+        db.execute(text(create_partition_sql(table, month)))
+        return
+
+    name = partition_name(table, month)
+    db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    db.execute(text(create_partition_sql(table, month)))
+    moved = db.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}"), bounds).rowcount
+    db.execute(text(f"DELETE FROM {default} WHERE {in_range}"), bounds)
+    db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    logger.warning(f"Moved {moved} rows from {default} into new partition {name}")
+
+
+class PartitionManager:
+    """Creates, archives and drops monthly partitions."""
+
+    def __init__(
+        self,
+        premake_months: int = 3,
+        archive_after_months: int = 12,
+        archive_tablespace: Optional[str] = None
+    ):
+        self.premake_months = premake_months
+        self.archive_after_months = archive_after_months
+        self.archive_tablespace = archive_tablespace
+
+    def maintain(self, db: Session, today: Optional[date] = None) -> Dict[str, List[str]]:
+        """
+        Bring every partitioned table's partitions up to date.
+
+        Returns the partitions created, archived and dropped. A table
+        that fails is rolled back and skipped.
+        """
+        result = {"created": [], "archived": [], "dropped": []}
+        if db.bind.dialect.name != "postgresql":
+            return result
+
+        current = month_start(today or datetime.now(timezone.utc))
+        for table, retention_months in PARTITIONED_TABLES.items():
+            try:
+                table_result = self._maintain_table(db, table, retention_months, current)
+                # One transaction per table keeps locks on the parent short
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Partition maintenance of {table} failed: {e}")
+                continue
+            for action, names in table_result.items():
+                result[action].extend(names)
+
+        if any(result.values()):
+            logger.info(f"Partition maintenance: {result}")
+        return result
+
+    def _maintain_table(
+        self,
+        db: Session,
+        table: str,
+        retention_months: Optional[int],
+        current: date
+    ) -> Dict[str, List[str]]:
+        """Stage one table's maintenance in the session, uncommitted."""
+        result = {"created": [], "archived": [], "dropped": []}
+        if not is_partitioned(db, table):
+            return result
+        partitions = list_partitions(db, table)
+
+        for offset in range(self.premake_months + 1):
+            month = add_months(current, offset)
+            if month not in partitions:
+                create_partition(db, table, month)
+                result["created"].append(partition_name(table, month))
+
+        for month, tablespace in sorted(partitions.items()):
+            name = partition_name(table, month)
+            if retention_months is not None and month < add_months(current, -retention_months):
+                db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                db.execute(text(f"DROP TABLE {name}"))
+                result["dropped"].append(name)
+            elif (
+                self.archive_tablespace
+                and tablespace != self.archive_tablespace
+                and month < add_months(current, -self.archive_after_months)
+            ):
+                # Rewrites the partition; it is no longer written to
+                db.execute(text(f"ALTER TABLE {name} SET TABLESPACE {self.archive_tablespace}"))
+                for (index,) in db.execute(text(
+                    "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = CAST(:name AS regclass)"
+                ), {"name": name}):
+                    db.execute(text(f"ALTER INDEX {index} SET TABLESPACE {self.archive_tablespace}"))
+                result["archived"].append(name)
+
+        return result
+
+
+partition_manager = PartitionManager(
+    premake_months=settings.PARTITION_PREMAKE_MONTHS,
+    archive_after_months=settings.PARTITION_ARCHIVE_AFTER_MONTHS,
+    archive_tablespace=settings.PARTITION_ARCHIVE_TABLESPACE
+)
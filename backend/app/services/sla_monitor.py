@@ -3,20 +3,53 @@ SLA Monitoring Service
 
 Monitors job SLAs and triggers alerts for delayed jobs.
 Can be run as a background task or scheduled cron job.
+
+In the background runner, SLA start deadlines, cooldown expiries and
+payment timeouts are driven by the deadline scheduler: each check runs
+only for the jobs, cleaners or bookings whose deadline just passed.
+
+Only the worker elected leader runs these checks; alerts are staged in the
+outbox under deterministic keys so a repeat from any worker is dropped.
+
+Delayed-job alert state is kept in sla_alerts: a job.delayed event is sent
+when a job first breaches, at each escalation step and when it finally
+starts, not on every check.
 """
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from typing import List, Dict, Any, Optional, Callable
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, func, select, update, insert, literal, null, true
 import asyncio
 import logging
 
-from app.models import Booking, BookingStatus, BookingStatusHistory, CleanerProfile, CleanerStatus, PaymentStatus
+from app.models import Booking, BookingStatus, BookingStatusHistory, CleanerProfile, CleanerStatus, PaymentStatus, User
 from app.models.employee import Employee, EmployeeCleanerStatus
-from app.services.events import event_publisher, EventType
+from app.models.sla_alert import SLAAlert
+from app.services.events import EventType
+from app.models.outbox import EventOutbox
+from app.services.outbox import enqueue_event, outbox_relay, replay_events
+from app.services.cleaner_assignment import get_job_regions
+from app.services.deadline_scheduler import deadline_scheduler
+from app.services.leader_election import background_leader, LeaderElector
+from app.services.live_counters import live_counters
+from app.services.idempotency import purge_expired_keys
+from app.services.partitions import partition_manager
+from app.database import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
+# Deadline kinds handled by the background runner
+DEADLINE_SLA_START = "sla_start"
+DEADLINE_COOLDOWN = "cooldown_expiry"
+DEADLINE_PAYMENT = "payment_timeout"
+
+
+def _full_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
+    """Format a projected user name the way User.full_name does; None if no user was joined."""
+    if first_name is None and last_name is None:
+        return None
+    return f"{first_name} {last_name}"
+
 
 class SLAMonitor:
     """
@@ -36,34 +69,95 @@ class SLAMonitor:
 
     # Monitoring intervals
     CHECK_INTERVAL_SECONDS = 30
+
+    # Minutes past the SLA deadline at which a delayed-job alert escalates;
+    # one job.delayed event is sent per step reached
+    ESCALATION_STEPS_MINUTES = (0, 15, 30, 60)
+
+    # Job statuses during which an SLA alert stays open
+    ACTIVE_STATUSES = (BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED)
+
+    # Safety-net rebuild of scheduled deadlines from rows updated since the
+    # previous pass (minus the overlap, covering transactions still open then)
+    DEADLINE_RESYNC_SECONDS = 600
+    DEADLINE_RESYNC_OVERLAP_SECONDS = 300
+
+    # Deadlines scheduled in other workers reach the leader through the
+    # outbox: written at most this long after scheduling, read this often
+    DEADLINE_FORWARD_MAX_WAIT_SECONDS = 1.0
+    DEADLINE_INTAKE_POLL_SECONDS = 1.0
+
+    # Offline-cleaner scan interval; also the window for suppressing repeat alerts
+    OFFLINE_CHECK_INTERVAL_SECONDS = 120
+
+    # Rows per bulk UPDATE transaction, keeping row locks short
+    BULK_CHUNK_SIZE = 500
+
+    # Expired idempotency keys are purged this often
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 3600
+
+    # Monthly partitions are created, archived and dropped this often
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS = 24 * 3600
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, fence: Optional[Callable[[Session], None]] = None):
+        """
+        fence, if given, is called at the start of every write transaction
+        (e.g. a leader fencing check) and should raise to abort it.
+        """
         self.db = db
+        self._fence = fence
         self._running = False
     
-    def get_delayed_jobs(self) -> List[Dict[str, Any]]:
+    def get_delayed_jobs(self, job_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """
         Find jobs that have breached their SLA.
         
         Returns jobs where:
         - Status is ASSIGNED and scheduled_time + threshold has passed
-        - Status is IN_PROGRESS and started too late
+        - Status is IN_PROGRESS or PAUSED and started too late
+        
+        job_ids restricts the check to those jobs (deadline-driven checks).
         """
         now = datetime.now(timezone.utc)
         sla_threshold = timedelta(minutes=self.JOB_START_THRESHOLD_MINUTES)
         
+        # Cleaner and customer names come from joins, not per-row lazy loads
+        cleaner = aliased(User)
+        customer = aliased(User)
+        columns = (
+            Booking.id,
+            Booking.booking_number,
+            Booking.status,
+            Booking.scheduled_date,
+            Booking.sla_deadline,
+            Booking.actual_start_time,
+            Booking.cleaner_id,
+            Booking.customer_id,
+            cleaner.first_name.label("cleaner_first_name"),
+            cleaner.last_name.label("cleaner_last_name"),
+            customer.first_name.label("customer_first_name"),
+            customer.last_name.label("customer_last_name"),
+        )
+        
         delayed_jobs = []
         
         # Query for assigned jobs that should have started
-        assigned_delayed = self.db.query(Booking).filter(
+        assigned_query = self.db.query(*columns).outerjoin(
+            cleaner, cleaner.id == Booking.cleaner_id
+        ).outerjoin(
+            customer, customer.id == Booking.customer_id
+        ).filter(
             Booking.status == BookingStatus.ASSIGNED,
             or_(
                 Booking.sla_deadline < now,
-                Booking.scheduled_date + sla_threshold < now
+                # Bare column so the active-schedule index applies
+                Booking.scheduled_date < now - sla_threshold
             )
-        ).all()
+        )
+        if job_ids is not None:
+            assigned_query = assigned_query.filter(Booking.id.in_(job_ids))
         
-        for job in assigned_delayed:
+        for job in assigned_query.all():
             deadline = job.sla_deadline or (job.scheduled_date + sla_threshold)
             delay_seconds = (now - deadline).total_seconds()
             
@@ -75,21 +169,27 @@ class SLAMonitor:
                 "sla_deadline": deadline.isoformat(),
                 "delay_minutes": int(delay_seconds / 60),
                 "cleaner_id": job.cleaner_id,
-                "cleaner_name": job.cleaner.full_name if job.cleaner else None,
+                "cleaner_name": _full_name(job.cleaner_first_name, job.cleaner_last_name),
                 "customer_id": job.customer_id,
-                "customer_name": job.customer.full_name if job.customer else None,
+                "customer_name": _full_name(job.customer_first_name, job.customer_last_name),
                 "type": "start_delayed"
             })
         
         # Query for in-progress jobs that haven't started on time
-        in_progress_late = self.db.query(Booking).filter(
-            Booking.status == BookingStatus.IN_PROGRESS,
+        in_progress_query = self.db.query(*columns).outerjoin(
+            cleaner, cleaner.id == Booking.cleaner_id
+        ).outerjoin(
+            customer, customer.id == Booking.customer_id
+        ).filter(
+            Booking.status.in_([BookingStatus.IN_PROGRESS, BookingStatus.PAUSED]),
             Booking.actual_start_time != None,
             Booking.sla_deadline != None,
             Booking.actual_start_time > Booking.sla_deadline
-        ).all()
+        )
+        if job_ids is not None:
+            in_progress_query = in_progress_query.filter(Booking.id.in_(job_ids))
         
-        for job in in_progress_late:
+        for job in in_progress_query.all():
             delay_seconds = (job.actual_start_time - job.sla_deadline).total_seconds()
             
             delayed_jobs.append({
@@ -101,39 +201,140 @@ class SLAMonitor:
                 "sla_deadline": job.sla_deadline.isoformat(),
                 "delay_minutes": int(delay_seconds / 60),
                 "cleaner_id": job.cleaner_id,
-                "cleaner_name": job.cleaner.full_name if job.cleaner else None,
+                "cleaner_name": _full_name(job.cleaner_first_name, job.cleaner_last_name),
                 "customer_id": job.customer_id,
                 "type": "started_late"
             })
         
         return delayed_jobs
     
-    async def check_and_alert(self) -> int:
+    async def check_and_alert(self, job_ids: Optional[List[int]] = None) -> int:
         """
-        Check for SLA breaches and emit events.
+        Check for SLA breaches, update alert state and emit events.
+        
+        Each breaching job has one SLAAlert row. A job.delayed event is
+        staged only when that state changes: a new breach, a step up in
+        ESCALATION_STEPS_MINUTES, or a late job finally starting. Alerts
+        of jobs that left the active statuses are resolved.
         
-        Returns the number of delayed jobs found.
+        With job_ids (deadline-driven), jobs that still have not started
+        are re-armed at their next escalation step.
+        
+        Returns the number of events staged.
         """
-        delayed_jobs = self.get_delayed_jobs()
+        if self._fence:
+            self._fence(self.db)
+        
+        now = datetime.now(timezone.utc)
+        delayed_jobs = self.get_delayed_jobs(job_ids)
+        delayed_ids = [job["job_id"] for job in delayed_jobs]
         
+        # Current alert state for the breaching jobs and for checked jobs with open alerts
+        state_query = self.db.query(SLAAlert)
+        if job_ids is not None:
+            state_query = state_query.filter(SLAAlert.booking_id.in_(set(job_ids) | set(delayed_ids)))
+        else:
+            state_query = state_query.filter(or_(
+                SLAAlert.resolved_at == None,
+                SLAAlert.booking_id.in_(delayed_ids)
+            ))
+        alerts = {alert.booking_id: alert for alert in state_query.all()}
+        
+        staged = 0
         for job in delayed_jobs:
-            await event_publisher.publish(
+            alert = alerts.get(job["job_id"])
+            level = self.escalation_level(job["delay_minutes"])
+            if alert is None:
+                alert = SLAAlert(booking_id=job["job_id"])
+                self.db.add(alert)
+            
+            if alert.resolved_at is not None or alert.first_breach_at is None:
+                # New breach (or a reassigned job breaching again)
+                alert.breach_type = job["type"]
+                alert.sla_deadline = datetime.fromisoformat(job["sla_deadline"])
+                alert.first_breach_at = now
+                alert.escalation_level = level
+                alert.resolved_at = None
+                notify = True
+            elif job["type"] != alert.breach_type:
+                # Late job has started: report the final delay once
+                alert.breach_type = job["type"]
+                alert.escalation_level = max(alert.escalation_level, level)
+                notify = True
+            else:
+                notify = level > alert.escalation_level
+                alert.escalation_level = max(alert.escalation_level, level)
+            alert.delay_minutes = job["delay_minutes"]
+            
+            if not notify:
+                continue
+            
+            event_id = enqueue_event(
+                self.db,
                 EventType.JOB_DELAYED,
                 {
                     "job_id": job["job_id"],
                     "booking_number": job["booking_number"],
                     "delay_minutes": job["delay_minutes"],
                     "type": job["type"],
+                    "escalation_level": alert.escalation_level,
+                    "first_breach_at": alert.first_breach_at.isoformat(),
                     "cleaner_id": job.get("cleaner_id"),
                     "cleaner_name": job.get("cleaner_name"),
                     "customer_id": job.get("customer_id"),
-                }
+                },
+                dedup_key=(
+                    f"job.delayed:{job['job_id']}:{int(alert.first_breach_at.timestamp())}"
+                    f":{job['type']}:{alert.escalation_level}"
+                )
             )
+            alert.last_notified_at = now
+            if event_id:
+                staged += 1
+        
+        # Open alerts whose job is no longer breaching: resolve once the job left the active statuses
+        open_ids = [
+            booking_id for booking_id, alert in alerts.items()
+            if alert.resolved_at is None and booking_id not in delayed_ids
+        ]
+        if open_ids:
+            self.db.query(SLAAlert).filter(
+                SLAAlert.booking_id.in_(
+                    select(Booking.id).where(
+                        Booking.id.in_(open_ids),
+                        Booking.status.notin_(self.ACTIVE_STATUSES)
+                    )
+                ),
+                SLAAlert.resolved_at == None
+            ).update({"resolved_at": now}, synchronize_session=False)
+        
+        self.db.commit()
+        if staged:
+            outbox_relay.notify()
+            logger.warning(f"SLA Alert: {staged} new or escalated delayed jobs")
         
-        if delayed_jobs:
-            logger.warning(f"SLA Alert: {len(delayed_jobs)} delayed jobs detected")
+        if job_ids is not None:
+            for job in delayed_jobs:
+                if job["type"] == "start_delayed":
+                    next_step = self.next_escalation_at(job)
+                    if next_step:
+                        deadline_scheduler.schedule(DEADLINE_SLA_START, job["job_id"], next_step)
         
-        return len(delayed_jobs)
+        return staged
+    
+    @classmethod
+    def escalation_level(cls, delay_minutes: int) -> int:
+        """Escalation level (1-based) reached after delay_minutes past the SLA deadline."""
+        return max(1, sum(1 for step in cls.ESCALATION_STEPS_MINUTES if delay_minutes >= step))
+    
+    @classmethod
+    def next_escalation_at(cls, job: Dict[str, Any]) -> Optional[datetime]:
+        """When a still-unstarted job reaches its next escalation step, or None at the top level."""
+        level = cls.escalation_level(job["delay_minutes"])
+        if level >= len(cls.ESCALATION_STEPS_MINUTES):
+            return None
+        deadline = datetime.fromisoformat(job["sla_deadline"])
+        return deadline + timedelta(minutes=cls.ESCALATION_STEPS_MINUTES[level])
     
     def get_orphaned_jobs(self, max_duration_hours: int = 4) -> List[Booking]:
         """
@@ -152,84 +353,221 @@ class SLAMonitor:
         
         return orphaned
     
-    def release_expired_cooldowns(self) -> int:
+    def release_expired_cooldowns(self, cleaner_ids: Optional[List[int]] = None) -> int:
         """
         Release cleaners whose cooldown has expired.
         
-        Returns the number of cleaners released.
-        """
-        now = datetime.now(timezone.utc)
+        Runs as set-based UPDATE ... RETURNING statements of at most
+        BULK_CHUNK_SIZE rows, one transaction and one batched
+        cleaner.status_changed event per chunk.
         
-        expired_profiles = self.db.query(CleanerProfile).filter(
-            CleanerProfile.status == CleanerStatus.COOLING_DOWN,
-            CleanerProfile.cooldown_expires_at != None,
-            CleanerProfile.cooldown_expires_at < now
-        ).all()
+        cleaner_ids restricts the check to those cleaners (user IDs).
         
-        for profile in expired_profiles:
-            profile.status = CleanerStatus.AVAILABLE
-            profile.cooldown_expires_at = None
-            profile.active_job_count = 0
-            logger.info(f"Released cleaner {profile.user_id} from cooldown")
-        
-        if expired_profiles:
+        Returns the number of cleaners released.
+        """
+        released = 0
+        while True:
+            if self._fence:
+                self._fence(self.db)
+            
+            now = datetime.now(timezone.utc)
+            chunk = select(CleanerProfile.id).where(
+                CleanerProfile.status == CleanerStatus.COOLING_DOWN,
+                CleanerProfile.cooldown_expires_at != None,
+                CleanerProfile.cooldown_expires_at <= now
+            )
+            if cleaner_ids is not None:
+                chunk = chunk.where(CleanerProfile.user_id.in_(cleaner_ids))
+            chunk = chunk.order_by(CleanerProfile.id).limit(self.BULK_CHUNK_SIZE).with_for_update(skip_locked=True)
+            
+            user_ids = self.db.execute(
+                update(CleanerProfile)
+                .where(CleanerProfile.id.in_(chunk))
+                .values(
+                    status=CleanerStatus.AVAILABLE,
+                    cooldown_expires_at=None,
+                    active_job_count=0
+                )
+                .returning(CleanerProfile.user_id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            
+            if not user_ids:
+                self.db.rollback()
+                break
+            
+            enqueue_event(self.db, EventType.CLEANER_STATUS_CHANGED, {
+                "cleaner_ids": user_ids,
+                "count": len(user_ids),
+                "status": CleanerStatus.AVAILABLE.value,
+                "previous_status": CleanerStatus.COOLING_DOWN.value,
+                "reason": "cooldown_expired",
+            })
             self.db.commit()
+            outbox_relay.notify()
+            
+            released += len(user_ids)
+            logger.info(f"Released {len(user_ids)} cleaners from cooldown")
+            
+            if len(user_ids) < self.BULK_CHUNK_SIZE:
+                break
 
-        return len(expired_profiles)
+        return released
 
-    def cancel_unpaid_bookings(self) -> int:
+    def cancel_unpaid_bookings(self, booking_ids: Optional[List[int]] = None) -> int:
         """
         Cancel bookings that have been in PENDING status without payment
         for longer than PAYMENT_TIMEOUT_MINUTES.
 
+        Each chunk of at most BULK_CHUNK_SIZE bookings is one transaction:
+        a single UPDATE ... RETURNING, one INSERT ... SELECT into the status
+        history and one batched job.cancelled event.
+
+        booking_ids restricts the check to those bookings.
+
         Returns the number of bookings cancelled.
         """
-        now = datetime.now(timezone.utc)
         timeout = timedelta(minutes=self.PAYMENT_TIMEOUT_MINUTES)
-
-        # Find bookings that are:
-        # - Status PENDING (waiting for payment)
-        # - Payment status PENDING
-        # - Created more than 15 minutes ago
-        stale_bookings = self.db.query(Booking).filter(
-            Booking.status == BookingStatus.PENDING,
-            Booking.payment_status == PaymentStatus.PENDING,
-            Booking.created_at < now - timeout
-        ).all()
+        cancellation_reason = "Payment timeout - booking auto-cancelled after 15 minutes"
+        history_reason = "Auto-cancelled: Payment not received within 15 minutes"
 
         cancelled_count = 0
-        for booking in stale_bookings:
-            try:
-                # Update booking status
-                booking.status = BookingStatus.CANCELLED
-                booking.cancelled_at = now
-                booking.cancellation_reason = "Payment timeout - booking auto-cancelled after 15 minutes"
-
-                # Record status history
-                history = BookingStatusHistory(
-                    booking_id=booking.id,
-                    previous_status=BookingStatus.PENDING,
-                    new_status=BookingStatus.CANCELLED,
-                    changed_by_id=None,  # System action
-                    reason="Auto-cancelled: Payment not received within 15 minutes"
-                )
-                self.db.add(history)
-
-                cancelled_count += 1
-                logger.info(
-                    f"Auto-cancelled booking {booking.booking_number} due to payment timeout"
+        while True:
+            if self._fence:
+                self._fence(self.db)
+
+            # Bookings that are:
+            # - Status PENDING (waiting for payment)
+            # - Payment status PENDING
+            # - Created more than 15 minutes ago
+            now = datetime.now(timezone.utc)
+            chunk = select(Booking.id).where(
+                Booking.status == BookingStatus.PENDING,
+                Booking.payment_status == PaymentStatus.PENDING,
+                Booking.created_at <= now - timeout
+            )
+            if booking_ids is not None:
+                chunk = chunk.where(Booking.id.in_(booking_ids))
+            chunk = chunk.order_by(Booking.id).limit(self.BULK_CHUNK_SIZE).with_for_update(skip_locked=True)
+
+            cancelled = self.db.execute(
+                update(Booking)
+                .where(Booking.id.in_(chunk))
+                .values(
+                    status=BookingStatus.CANCELLED,
+                    cancelled_at=now,
+                    cancellation_reason=cancellation_reason
                 )
-            except Exception as e:
-                logger.error(
-                    f"Failed to auto-cancel booking {booking.booking_number}: {e}"
+                .returning(Booking.id, Booking.booking_number, Booking.customer_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            if not cancelled:
+                self.db.rollback()
+                break
+
+            ids = [row.id for row in cancelled]
+
+            # Record status history for the whole chunk (system action: no actor)
+            self.db.execute(
+                insert(BookingStatusHistory).from_select(
+                    ["booking_id", "previous_status", "new_status", "changed_by_id", "reason"],
+                    select(
+                        Booking.id,
+                        literal(BookingStatus.PENDING, BookingStatusHistory.previous_status.type),
+                        literal(BookingStatus.CANCELLED, BookingStatusHistory.new_status.type),
+                        null(),
+                        literal(history_reason)
+                    ).where(Booking.id.in_(ids))
                 )
+            )
 
-        if cancelled_count > 0:
+            enqueue_event(self.db, EventType.JOB_CANCELLED, {
+                "reason": "payment_timeout",
+                "count": len(cancelled),
+                "job_ids": ids,
+                "regions": sorted({region for region in get_job_regions(self.db, ids).values() if region}),
+                "booking_numbers": [row.booking_number for row in cancelled],
+                "message": f"{len(cancelled)} bookings auto-cancelled due to payment timeout"
+            })
             self.db.commit()
-            logger.warning(f"Payment timeout: {cancelled_count} bookings auto-cancelled")
+            outbox_relay.notify()
+
+            cancelled_count += len(cancelled)
+            logger.warning(f"Payment timeout: {len(cancelled)} bookings auto-cancelled")
+
+            if len(cancelled) < self.BULK_CHUNK_SIZE:
+                break
 
         return cancelled_count
 
+    def schedule_deadlines(self, since: Optional[datetime] = None) -> int:
+        """
+        Load open deadlines from the database into the deadline scheduler.
+
+        Reads only the id and timestamp columns of jobs awaiting start,
+        cleaners cooling down and unpaid pending bookings; with since, only
+        rows updated from then on. Keys that already have a deadline keep
+        it, so re-armed alerts are not moved back.
+
+        Returns the number of deadlines added.
+        """
+        sla_threshold = timedelta(minutes=self.JOB_START_THRESHOLD_MINUTES)
+        payment_timeout = timedelta(minutes=self.PAYMENT_TIMEOUT_MINUTES)
+        count = 0
+        booking_changed = Booking.updated_at >= since if since else true()
+        cleaner_changed = CleanerProfile.updated_at >= since if since else true()
+
+        assigned = self.db.query(Booking.id, Booking.sla_deadline, Booking.scheduled_date).filter(
+            Booking.status == BookingStatus.ASSIGNED,
+            booking_changed
+        ).all()
+        for job_id, sla_deadline, scheduled_date in assigned:
+            if not deadline_scheduler.is_scheduled(DEADLINE_SLA_START, job_id):
+                deadline_scheduler.schedule(
+                    DEADLINE_SLA_START, job_id, sla_deadline or (scheduled_date + sla_threshold)
+                )
+                count += 1
+
+        # Open alerts whose job started or left the active statuses since the last check
+        stale_alerts = self.db.query(SLAAlert.booking_id).join(
+            Booking, Booking.id == SLAAlert.booking_id
+        ).filter(
+            SLAAlert.resolved_at == None,
+            booking_changed,
+            or_(
+                Booking.status.notin_(self.ACTIVE_STATUSES),
+                and_(SLAAlert.breach_type == "start_delayed", Booking.status != BookingStatus.ASSIGNED)
+            )
+        ).all()
+        now = datetime.now(timezone.utc)
+        for (job_id,) in stale_alerts:
+            if not deadline_scheduler.is_scheduled(DEADLINE_SLA_START, job_id):
+                deadline_scheduler.schedule(DEADLINE_SLA_START, job_id, now)
+                count += 1
+
+        cooling = self.db.query(CleanerProfile.user_id, CleanerProfile.cooldown_expires_at).filter(
+            CleanerProfile.status == CleanerStatus.COOLING_DOWN,
+            CleanerProfile.cooldown_expires_at != None,
+            cleaner_changed
+        ).all()
+        for user_id, expires_at in cooling:
+            if not deadline_scheduler.is_scheduled(DEADLINE_COOLDOWN, user_id):
+                deadline_scheduler.schedule(DEADLINE_COOLDOWN, user_id, expires_at)
+                count += 1
+
+        unpaid = self.db.query(Booking.id, Booking.created_at).filter(
+            Booking.status == BookingStatus.PENDING,
+            Booking.payment_status == PaymentStatus.PENDING,
+            booking_changed
+        ).all()
+        for booking_id, created_at in unpaid:
+            if not deadline_scheduler.is_scheduled(DEADLINE_PAYMENT, booking_id):
+                deadline_scheduler.schedule(DEADLINE_PAYMENT, booking_id, created_at + payment_timeout)
+                count += 1
+
+        return count
+
     def detect_offline_cleaners_with_active_jobs(self) -> List[Dict[str, Any]]:
         """
         Detect cleaners who are offline but have active jobs.
@@ -239,100 +577,178 @@ class SLAMonitor:
         - Network disconnection
         - Cleaner forgetting to complete job
 
+        Runs two joined, column-projected queries (employee and legacy
+        cleaners) however many jobs are active.
+
         Returns list of alerts for admin dashboard.
         """
         alerts = []
 
         # Check Employee-based cleaners (new system)
-        # Find active jobs where assigned employee is OFFLINE
-        active_employee_jobs = self.db.query(Booking).filter(
-            Booking.assigned_employee_id != None,
-            Booking.status.in_([BookingStatus.IN_PROGRESS])
+        # Active jobs whose assigned employee is OFFLINE, in one joined query
+        employee_jobs = self.db.query(
+            Booking.id,
+            Booking.booking_number,
+            Booking.status,
+            Booking.scheduled_date,
+            Booking.customer_id,
+            Employee.id.label("employee_uuid"),
+            Employee.full_name,
+            Employee.employee_id,
+            Employee.cleaner_status,
+        ).join(
+            Employee, Employee.id == Booking.assigned_employee_id
+        ).filter(
+            Booking.status.in_([BookingStatus.IN_PROGRESS]),
+            Employee.cleaner_status == EmployeeCleanerStatus.OFFLINE
         ).all()
 
-        for job in active_employee_jobs:
-            employee = self.db.query(Employee).filter(
-                Employee.id == job.assigned_employee_id
-            ).first()
-
-            if employee and employee.cleaner_status == EmployeeCleanerStatus.OFFLINE:
-                alerts.append({
-                    "type": "cleaner_offline_active_job",
-                    "job_id": job.id,
-                    "booking_number": job.booking_number,
-                    "job_status": job.status.value,
-                    "cleaner_id": str(employee.id),
-                    "cleaner_name": employee.full_name,
-                    "employee_id": employee.employee_id,
-                    "cleaner_status": employee.cleaner_status.value,
-                    "scheduled_date": job.scheduled_date.isoformat() if job.scheduled_date else None,
-                    "customer_id": job.customer_id,
-                    "severity": "high",
-                    "message": f"Cleaner {employee.full_name} is OFFLINE but has active job {job.booking_number}"
-                })
+        for job in employee_jobs:
+            alerts.append({
+                "type": "cleaner_offline_active_job",
+                "job_id": job.id,
+                "booking_number": job.booking_number,
+                "job_status": job.status.value,
+                "cleaner_id": str(job.employee_uuid),
+                "cleaner_name": job.full_name,
+                "employee_id": job.employee_id,
+                "cleaner_status": job.cleaner_status.value,
+                "scheduled_date": job.scheduled_date.isoformat() if job.scheduled_date else None,
+                "customer_id": job.customer_id,
+                "severity": "high",
+                "message": f"Cleaner {job.full_name} is OFFLINE but has active job {job.booking_number}"
+            })
 
         # Check User-based cleaners (legacy system)
-        active_user_jobs = self.db.query(Booking).filter(
+        legacy_jobs = self.db.query(
+            Booking.id,
+            Booking.booking_number,
+            Booking.status,
+            Booking.scheduled_date,
+            Booking.customer_id,
+            Booking.cleaner_id,
+            User.first_name,
+            User.last_name,
+            CleanerProfile.status.label("cleaner_status"),
+        ).join(
+            CleanerProfile, CleanerProfile.user_id == Booking.cleaner_id
+        ).outerjoin(
+            User, User.id == Booking.cleaner_id
+        ).filter(
             Booking.cleaner_id != None,
             Booking.assigned_employee_id == None,  # Legacy only
-            Booking.status.in_([BookingStatus.IN_PROGRESS])
+            Booking.status.in_([BookingStatus.IN_PROGRESS]),
+            CleanerProfile.status == CleanerStatus.OFFLINE
         ).all()
 
-        for job in active_user_jobs:
-            profile = self.db.query(CleanerProfile).filter(
-                CleanerProfile.user_id == job.cleaner_id
-            ).first()
-
-            if profile and profile.status == CleanerStatus.OFFLINE:
-                alerts.append({
-                    "type": "cleaner_offline_active_job",
-                    "job_id": job.id,
-                    "booking_number": job.booking_number,
-                    "job_status": job.status.value,
-                    "cleaner_id": job.cleaner_id,
-                    "cleaner_name": job.cleaner.full_name if job.cleaner else "Unknown",
-                    "cleaner_status": profile.status.value,
-                    "scheduled_date": job.scheduled_date.isoformat() if job.scheduled_date else None,
-                    "customer_id": job.customer_id,
-                    "severity": "high",
-                    "message": f"Cleaner is OFFLINE but has active job {job.booking_number}"
-                })
+        for job in legacy_jobs:
+            alerts.append({
+                "type": "cleaner_offline_active_job",
+                "job_id": job.id,
+                "booking_number": job.booking_number,
+                "job_status": job.status.value,
+                "cleaner_id": job.cleaner_id,
+                "cleaner_name": _full_name(job.first_name, job.last_name) or "Unknown",
+                "cleaner_status": job.cleaner_status.value,
+                "scheduled_date": job.scheduled_date.isoformat() if job.scheduled_date else None,
+                "customer_id": job.customer_id,
+                "severity": "high",
+                "message": f"Cleaner is OFFLINE but has active job {job.booking_number}"
+            })
 
         return alerts
 
 
+def schedule_sla_deadline(job: Booking) -> None:
+    """Arm the start-SLA check for a job that was just assigned."""
+    deadline = job.sla_deadline or (
+        job.scheduled_date + timedelta(minutes=SLAMonitor.JOB_START_THRESHOLD_MINUTES)
+    )
+    deadline_scheduler.schedule(DEADLINE_SLA_START, job.id, deadline)
+
+
+def schedule_sla_recheck(job: Booking) -> None:
+    """Re-check the SLA alert of a job that changed status after its start deadline."""
+    if job.sla_deadline and job.sla_deadline <= datetime.now(timezone.utc):
+        deadline_scheduler.schedule(DEADLINE_SLA_START, job.id, datetime.now(timezone.utc))
+
+
+def schedule_cooldown_release(cleaner_id: int, expires_at: datetime) -> None:
+    """Arm the release of a cleaner whose cooldown just started."""
+    deadline_scheduler.schedule(DEADLINE_COOLDOWN, cleaner_id, expires_at)
+
+
+def schedule_payment_timeout(booking: Booking) -> None:
+    """Arm the auto-cancel check for a booking awaiting payment."""
+    created_at = booking.created_at or datetime.now(timezone.utc)
+    deadline_scheduler.schedule(
+        DEADLINE_PAYMENT,
+        booking.id,
+        created_at + timedelta(minutes=SLAMonitor.PAYMENT_TIMEOUT_MINUTES)
+    )
+
+
+async def _on_sla_deadlines(db: Session, job_ids: List[int]) -> None:
+    """Deadline handler: alert on jobs whose start SLA or escalation step just passed."""
+    await SLAMonitor(db, fence=background_leader.check_fencing).check_and_alert(job_ids)
+
+
+async def _on_cooldown_deadlines(db: Session, cleaner_ids: List[int]) -> None:
+    """Deadline handler: release cleaners whose cooldown just expired."""
+    SLAMonitor(db, fence=background_leader.check_fencing).release_expired_cooldowns(cleaner_ids)
+
+
+async def _on_payment_deadlines(db: Session, booking_ids: List[int]) -> None:
+    """Deadline handler: cancel bookings whose payment window just closed."""
+    SLAMonitor(db, fence=background_leader.check_fencing).cancel_unpaid_bookings(booking_ids)
+
+
 # Background task runner
 class BackgroundTaskRunner:
     """
     Runs background monitoring tasks.
+
+    The outbox relay and the deadline forwarder run in every worker.
+    Deadline checks, the deadline intake and resync, the offline-cleaner
+    checker, the idempotency key purge and the live counter reconciler run
+    only in the worker holding the background-tasks leadership; another
+    worker takes over within LeaderElector.RETRY_INTERVAL_SECONDS if the
+    leader goes away.
+
+    Deadlines scheduled outside the leader are written to the outbox as
+    deadline.scheduled events (never published) by the forwarder, and the
+    leader's intake schedules them as it reads the outbox forward by id.
+    The resync only catches what that misses (a forwarder crash, an outbox
+    row committed behind the intake's position).
     """
     
     def __init__(self):
         self._running = False
         self._tasks: List[asyncio.Task] = []
+        self._leader_tasks: List[asyncio.Task] = []
     
     async def start(self, db_session_factory):
         """Start background tasks."""
         self._running = True
         
-        # Start SLA monitoring task
-        self._tasks.append(
-            asyncio.create_task(self._run_sla_monitor(db_session_factory))
-        )
+        # SLA, cooldown and payment checks fire from the deadline scheduler
+        deadline_scheduler.register(DEADLINE_SLA_START, _on_sla_deadlines)
+        deadline_scheduler.register(DEADLINE_COOLDOWN, _on_cooldown_deadlines)
+        deadline_scheduler.register(DEADLINE_PAYMENT, _on_payment_deadlines)
         
-        # Start cooldown release task
+        # Contend for leadership; the leader starts the singleton tasks
         self._tasks.append(
-            asyncio.create_task(self._run_cooldown_releaser(db_session_factory))
+            asyncio.create_task(self._run_leader_election(db_session_factory))
         )
 
-        # Start payment timeout checker
+        # Start outbox relay (delivers events committed by request handlers)
         self._tasks.append(
-            asyncio.create_task(self._run_payment_timeout_checker(db_session_factory))
+            asyncio.create_task(outbox_relay.run(db_session_factory, lambda: self._running))
         )
 
-        # Start offline cleaner alert checker
+        # Hand deadlines scheduled in this worker to the leader
         self._tasks.append(
-            asyncio.create_task(self._run_offline_cleaner_checker(db_session_factory))
+            asyncio.create_task(self._run_deadline_forwarder(db_session_factory))
         )
 
         logger.info("Background tasks started")
@@ -346,87 +762,194 @@ class BackgroundTaskRunner:
         self._tasks.clear()
         logger.info("Background tasks stopped")
     
-    async def _run_sla_monitor(self, db_session_factory):
-        """Run SLA monitoring every 30 seconds."""
-        while self._running:
+    def _is_leading(self) -> bool:
+        return self._running and background_leader.is_leader
+    
+    def _start_leader_tasks(self, db_session_factory) -> None:
+        """Start the tasks that must run in a single worker."""
+        deadline_scheduler.activate()
+        self._leader_tasks = [
+            asyncio.create_task(deadline_scheduler.run(db_session_factory, self._is_leading)),
+            # Load deadlines from the database now, then forwarded ones as they arrive
+            asyncio.create_task(self._run_deadline_resync(db_session_factory)),
+            asyncio.create_task(self._run_deadline_intake(db_session_factory)),
+            asyncio.create_task(self._run_offline_cleaner_checker(db_session_factory)),
+            asyncio.create_task(self._run_idempotency_key_purge(db_session_factory)),
+            asyncio.create_task(self._run_partition_maintenance(db_session_factory)),
+            # Correct drift in the live dashboard counters
+            asyncio.create_task(live_counters.run_reconciler(AsyncSessionLocal, self._is_leading)),
+        ]
+    
+    async def _stop_leader_tasks(self) -> None:
+        """Stop singleton tasks after losing (or giving up) leadership."""
+        deadline_scheduler.deactivate()
+        for task in self._leader_tasks:
+            task.cancel()
+        await asyncio.gather(*self._leader_tasks, return_exceptions=True)
+        self._leader_tasks = []
+    
+    async def _run_leader_election(self, db_session_factory):
+        """Acquire or renew leadership every few seconds."""
+        try:
+            while self._running:
+                try:
+                    if background_leader.is_leader:
+                        if not background_leader.renew():
+                            await self._stop_leader_tasks()
+                    elif background_leader.try_acquire():
+                        self._start_leader_tasks(db_session_factory)
+                except Exception as e:
+                    logger.error(f"Leader election error: {e}")
+                
+                await asyncio.sleep(LeaderElector.RETRY_INTERVAL_SECONDS)
+        finally:
+            await self._stop_leader_tasks()
+            background_leader.release()
+    
+    async def _run_deadline_resync(self, db_session_factory):
+        """Load all deadlines on taking leadership, then rows changed since each pass."""
+        since = None
+        while self._is_leading():
+            started = datetime.now(timezone.utc)
             try:
                 db = db_session_factory()
                 try:
-                    monitor = SLAMonitor(db)
-                    await monitor.check_and_alert()
+                    scheduled = SLAMonitor(db).schedule_deadlines(since)
+                    if since and scheduled:
+                        logger.info(f"Deadline resync: {scheduled} deadlines missed by forwarding")
+                    since = started - timedelta(seconds=SLAMonitor.DEADLINE_RESYNC_OVERLAP_SECONDS)
                 finally:
                     db.close()
             except Exception as e:
-                logger.error(f"SLA monitor error: {e}")
-            
-            await asyncio.sleep(SLAMonitor.CHECK_INTERVAL_SECONDS)
-    
-    async def _run_cooldown_releaser(self, db_session_factory):
-        """Release expired cooldowns every 60 seconds."""
-        while self._running:
+                logger.error(f"Deadline resync error: {e}")
+
+            await asyncio.sleep(SLAMonitor.DEADLINE_RESYNC_SECONDS)
+
+    async def _run_deadline_intake(self, db_session_factory):
+        """Schedule deadlines other workers forwarded through the outbox."""
+        after_id = None
+        while self._is_leading():
             try:
                 db = db_session_factory()
                 try:
-                    monitor = SLAMonitor(db)
-                    released = monitor.release_expired_cooldowns()
-                    if released > 0:
-                        logger.info(f"Released {released} cleaners from cooldown")
+                    if after_id is None:
+                        # Earlier deadlines are loaded by the resync's first pass
+                        after_id = db.query(func.max(EventOutbox.id)).scalar() or 0
+                    while True:
+                        events = replay_events(
+                            db, after_id, SLAMonitor.BULK_CHUNK_SIZE, [EventType.DEADLINE_SCHEDULED.value]
+                        )
+                        for event in events:
+                            for deadline in event["payload"]["deadlines"]:
+                                deadline_scheduler.schedule(
+                                    deadline["kind"],
+                                    deadline["key"],
+                                    datetime.fromisoformat(deadline["due_at"])
+                                )
+                            after_id = event["id"]
+                        if len(events) < SLAMonitor.BULK_CHUNK_SIZE:
+                            break
                 finally:
                     db.close()
             except Exception as e:
-                logger.error(f"Cooldown releaser error: {e}")
+                logger.error(f"Deadline intake error: {e}")
 
-            await asyncio.sleep(60)
+            await asyncio.sleep(SLAMonitor.DEADLINE_INTAKE_POLL_SECONDS)
 
-    async def _run_payment_timeout_checker(self, db_session_factory):
-        """Cancel unpaid bookings every 5 minutes."""
+    async def _run_deadline_forwarder(self, db_session_factory):
+        """Write deadlines scheduled while not leading to the outbox for the leader."""
         while self._running:
+            deadlines = await deadline_scheduler.wait_forwarded(SLAMonitor.DEADLINE_FORWARD_MAX_WAIT_SECONDS)
+            if not deadlines:
+                continue
             try:
                 db = db_session_factory()
                 try:
-                    monitor = SLAMonitor(db)
-                    cancelled = monitor.cancel_unpaid_bookings()
-                    if cancelled > 0:
-                        # Publish events for cancelled bookings
-                        await event_publisher.publish(
-                            EventType.JOB_CANCELLED,
-                            {
-                                "reason": "payment_timeout",
-                                "count": cancelled,
-                                "message": f"{cancelled} bookings auto-cancelled due to payment timeout"
-                            }
-                        )
+                    enqueue_event(db, EventType.DEADLINE_SCHEDULED, {
+                        "deadlines": [
+                            {"kind": kind, "key": key, "due_at": due_at.isoformat()}
+                            for kind, key, due_at in deadlines
+                        ],
+                    }, publish=False)
+                    db.commit()
                 finally:
                     db.close()
             except Exception as e:
-                logger.error(f"Payment timeout checker error: {e}")
-
-            await asyncio.sleep(300)  # Check every 5 minutes
+                # The leader's resync still picks these up
+                logger.error(f"Deadline forwarding of {len(deadlines)} deadlines failed: {e}")
 
     async def _run_offline_cleaner_checker(self, db_session_factory):
         """Check for offline cleaners with active jobs every 2 minutes."""
-        while self._running:
+        while self._is_leading():
             try:
                 db = db_session_factory()
                 try:
+                    background_leader.check_fencing(db)
                     monitor = SLAMonitor(db)
                     alerts = monitor.detect_offline_cleaners_with_active_jobs()
-                    if alerts:
-                        # Publish alert for each problematic situation
-                        for alert in alerts:
-                            await event_publisher.publish(
-                                EventType.CLEANER_OFFLINE_ALERT,
-                                alert
-                            )
+
+                    # One alert per job and cleaner per check window, across workers
+                    window = int(
+                        datetime.now(timezone.utc).timestamp() // SLAMonitor.OFFLINE_CHECK_INTERVAL_SECONDS
+                    )
+                    staged = 0
+                    for alert in alerts:
+                        if enqueue_event(
+                            db,
+                            EventType.CLEANER_OFFLINE_ALERT,
+                            alert,
+                            dedup_key=f"cleaner.offline_alert:{alert['job_id']}:{alert['cleaner_id']}:{window}"
+                        ):
+                            staged += 1
+
+                    db.commit()
+                    if staged:
+                        outbox_relay.notify()
                         logger.warning(
-                            f"Offline cleaner alert: {len(alerts)} cleaners offline with active jobs"
+                            f"Offline cleaner alert: {staged} cleaners offline with active jobs"
                         )
                 finally:
                     db.close()
             except Exception as e:
                 logger.error(f"Offline cleaner checker error: {e}")
 
-            await asyncio.sleep(120)  # Check every 2 minutes
+            await asyncio.sleep(SLAMonitor.OFFLINE_CHECK_INTERVAL_SECONDS)
+
+
+    async def _run_idempotency_key_purge(self, db_session_factory):
+        """Delete expired idempotency keys every hour, in chunks."""
+        while self._is_leading():
+            try:
+                db = db_session_factory()
+                try:
+                    purged = 0
+                    while self._is_leading():
+                        deleted = purge_expired_keys(db, SLAMonitor.BULK_CHUNK_SIZE)
+                        purged += deleted
+                        if deleted < SLAMonitor.BULK_CHUNK_SIZE:
+                            break
+                    if purged:
+                        logger.info(f"Purged {purged} expired idempotency keys")
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Idempotency key purge error: {e}")
+
+            await asyncio.sleep(SLAMonitor.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+
+    async def _run_partition_maintenance(self, db_session_factory):
+        """Create upcoming monthly partitions and archive or drop old ones daily."""
+        while self._is_leading():
+            try:
+                db = db_session_factory()
+                try:
+                    partition_manager.maintain(db)
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Partition maintenance error: {e}")
+
+            await asyncio.sleep(SLAMonitor.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
 
 
 # Global background task runner
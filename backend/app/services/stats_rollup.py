@@ -0,0 +1,224 @@
+"""
+Stats Rollups
+
+Admin stats are polled by every open dashboard, so each set of numbers
+comes from a single aggregate statement (FILTER (WHERE ...) per counter,
+scalar subqueries for other tables).
+
+/bookings/admin/stats serves its aggregate as a rollup shared by all
+workers through cache_service. /admin/stats/realtime reads live counters
+instead (see live_counters); compute_realtime_stats() reconciles them.
+
+A rollup is recomputed when:
+- an event that can change it is delivered (the cached value is
+  dropped, so the next poll recomputes it), or
+- its TTL expires, which bounds staleness for changes that publish no
+  event.
+
+Concurrent misses in one worker share a single recompute, so polling cost
+is at most one aggregate per rollup per event or TTL, however many
+dashboards are open.
+
+Usage:
+    stats = await booking_stats.get(db)
+    subscribe_stats_rollups()  # once, at startup
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    Booking, BookingStatus, PaymentStatus, CleanerProfile, CleanerStatus,
+    SLAAlert, User, UserRole
+)
+from app.services.cache import cache_service
+from app.services.events import event_publisher, EventType
+
+logger = logging.getLogger(__name__)
+
+JOB_EVENTS = (
+    EventType.JOB_CREATED,
+    EventType.JOB_ASSIGNED,
+    EventType.JOB_STARTED,
+    EventType.JOB_PAUSED,
+    EventType.JOB_RESUMED,
+    EventType.JOB_COMPLETED,
+    EventType.JOB_CANCELLED,
+    EventType.JOB_FAILED,
+    EventType.JOB_DELAYED,
+)
+
+class StatsRollup:
+    """
+    Cached result of one stats aggregate.
+
+    compute runs the aggregate and returns a JSON-serializable dict.
+    """
+
+    KEY_PREFIX = "stats:rollup:"
+
+    def __init__(
+        self,
+        name: str,
+        compute: Callable[[AsyncSession], Awaitable[Dict[str, Any]]],
+        ttl_seconds: int,
+        invalidated_by: Iterable[EventType]
+    ):
+        self.name = name
+        self.key = f"{self.KEY_PREFIX}{name}"
+        self.ttl_seconds = ttl_seconds
+        self.invalidated_by = tuple(invalidated_by)
+        self._compute = compute
+        self._lock = asyncio.Lock()
+        self._generation = 0
+        self._subscribed = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, db: AsyncSession) -> Dict[str, Any]:
+        """Cached rollup, recomputed with db on a miss."""
+        cached = await self._read()
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        async with self._lock:
+            # Another request may have refreshed it while we waited
+            cached = await self._read()
+            if cached is not None:
+                self.hits += 1
+                return cached
+            return await self._refresh(db)
+
+    async def invalidate(self, event=None) -> None:
+        """Drop the cached rollup; usable directly as an event handler."""
+        self.invalidations += 1
+        self._generation += 1
+        await cache_service.delete(self.key)
+
+    def subscribe(self) -> None:
+        """Invalidate on the rollup's events. Safe to call more than once."""
+        if self._subscribed:
+            return
+        for event_type in self.invalidated_by:
+            event_publisher.subscribe(event_type, self.invalidate)
+        self._subscribed = True
+
+    async def _read(self) -> Optional[Dict[str, Any]]:
+        raw = await cache_service.get(self.key)
+        return json.loads(raw) if raw else None
+
+    async def _refresh(self, db: AsyncSession) -> Dict[str, Any]:
+        self.misses += 1
+        generation = self._generation
+        started = time.perf_counter()
+        values = await self._compute(db)
+        logger.debug(f"Stats rollup {self.name} computed in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        # An event delivered mid-compute may not be reflected; serve these
+        # values to this request but leave the cache empty for the next one
+        if generation == self._generation:
+            await cache_service.set(self.key, json.dumps(values), ttl=self.ttl_seconds)
+        return values
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+# ============ Booking stats (/bookings/admin/stats) ============
+
+async def compute_booking_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Booking counters, paid revenue and customer count in one statement."""
+    customers = (
+        select(func.count(User.id))
+        .where(User.role == UserRole.CUSTOMER)
+        .scalar_subquery()
+    )
+    row = (await db.execute(select(
+        func.count(Booking.id).label("total_bookings"),
+        func.count(Booking.id).filter(Booking.status == BookingStatus.PENDING).label("pending_bookings"),
+        func.count(Booking.id).filter(Booking.status == BookingStatus.CONFIRMED).label("confirmed_bookings"),
+        func.count(Booking.id).filter(Booking.status == BookingStatus.COMPLETED).label("completed_bookings"),
+        func.sum(Booking.total_price).filter(Booking.payment_status == PaymentStatus.PAID).label("total_revenue"),
+        customers.label("total_customers"),
+    ))).one()
+
+    return {
+        "total_bookings": row.total_bookings or 0,
+        "pending_bookings": row.pending_bookings or 0,
+        "confirmed_bookings": row.confirmed_bookings or 0,
+        "completed_bookings": row.completed_bookings or 0,
+        "total_customers": row.total_customers or 0,
+        "total_revenue": float(row.total_revenue or 0),
+    }
+
+
+# ============ Dashboard stats (live counter reconcile) ============
+
+async def compute_realtime_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Live dashboard counters in one statement."""
+    now = datetime.now(timezone.utc)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    completed_today = (Booking.status == BookingStatus.COMPLETED) & (Booking.actual_end_time >= today_start)
+
+    def cleaners(status: CleanerStatus):
+        return (
+            select(func.count(CleanerProfile.id))
+            .where(CleanerProfile.status == status)
+            .scalar_subquery()
+        )
+
+    open_alerts = (
+        select(func.count(SLAAlert.id))
+        .where(SLAAlert.resolved_at == None)
+        .scalar_subquery()
+    )
+
+    row = (await db.execute(select(
+        func.count(Booking.id).filter(Booking.status.in_([
+            BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED
+        ])).label("active_jobs_count"),
+        cleaners(CleanerStatus.AVAILABLE).label("available_cleaners_count"),
+        cleaners(CleanerStatus.BUSY).label("busy_cleaners_count"),
+        open_alerts.label("delayed_jobs_count"),
+        func.count(Booking.id).filter(Booking.status.in_([
+            BookingStatus.PENDING_ASSIGNMENT, BookingStatus.CONFIRMED
+        ])).label("pending_assignment_count"),
+        func.count(Booking.id).filter(completed_today).label("completed_today_count"),
+        func.sum(Booking.total_price).filter(completed_today).label("revenue_today"),
+    ))).one()
+
+    return {
+        "active_jobs_count": row.active_jobs_count or 0,
+        "available_cleaners_count": row.available_cleaners_count or 0,
+        "busy_cleaners_count": row.busy_cleaners_count or 0,
+        "delayed_jobs_count": row.delayed_jobs_count or 0,
+        "pending_assignment_count": row.pending_assignment_count or 0,
+        "completed_today_count": row.completed_today_count or 0,
+        "revenue_today": float(row.revenue_today or 0),
+    }
+
+
+# Sign-ups publish no events, so the TTL bounds the customer count's staleness
+booking_stats = StatsRollup(
+    "bookings",
+    compute_booking_stats,
+    ttl_seconds=30,
+    invalidated_by=JOB_EVENTS + (EventType.PAYMENT_CONFIRMED,),
+)
+
+
+def subscribe_stats_rollups() -> None:
+    """Register rollup invalidation with the event publisher."""
+    booking_stats.subscribe()
@@ -3,28 +3,181 @@ WebSocket Manager
 
 Manages WebSocket connections for real-time updates.
 Supports multiple channels: admin dashboard, cleaner app, customer notifications.
+
+Each connection gets a bounded send queue drained by its own writer task,
+so broadcasts serialize a message once and never wait on a slow client.
+A heartbeat loop pings idle sockets and reaps connections that stop
+responding, so half-open sockets do not linger in the routing tables.
+
+Frames are encoded per negotiated encoding (JSON by default, MessagePack
+or CBOR on request; see ws_protocol). Dashboard stats are sent as
+versioned deltas against a server-side snapshot.
 """
 import asyncio
+import time
 from datetime import datetime, timezone
-from typing import Dict, Set, Optional, Any
+from typing import Dict, Set, Optional, Any, Iterable, Tuple, Union
 from fastapi import WebSocket, WebSocketDisconnect
-import json
 import logging
 
+from app.config import settings
 from app.services.events import event_publisher, Event, EventType
+from app.services.event_coalescer import EventCoalescer
+from app.services.ws_protocol import encode_frame, JSON
 
 logger = logging.getLogger(__name__)
 
+# An encoded frame: text for JSON, bytes for binary encodings
+Frame = Union[str, bytes]
+
+
+class ClientConnection:
+    """
+    A WebSocket plus its bounded outbound queue and writer task.
+
+    Producers enqueue pre-encoded frames without awaiting the network.
+    When the queue is full the frame is dropped and the client is marked
+    lagging; it receives a resync notice once it catches up, and is
+    disconnected if it keeps overflowing.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: Optional[int],
+        queue_size: int,
+        encoding: str = JSON
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+        # Server-side filters: channel -> event type patterns ("job.*", "cleaner.status_changed")
+        self.filters: Dict[str, Tuple[str, ...]] = {}
+
+        # Backpressure tracking
+        self.lagging = False
+        self.dropped_messages = 0
+        self.overflow_count = 0
+
+        # Liveness and traffic accounting
+        self.connected_at = datetime.now(timezone.utc)
+        self.last_activity = time.monotonic()
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.messages_received = 0
+
+    def touch(self) -> None:
+        """Record inbound traffic from the client."""
+        self.last_activity = time.monotonic()
+        self.messages_received += 1
+
+    def idle_seconds(self) -> float:
+        """Seconds since the client last sent anything."""
+        return time.monotonic() - self.last_activity
+
+    def record_sent(self, message: Frame) -> None:
+        """Account for a frame written to the socket."""
+        self.messages_sent += 1
+        self.bytes_sent += len(message)
+
+    def to_dict(self, channels: Iterable[str] = ()) -> Dict[str, Any]:
+        """Per-connection metrics for the stats endpoint."""
+        return {
+            "user_id": self.user_id,
+            "encoding": self.encoding,
+            "channels": sorted(channels),
+            "connected_at": self.connected_at.isoformat(),
+            "idle_seconds": round(self.idle_seconds(), 1),
+            "queue_depth": self.queue.qsize(),
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "messages_received": self.messages_received,
+            "dropped_messages": self.dropped_messages,
+            "lagging": self.lagging,
+        }
+
+    def enqueue(self, message: Frame) -> bool:
+        """Queue an encoded frame; returns False if it was dropped."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped_messages += 1
+            if not self.lagging:
+                self.lagging = True
+                self.overflow_count += 1
+            return False
+
+    def accepts(self, channel: str, event_type: str) -> bool:
+        """Check an event against this connection's filter for the channel it matched on."""
+        patterns = self.filters.get(channel)
+        if not patterns:
+            return True
+        for pattern in patterns:
+            if pattern.endswith("*"):
+                if event_type.startswith(pattern[:-1]):
+                    return True
+            elif event_type == pattern:
+                return True
+        return False
+
 
 class ConnectionManager:
     """
     Manages WebSocket connections with channel-based routing.
     
     Channels:
-    - admin: Admin dashboard real-time updates
+    - admin: Admin dashboard real-time updates (fleet-wide)
+    - region:{code}: Job and cleaner events for one region (e.g. region:DXB)
+    - job:{job_id}: Events for a single job
+    - dashboard:stats: Coalesced dashboard statistics
     - cleaner:{user_id}: Cleaner-specific updates
     - customer:{user_id}: Customer-specific updates
+
+    Events are routed to every topic they belong to and each socket receives
+    a given event at most once, after its per-channel filter is applied.
+
+    High-frequency streams (cleaner locations, dashboard stats) go through
+    the coalescer and reach subscribers as batched frames once per tick.
+    Location batches go to "admin" and to the cleaner's region channel.
+
+    Aggregated events (bulk changes, batched cleaner releases) are routed
+    by their job_ids, regions and cleaner_ids lists, and bulk job changes
+    to each job's cleaner and customer by their participants list.
     """
+
+    # Event types delivered as coalesced field deltas instead of one frame each
+    COALESCED_EVENT_TYPES = {EventType.STATS_UPDATED}
+
+    # Channel carrying coalesced stats; every admin connection is subscribed to it
+    STATS_CHANNEL = "dashboard:stats"
+
+    # Job lifecycle events also delivered to the cleaner's and customer's channels
+    PARTICIPANT_EVENT_TYPES = {
+        EventType.JOB_ASSIGNED,
+        EventType.JOB_STARTED,
+        EventType.JOB_COMPLETED,
+        EventType.JOB_CANCELLED,
+        EventType.JOB_FAILED,
+    }
+
+    # Channel prefixes an admin connection may subscribe to
+    ADMIN_CHANNEL_PREFIXES = ("region:", "job:", "cleaner:", "customer:")
+
+    # Outbound frames buffered per connection before it counts as a slow consumer
+    SEND_QUEUE_SIZE = 256
+
+    # Slow consumers are disconnected after this many overflow episodes
+    MAX_OVERFLOWS = 3
+
+    # Close code used when a connection misses its heartbeat deadline
+    HEARTBEAT_CLOSE_CODE = 4408
     
     _instance: Optional['ConnectionManager'] = None
     
@@ -47,6 +200,28 @@ class ConnectionManager:
         
         # User ID -> WebSocket mapping
         self._user_connections: Dict[int, Set[WebSocket]] = {}
+
+        # WebSocket -> send queue and writer task
+        self._connections: Dict[WebSocket, ClientConnection] = {}
+
+        # Latest-value buffer for high-frequency updates
+        self.coalescer = EventCoalescer(
+            send=self._send_coalesced,
+            flush_interval=settings.WS_COALESCE_INTERVAL_SECONDS,
+            max_frames_per_second=settings.WS_CHANNEL_MAX_FRAMES_PER_SECOND
+        )
+
+        self.heartbeat_interval = settings.WS_HEARTBEAT_INTERVAL_SECONDS
+        self.heartbeat_timeout = settings.WS_HEARTBEAT_TIMEOUT_SECONDS
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._reaped_connections = 0
+
+        # Dashboard stats snapshot; each delta frame bumps the version by one
+        self._stats_state: Dict[str, Any] = {}
+        self._stats_version = 0
+
+        # Cleaner ID -> region code, from connect-time lookups and job events
+        self._cleaner_regions: Dict[str, str] = {}
         
         self._initialized = True
         
@@ -57,10 +232,16 @@ class ConnectionManager:
         self,
         websocket: WebSocket,
         channel: str,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        encoding: str = JSON
     ) -> None:
-        """Accept and register a WebSocket connection."""
+        """Accept and register a WebSocket connection using a negotiated encoding."""
         await websocket.accept()
+
+        # Start the per-connection writer
+        connection = ClientConnection(websocket, user_id, self.SEND_QUEUE_SIZE, encoding)
+        connection.writer = asyncio.create_task(self._writer(connection))
+        self._connections[websocket] = connection
         
         # Add to channel
         if channel not in self._channels:
@@ -84,11 +265,19 @@ class ConnectionManager:
         await self.send_personal(websocket, {
             "type": "connected",
             "channel": channel,
+            "encoding": encoding,
             "timestamp": datetime.now(timezone.utc).isoformat()
         })
     
     def disconnect(self, websocket: WebSocket, user_id: Optional[int] = None) -> None:
         """Remove a WebSocket connection."""
+        connection = self._connections.pop(websocket, None)
+        if connection:
+            connection.closed = True
+            user_id = user_id or connection.user_id
+            if connection.writer and connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
+        
         # Remove from all subscribed channels
         if websocket in self._subscriptions:
             for channel in self._subscriptions[websocket]:
@@ -106,25 +295,197 @@ class ConnectionManager:
         
         logger.info(f"WebSocket disconnected: user_id={user_id}")
     
-    async def subscribe(self, websocket: WebSocket, channel: str) -> None:
-        """Subscribe a connection to an additional channel."""
+    async def _writer(self, connection: ClientConnection) -> None:
+        """Drain a connection's send queue to its socket."""
+        websocket = connection.websocket
+        try:
+            while True:
+                message = await connection.queue.get()
+                await self._send_frame(connection, message)
+
+                # Client caught up after overflowing: tell it to refetch state
+                if connection.lagging and connection.queue.empty():
+                    connection.lagging = False
+                    await self._send_frame(connection, encode_frame({
+                        "type": "resync",
+                        "dropped_messages": connection.dropped_messages,
+                        "timestamp": datetime.now(timezone.utc).isoformat()
+                    }, connection.encoding))
+
+                    # Stats deltas were lost with the dropped frames; restart from a snapshot
+                    if self.STATS_CHANNEL in self._subscriptions.get(websocket, ()):
+                        await self._send_frame(
+                            connection,
+                            encode_frame(self.stats_snapshot(), connection.encoding)
+                        )
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error writing to WebSocket: {e}")
+            self.disconnect(websocket)
+    
+    async def _send_frame(self, connection: ClientConnection, message: Frame) -> None:
+        """Write one encoded frame, as binary or text depending on its type."""
+        if isinstance(message, bytes):
+            await connection.websocket.send_bytes(message)
+        else:
+            await connection.websocket.send_text(message)
+        connection.record_sent(message)
+    
+    def record_activity(self, websocket: WebSocket) -> None:
+        """Mark a connection alive; called for every message the client sends."""
+        connection = self._connections.get(websocket)
+        if connection:
+            connection.touch()
+    
+    async def _heartbeat(self) -> None:
+        """Ping quiet connections and reap those silent past the timeout."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                self.reap_idle_connections()
+            except Exception as e:
+                logger.error(f"WebSocket heartbeat error: {e}")
+    
+    def reap_idle_connections(self) -> int:
+        """
+        Run one heartbeat pass.
+
+        Connections idle longer than the heartbeat interval get a server ping;
+        connections idle past the timeout are disconnected and closed.
+        Returns the number of connections reaped.
+        """
+        reaped = 0
+        idle_sockets = []
+        for websocket, connection in list(self._connections.items()):
+            idle = connection.idle_seconds()
+            if idle >= self.heartbeat_timeout:
+                logger.info(
+                    f"Reaping idle WebSocket: user_id={connection.user_id}, idle={idle:.0f}s"
+                )
+                self.disconnect(websocket)
+                asyncio.create_task(
+                    self._close_quietly(websocket, self.HEARTBEAT_CLOSE_CODE, "Heartbeat timeout")
+                )
+                reaped += 1
+            elif idle >= self.heartbeat_interval:
+                idle_sockets.append(websocket)
+        
+        if idle_sockets:
+            self._fan_out(idle_sockets, {
+                "type": "ping",
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            })
+        
+        self._reaped_connections += reaped
+        return reaped
+    
+    def _deliver(self, websocket: WebSocket, message: Frame) -> None:
+        """Queue an encoded frame for one socket, evicting persistent slow consumers."""
+        connection = self._connections.get(websocket)
+        if not connection:
+            return
+        
+        if not connection.enqueue(message) and connection.overflow_count >= self.MAX_OVERFLOWS:
+            logger.warning(
+                f"Dropping slow WebSocket consumer: user_id={connection.user_id}, "
+                f"dropped={connection.dropped_messages}"
+            )
+            self.disconnect(websocket)
+            asyncio.create_task(self._close_quietly(websocket, 1013, "Client too slow"))
+    
+    def _fan_out(self, websockets: Iterable[WebSocket], data: Dict[str, Any]) -> int:
+        """
+        Queue one message for many sockets.
+
+        The message is encoded once per encoding in use, not once per socket.
+        Returns the number of sockets it was queued for.
+        """
+        encoded: Dict[str, Frame] = {}
+        delivered = 0
+        for websocket in websockets:
+            connection = self._connections.get(websocket)
+            if not connection:
+                continue
+            message = encoded.get(connection.encoding)
+            if message is None:
+                message = encoded[connection.encoding] = encode_frame(data, connection.encoding)
+            self._deliver(websocket, message)
+            delivered += 1
+        return delivered
+    
+    async def _close_quietly(self, websocket: WebSocket, code: int, reason: str) -> None:
+        """Close a socket, ignoring errors from already-dead connections."""
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+    
+    @classmethod
+    def is_valid_admin_channel(cls, channel: str) -> bool:
+        """Check that a channel name is one the server actually publishes to."""
+        from app.models.employee import RegionCode
+
+        if channel in ("admin", cls.STATS_CHANNEL):
+            return True
+        if not channel.startswith(cls.ADMIN_CHANNEL_PREFIXES):
+            return False
+
+        prefix, _, key = channel.partition(":")
+        if not key:
+            return False
+        if prefix == "region":
+            return key in RegionCode.__members__
+        if prefix == "job":
+            return key.isdigit()
+        return True
+    
+    async def subscribe(
+        self,
+        websocket: WebSocket,
+        channel: str,
+        event_types: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Subscribe a connection to an additional channel.
+
+        event_types optionally restricts what the connection receives through
+        this channel; entries ending in "*" match by prefix (e.g. "job.*").
+        """
         if channel not in self._channels:
             self._channels[channel] = set()
         self._channels[channel].add(websocket)
         
         if websocket in self._subscriptions:
             self._subscriptions[websocket].add(channel)
+        
+        connection = self._connections.get(websocket)
+        if connection:
+            if event_types:
+                connection.filters[channel] = tuple(event_types)
+            else:
+                connection.filters.pop(channel, None)
     
     async def unsubscribe(self, websocket: WebSocket, channel: str) -> None:
         """Unsubscribe a connection from a channel."""
         if channel in self._channels:
             self._channels[channel].discard(websocket)
+            if not self._channels[channel]:
+                del self._channels[channel]
         
         if websocket in self._subscriptions:
             self._subscriptions[websocket].discard(channel)
+        
+        connection = self._connections.get(websocket)
+        if connection:
+            connection.filters.pop(channel, None)
     
     async def send_personal(self, websocket: WebSocket, data: Dict[str, Any]) -> None:
         """Send message to a specific connection."""
+        if websocket in self._connections:
+            self._fan_out((websocket,), data)
+            return
+        
         try:
             await websocket.send_json(data)
         except Exception as e:
@@ -135,75 +496,213 @@ class ConnectionManager:
         if channel not in self._channels:
             return
         
-        disconnected = []
-        for websocket in self._channels[channel]:
-            try:
-                await websocket.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting to WebSocket: {e}")
-                disconnected.append(websocket)
-        
-        # Clean up disconnected sockets
-        for ws in disconnected:
-            self.disconnect(ws)
+        # Encode once per encoding, then hand the same frame to every writer
+        await self.publish_to_topics([channel], data.get("type", ""), data)
     
     async def send_to_user(self, user_id: int, data: Dict[str, Any]) -> None:
         """Send message to all connections of a specific user."""
         if user_id not in self._user_connections:
             return
         
-        disconnected = []
-        for websocket in self._user_connections[user_id]:
-            try:
-                await websocket.send_json(data)
-            except Exception as e:
-                logger.error(f"Error sending to user {user_id}: {e}")
-                disconnected.append(websocket)
+        self._fan_out(list(self._user_connections.get(user_id, ())), data)
+    
+    def stats_snapshot(self) -> Dict[str, Any]:
+        """Full dashboard stats at the current version, for (re)synchronizing clients."""
+        return {
+            "type": "stats.snapshot",
+            "version": self._stats_version,
+            "payload": dict(self._stats_state),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+    
+    def _stats_delta(self, frame: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Reduce a coalesced stats frame to the fields that changed since the snapshot.
+
+        Returns None when nothing changed. Clients apply deltas in version
+        order and request a snapshot if base_version is not the version they hold.
+        """
+        changes = {
+            field_name: value
+            for field_name, value in frame["payload"].items()
+            if field_name not in self._stats_state or self._stats_state[field_name] != value
+        }
+        if not changes:
+            return None
         
-        # Clean up disconnected sockets
-        for ws in disconnected:
-            self.disconnect(ws, user_id)
+        self._stats_state.update(changes)
+        self._stats_version += 1
+        return {
+            "type": frame["type"],
+            "delta": True,
+            "base_version": self._stats_version - 1,
+            "version": self._stats_version,
+            "payload": changes,
+            "timestamp": frame["timestamp"]
+        }
     
-    async def _handle_event(self, event: Event) -> None:
-        """Handle events from the event publisher and broadcast to appropriate channels."""
-        event_data = event.to_dict()
-        
-        # Always broadcast to admin channel
-        await self.broadcast_to_channel("admin", event_data)
-        
-        # Route to specific channels based on event type
-        if event.type in [
-            EventType.JOB_ASSIGNED,
-            EventType.JOB_STARTED,
-            EventType.JOB_COMPLETED,
-            EventType.JOB_CANCELLED,
-            EventType.JOB_FAILED
-        ]:
-            # Send to assigned cleaner
-            cleaner_id = event.payload.get("cleaner_id")
+    async def _send_coalesced(self, channel: str, frame: Dict[str, Any]) -> None:
+        """Deliver a coalesced frame, turning dashboard stats into versioned deltas."""
+        if channel == self.STATS_CHANNEL and frame["type"] == EventType.STATS_UPDATED.value:
+            frame = self._stats_delta(frame)
+            if frame is None:
+                return
+        await self.broadcast_to_channel(channel, frame)
+    
+    def set_cleaner_region(self, cleaner_id: Any, region: Optional[str]) -> None:
+        """Record the region whose channel receives the cleaner's location updates."""
+        if region:
+            self._cleaner_regions[str(cleaner_id)] = region
+    
+    def queue_location_update(
+        self,
+        cleaner_id: Any,
+        latitude: Any,
+        longitude: Any
+    ) -> None:
+        """Buffer a cleaner GPS ping; only the latest per cleaner is sent each tick."""
+        update = {
+            "cleaner_id": cleaner_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        self.coalescer.offer("admin", "cleaner.location.batch", cleaner_id, update)
+        region = self._cleaner_regions.get(str(cleaner_id))
+        if region:
+            self.coalescer.offer(f"region:{region}", "cleaner.location.batch", cleaner_id, update)
+    
+    async def start(self) -> None:
+        """Start background flushing of coalesced updates and the heartbeat loop."""
+        await self.coalescer.start()
+        if not self._heartbeat_task:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+    
+    async def stop(self) -> None:
+        """Flush pending coalesced updates and stop background work."""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        
+        await self.coalescer.stop()
+        
+        writers = [c.writer for c in self._connections.values() if c.writer]
+        for writer in writers:
+            writer.cancel()
+        await asyncio.gather(*writers, return_exceptions=True)
+    
+    def _topics_for_event(self, event: Event) -> Set[str]:
+        """Resolve the channels an event belongs to from its payload."""
+        payload = event.payload
+        topics = {"admin"}
+        
+        job_id = payload.get("job_id")
+        if job_id:
+            topics.add(f"job:{job_id}")
+        topics.update(f"job:{job_id}" for job_id in payload.get("job_ids") or ())
+        
+        region = payload.get("region")
+        if region:
+            topics.add(f"region:{region}")
+        topics.update(f"region:{region}" for region in payload.get("regions") or () if region)
+        
+        cleaner_id = payload.get("cleaner_id")
+        if event.type in self.PARTICIPANT_EVENT_TYPES:
             if cleaner_id:
-                await self.broadcast_to_channel(f"cleaner:{cleaner_id}", event_data)
-            
-            # Send to customer
-            customer_id = event.payload.get("customer_id")
+                topics.add(f"cleaner:{cleaner_id}")
+            customer_id = payload.get("customer_id")
             if customer_id:
-                await self.broadcast_to_channel(f"customer:{customer_id}", event_data)
-        
+                topics.add(f"customer:{customer_id}")
+            for participant in payload.get("participants") or ():
+                if participant.get("cleaner_id"):
+                    topics.add(f"cleaner:{participant['cleaner_id']}")
+                if participant.get("customer_id"):
+                    topics.add(f"customer:{participant['customer_id']}")
         elif event.type == EventType.CLEANER_STATUS_CHANGED:
-            cleaner_id = event.payload.get("cleaner_id")
-            if cleaner_id:
-                await self.broadcast_to_channel(f"cleaner:{cleaner_id}", event_data)
+            # Cleaner events carry no region; use the one the cleaner was last seen in
+            for cleaner in ([cleaner_id] if cleaner_id else []) + list(payload.get("cleaner_ids") or ()):
+                topics.add(f"cleaner:{cleaner}")
+                if str(cleaner) in self._cleaner_regions:
+                    topics.add(f"region:{self._cleaner_regions[str(cleaner)]}")
+        
+        return topics
     
-    def get_stats(self) -> Dict[str, Any]:
-        """Get connection statistics."""
-        return {
+    async def publish_to_topics(
+        self,
+        topics: Iterable[str],
+        event_type: str,
+        data: Dict[str, Any]
+    ) -> int:
+        """
+        Deliver one message to every socket subscribed to any of the topics.
+
+        Each socket receives the message once even if it matches several
+        topics. Returns the number of sockets the message was queued for.
+        """
+        recipients: Set[WebSocket] = set()
+        for topic in topics:
+            for websocket in self._channels.get(topic, ()):
+                if websocket in recipients:
+                    continue
+                connection = self._connections.get(websocket)
+                if connection and not connection.accepts(topic, event_type):
+                    continue
+                recipients.add(websocket)
+        
+        if not recipients:
+            return 0
+        
+        return self._fan_out(recipients, data)
+    
+    async def _handle_event(self, event: Event) -> None:
+        """Handle events from the event publisher and route them to subscribed topics."""
+        # Stats change on every poll and transition; send only the latest values per tick
+        if event.type in self.COALESCED_EVENT_TYPES:
+            self.coalescer.offer_fields(self.STATS_CHANNEL, event.type.value, event.payload)
+            return
+        
+        if event.payload.get("cleaner_id") and event.payload.get("region"):
+            self.set_cleaner_region(event.payload["cleaner_id"], event.payload["region"])
+        
+        await self.publish_to_topics(
+            self._topics_for_event(event),
+            event.type.value,
+            event.to_dict()
+        )
+    
+    def get_stats(self, include_connections: bool = False) -> Dict[str, Any]:
+        """Get connection statistics, optionally with a record per connection."""
+        stats = {
             "total_connections": sum(len(conns) for conns in self._channels.values()),
             "channels": {
                 channel: len(connections)
                 for channel, connections in self._channels.items()
             },
-            "users_connected": len(self._user_connections)
+            "users_connected": len(self._user_connections),
+            "queued_messages": sum(c.queue.qsize() for c in self._connections.values()),
+            "lagging_connections": sum(1 for c in self._connections.values() if c.lagging),
+            "dropped_messages": sum(c.dropped_messages for c in self._connections.values()),
+            "messages_sent": sum(c.messages_sent for c in self._connections.values()),
+            "bytes_sent": sum(c.bytes_sent for c in self._connections.values()),
+            "reaped_connections": self._reaped_connections,
+            "encodings": {
+                encoding: sum(1 for c in self._connections.values() if c.encoding == encoding)
+                for encoding in {c.encoding for c in self._connections.values()}
+            },
+            "stats_version": self._stats_version,
+            "heartbeat": {
+                "interval_seconds": self.heartbeat_interval,
+                "timeout_seconds": self.heartbeat_timeout,
+            },
+            "coalescer": self.coalescer.get_stats()
         }
+        if include_connections:
+            stats["connections"] = [
+                connection.to_dict(self._subscriptions.get(websocket, ()))
+                for websocket, connection in self._connections.items()
+            ]
+        return stats
 
 
 # Global connection manager instance
@@ -0,0 +1,104 @@
+"""
+WebSocket Wire Protocol
+
+Encodes outbound WebSocket frames in the encoding a client negotiated.
+
+Encodings:
+- json (default): text frames, unchanged message shape
+- msgpack / cbor: binary frames with a compact envelope
+
+The compact envelope shortens the envelope keys, sends the timestamp as
+epoch milliseconds and drops the event_id (it is only needed for
+server-side deduplication):
+
+    {"type": "job.started", "payload": {...}, "timestamp": "2026-...", "event_id": "..."}
+    ->  {"t": "job.started", "p": {...}, "ts": 1792358400000}
+
+Payload contents are left as they are. A client asking for an unknown
+encoding gets JSON, and the "connected" frame reports the encoding
+actually in use.
+"""
+from datetime import datetime
+from typing import Dict, Any, Optional, Union
+
+import cbor2
+import msgpack
+import orjson
+
+
+JSON = "json"
+MSGPACK = "msgpack"
+CBOR = "cbor"
+
+# Envelope keys renamed in binary frames
+COMPACT_KEYS = {
+    "type": "t",
+    "payload": "p",
+    "timestamp": "ts",
+}
+
+# Envelope keys omitted from binary frames
+COMPACT_DROP_KEYS = {"event_id"}
+
+
+def available_encodings() -> list:
+    """Encodings this server can produce."""
+    return [JSON, MSGPACK, CBOR]
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Pick the encoding for a connection, falling back to JSON."""
+    if not requested:
+        return JSON
+    requested = requested.strip().lower()
+    if requested in (MSGPACK, CBOR):
+        return requested
+    return JSON
+
+
+def encode_message(data: Dict[str, Any]) -> str:
+    """Serialize a message as JSON text."""
+    return orjson.dumps(data, default=str).decode()
+
+
+def _epoch_ms(value: Any) -> Any:
+    """Convert an ISO timestamp to epoch milliseconds; other values pass through."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return value
+
+
+def compact_envelope(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Shorten a message envelope for binary encodings."""
+    compact = {}
+    for key, value in data.items():
+        if key in COMPACT_DROP_KEYS:
+            continue
+        if key == "timestamp":
+            value = _epoch_ms(value)
+        compact[COMPACT_KEYS.get(key, key)] = value
+    return compact
+
+
+def _cbor_default(encoder, value):
+    """Encode values CBOR has no native type for as strings."""
+    encoder.encode(str(value))
+
+
+def encode_frame(data: Dict[str, Any], encoding: str = JSON) -> Union[str, bytes]:
+    """
+    Serialize a message for one encoding.
+
+    Returns text for JSON and bytes for binary encodings, so callers can
+    pick send_text or send_bytes from the type.
+    """
+    if encoding == MSGPACK:
+        return msgpack.packb(compact_envelope(data), default=str, use_bin_type=True)
+    if encoding == CBOR:
+        return cbor2.dumps(compact_envelope(data), default=_cbor_default)
+    return encode_message(data)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark admin booking search on a synthetic dataset.
+
+Builds users/bookings tables in a scratch schema (search_bench) of the
+configured Postgres database, fills them with generate_series, then times
+the old four-way ILIKE filter against app.services.booking_search with and
+without the search indexes. The scratch schema is dropped afterwards; the
+application tables are never touched.
+
+Run with: python benchmark_booking_search.py [bookings] [users]
+Defaults: 3,000,000 bookings, 500,000 users.
+"""
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import Booking, User
+from app.services.booking_search import matching_booking_ids, search_bookings
+
+SCHEMA = "search_bench"
+REPEATS = 5
+TERMS = ["BH2401", "BH240102000001", "jane", "smith", "example.org", "971501", "zzzz"]
+
+SETUP = """
+DROP SCHEMA IF EXISTS {schema} CASCADE;
+CREATE SCHEMA {schema};
+SET search_path TO {schema}, public;
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    email VARCHAR(255) NOT NULL,
+    first_name VARCHAR(100) NOT NULL,
+    last_name VARCHAR(100) NOT NULL,
+    phone VARCHAR(20)
+);
+INSERT INTO users
+SELECT i,
+       'user' || i || '@' || (ARRAY['example.com', 'example.org', 'mail.ae'])[1 + i % 3],
+       (ARRAY['Jane', 'Omar', 'Fatima', 'John', 'Priya', 'Ahmed', 'Maria', 'Li'])[1 + i % 8] || (i % 997),
+       (ARRAY['Smith', 'Khan', 'Al Mansoori', 'Garcia', 'Nair', 'Chen', 'Haddad'])[1 + i % 7],
+       '+9715' || lpad((i * 7919 % 100000000)::text, 8, '0')
+FROM generate_series(1, {users}) AS i;
+
+CREATE TABLE bookings (
+    id INTEGER PRIMARY KEY,
+    booking_number VARCHAR(20) NOT NULL UNIQUE,
+    customer_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    payment_status VARCHAR(20) NOT NULL,
+    scheduled_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    total_price NUMERIC(10, 2) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+INSERT INTO bookings
+SELECT i,
+       'BH' || to_char(TIMESTAMP '2024-01-01' + (i % 900) * INTERVAL '1 day', 'YYMMDD')
+            || upper(lpad(to_hex(i), 6, '0')),
+       1 + (i * 31 % {users}),
+       (ARRAY['PENDING', 'ASSIGNED', 'COMPLETED', 'CANCELLED'])[1 + i % 4],
+       (ARRAY['PENDING', 'PAID'])[1 + i % 2],
+       TIMESTAMP WITH TIME ZONE '2024-01-01' + i * INTERVAL '1 minute',
+       100 + i % 400,
+       TIMESTAMP WITH TIME ZONE '2024-01-01' + i * INTERVAL '1 minute'
+FROM generate_series(1, {bookings}) AS i;
+CREATE INDEX ON bookings (customer_id);
+ANALYZE users;
+ANALYZE bookings;
+"""
+
+# Same definitions as app/migrations/add_booking_search_indexes.py
+SEARCH_INDEXES = """
+SET search_path TO {schema}, public;
+CREATE INDEX idx_bookings_number_trgm ON bookings USING gin (booking_number gin_trgm_ops);
+CREATE INDEX idx_users_email_trgm ON users USING gin (email gin_trgm_ops);
+CREATE INDEX idx_users_full_name_trgm ON users USING gin ((first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX idx_bookings_number_prefix ON bookings (booking_number varchar_pattern_ops);
+CREATE INDEX idx_users_phone_prefix ON users (phone varchar_pattern_ops);
+ANALYZE users;
+ANALYZE bookings;
+"""
+
+
+def old_filter(term):
+    """The four-way ILIKE filter list_all_bookings used before the search indexes."""
+    return select(Booking.id).join(User, Booking.customer_id == User.id).where(
+        (Booking.booking_number.ilike(f"%{term}%")) |
+        (User.email.ilike(f"%{term}%")) |
+        (User.first_name.ilike(f"%{term}%")) |
+        (User.last_name.ilike(f"%{term}%"))
+    ).order_by(Booking.id.desc()).limit(50)
+
+
+def new_filter(term):
+    return select(Booking.id).where(Booking.id.in_(matching_booking_ids(term))).order_by(Booking.id.desc()).limit(50)
+
+
+def timed(conn, stmt):
+    """Median wall time in ms over REPEATS runs, after one warm-up run."""
+    conn.execute(stmt).all()
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        conn.execute(stmt).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def run_benchmark(bookings: int, users: int):
+    if engine.dialect.name != "postgresql":
+        print("❌ The search benchmark needs Postgres (pg_trgm)")
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print(f"Generating {bookings:,} bookings and {users:,} users in schema {SCHEMA}...")
+        started = time.perf_counter()
+        conn.execute(text(SETUP.format(schema=SCHEMA, bookings=bookings, users=users)))
+        print(f"   done in {time.perf_counter() - started:.0f}s")
+
+        print(f"\n{'term':<18}{'old ILIKE (no idx)':>20}{'new (no idx)':>14}")
+        baseline = {}
+        for term in TERMS:
+            baseline[term] = (timed(conn, old_filter(term)), timed(conn, new_filter(term)))
+            print(f"{term:<18}{baseline[term][0]:>17.1f} ms{baseline[term][1]:>11.1f} ms")
+
+        print("\nBuilding search indexes...")
+        started = time.perf_counter()
+        conn.execute(text(SEARCH_INDEXES.format(schema=SCHEMA)))
+        print(f"   done in {time.perf_counter() - started:.0f}s")
+
+        print(f"\n{'term':<18}{'old ILIKE':>12}{'new filter':>14}{'ranked search':>16}{'hits':>6}")
+        for term in TERMS:
+            old_ms = timed(conn, old_filter(term))
+            new_ms = timed(conn, new_filter(term))
+
+            with engine.connect() as search_conn:
+                search_conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+                db = Session(bind=search_conn)
+                search_bookings(db, term)
+                samples = []
+                for _ in range(REPEATS):
+                    started = time.perf_counter()
+                    hits = search_bookings(db, term)
+                    samples.append((time.perf_counter() - started) * 1000)
+                ranked_ms = sorted(samples)[len(samples) // 2]
+                db.close()
+
+            print(f"{term:<18}{old_ms:>9.1f} ms{new_ms:>11.1f} ms{ranked_ms:>13.1f} ms{len(hits):>6}")
+
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        print(f"\n✅ Benchmark finished; schema {SCHEMA} dropped")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run_benchmark(*(args + [3_000_000, 500_000][len(args):]))
@@ -13,10 +13,15 @@ try:
 except ImportError:
     CLEANER_DASHBOARD_ENABLED = False
     print("Cleaner dashboard module not available, skipping...")
-from app.database import init_db, SessionLocal
+from app.database import init_db, SessionLocal, async_engine, async_replica_engine
 from app.services.sla_monitor import background_runner
 from app.services.cache import cache_service
+from app.services.websocket_manager import ws_manager
+from app.services.stats_rollup import subscribe_stats_rollups
+from app.services.live_counters import live_counters
+from app.services.audit_writer import audit_writer
 from app.middleware.rate_limiter import RateLimitMiddleware
+from app.middleware.query_counter import QueryCounterMiddleware
 
 
 @asynccontextmanager
@@ -32,14 +37,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Redis not available, using in-memory cache: {e}")
     
+    # Admin stats rollups are dropped, and live dashboard counters
+    # adjusted, on job, payment and cleaner events
+    subscribe_stats_rollups()
+    live_counters.subscribe()
+
+    # Audit log entries are buffered and written in batches
+    await audit_writer.start(SessionLocal)
+
     # Start background tasks
     await background_runner.start(SessionLocal)
+    await ws_manager.start()
     
     yield
     
     # Shutdown
+    await ws_manager.stop()
     await background_runner.stop()
+    await audit_writer.stop()
     await cache_service.disconnect()
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
 
 
 app = FastAPI(
@@ -53,6 +72,13 @@ app = FastAPI(
 # Disable in debug mode for easier testing
 app.add_middleware(RateLimitMiddleware, enabled=not settings.DEBUG)
 
+# Per-request query count and database time (Server-Timing, N+1 warnings)
+app.add_middleware(
+    QueryCounterMiddleware,
+    enabled=settings.QUERY_INSTRUMENTATION_ENABLED,
+    server_timing=settings.QUERY_SERVER_TIMING_ENABLED
+)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -60,6 +86,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -164,6 +164,12 @@ export function useWebSocket(url, options = {}) {
                         return;
                     }
 
+                    // Answer server heartbeat so the connection is not reaped
+                    if (data.type === 'ping') {
+                        ws.send(JSON.stringify({ type: 'pong' }));
+                        return;
+                    }
+
                     // Call type-specific handler
                     const handler = messageHandlers[data.type];
                     if (handler) {
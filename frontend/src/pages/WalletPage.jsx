@@ -20,6 +20,7 @@ const WalletPage = () => {
   const [transactions, setTransactions] = useState([]);
   const [transactionPage, setTransactionPage] = useState(1);
   const [hasMoreTransactions, setHasMoreTransactions] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
   const [totalTransactions, setTotalTransactions] = useState(0);
   const [filterType, setFilterType] = useState('all');
   const [showTopUpModal, setShowTopUpModal] = useState(false);
@@ -58,8 +59,10 @@ const WalletPage = () => {
   const fetchTransactions = async () => {
     try {
       const typeParam = filterType !== 'all' ? `&type=${filterType}` : '';
+      // Later pages continue from the previous page's cursor
+      const cursorParam = transactionPage > 1 && nextCursor ? `&cursor=${encodeURIComponent(nextCursor)}` : '';
       const response = await fetch(
-        `${API}/wallet/transactions?page=${transactionPage}&page_size=10${typeParam}`,
+        `${API}/wallet/transactions?page_size=10${typeParam}${cursorParam}`,
         { headers: { 'Authorization': `Bearer ${token}` } }
       );
       if (response.ok) {
@@ -70,6 +73,7 @@ const WalletPage = () => {
           setTransactions(prev => [...prev, ...data.transactions]);
         }
         setHasMoreTransactions(data.has_more);
+        setNextCursor(data.next_cursor);
         setTotalTransactions(data.total);
       }
     } catch (error) {